@@ -1,48 +1,54 @@
 import os
 import json
-from cdp import Cdp, Wallet, MnemonicSeedPhrase
-from dotenv import load_dotenv
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from decimal import Context, Decimal
+from fractions import Fraction
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 # --- Configuration & Setup ---
 
-# Load environment variables
-load_dotenv()
-
-CDP_API_KEY = os.getenv("CDP_API_KEY")
-CDP_API_KEY_SECRET = os.getenv("CDP_API_KEY_SECRET")
-MNEMONIC_PHRASE = os.getenv("MNEMONIC_PHRASE")
-
 # Contract Addresses
 CONTRACT_ADDRESS_ETHOS = "0x07D5A0A089c7E5cbd5095B5bc3A242A21C0a8D60"
 CONTRACT_ADDRESS_STAKING = "0xD4b47EE9879470179bAC7BECf49d2755ce5a8ea0"
 SERAPH_CONTRACT_ADDRESS = "0x4f81837C2f4A189A0B69370027cc2627d93785B4"
 STTAO_CONTRACT_ADDRESS = "0x806041B6473DA60abbe1b256d9A2749A151be6C6"
 
-# Contract ABI Paths
-ABI_PATH_ETHOS = "../abis/ethos-trade-abi.json"
-ABI_PATH_STAKING = "../abis/seraph-staking-abi.json"
-ABI_PATH_SERAPH = "../abis/seraph-abi.json"
-ABI_PATH_STTAO = "../abis/sttao-abi.json"
+# Contract ABI Paths, resolved relative to the package rather than the CWD
+ABI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "abis")
+ABI_PATH_ETHOS = os.path.join(ABI_DIR, "ethos-trade-abi.json")
+ABI_PATH_STAKING = os.path.join(ABI_DIR, "seraph-staking-abi.json")
+ABI_PATH_SERAPH = os.path.join(ABI_DIR, "seraph-abi.json")
+ABI_PATH_STTAO = os.path.join(ABI_DIR, "sttao-abi.json")
 
 # Ethos Market ID
 AIXBT_MARKET_ID = 898
 
+NETWORK_ID = "base-mainnet"
 
-# --- Initialization ---
-
-# Validate environment variables
-if not all([CDP_API_KEY, CDP_API_KEY_SECRET, MNEMONIC_PHRASE]):
-    raise ValueError("Missing required environment variables.")
-
-# Initialize CDP API
-Cdp.configure(CDP_API_KEY, CDP_API_KEY_SECRET)
-
-# Initialize Wallet
-wallet = Wallet.import_wallet(
-    MnemonicSeedPhrase(MNEMONIC_PHRASE), network_id="base-mainnet"
-)
+# The ERC-20 view functions used for any token without a bundled ABI
+ERC20_ABI = [
+    {"type": "function", "name": "balanceOf", "stateMutability": "view",
+     "inputs": [{"name": "account", "type": "address"}],
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "allowance", "stateMutability": "view",
+     "inputs": [{"name": "owner", "type": "address"}, {"name": "spender", "type": "address"}],
+     "outputs": [{"name": "", "type": "uint256"}]},
+    {"type": "function", "name": "decimals", "stateMutability": "view",
+     "inputs": [], "outputs": [{"name": "", "type": "uint8"}]},
+    {"type": "function", "name": "approve", "stateMutability": "nonpayable",
+     "inputs": [{"name": "spender", "type": "address"}, {"name": "amount", "type": "uint256"}],
+     "outputs": [{"name": "", "type": "bool"}]},
+]
 
 
+@lru_cache(maxsize=None)
 def load_abi(abi_path: str) -> dict:
     """Loads a contract ABI from a JSON file."""
     try:
@@ -54,61 +60,895 @@ def load_abi(abi_path: str) -> dict:
         raise ValueError(f"Error decoding ABI JSON file at {abi_path}")
 
 
-# Load ABIs
-abi_ethos = load_abi(ABI_PATH_ETHOS)
-abi_staking = load_abi(ABI_PATH_STAKING)
-abi_seraph = load_abi(ABI_PATH_SERAPH)
-abi_sttao = load_abi(ABI_PATH_STTAO)
+# --- Initialization ---
+
+class EthosTrader:
+    """
+    CDP wallet and contract ABIs used for trading.
+
+    Nothing touches the network or the filesystem until first use: the
+    wallet is imported on first access and each ABI is parsed once, when
+    first needed.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_key_secret: Optional[str] = None,
+        mnemonic_phrase: Optional[str] = None,
+        network_id: str = NETWORK_ID,
+    ):
+        self.api_key = api_key or os.getenv("CDP_API_KEY")
+        self.api_key_secret = api_key_secret or os.getenv("CDP_API_KEY_SECRET")
+        self.mnemonic_phrase = mnemonic_phrase or os.getenv("MNEMONIC_PHRASE")
+        self.network_id = network_id
+        self._wallet = None
+        self._wallet_lock = threading.Lock()
+
+        # Validate environment variables
+        if not all([self.api_key, self.api_key_secret, self.mnemonic_phrase]):
+            raise ValueError("Missing required environment variables.")
+
+    @property
+    def wallet(self):
+        """The CDP wallet, imported on first access."""
+        with self._wallet_lock:
+            if self._wallet is None:
+                from cdp import Cdp, Wallet, MnemonicSeedPhrase
+
+                # Initialize CDP API
+                Cdp.configure(self.api_key, self.api_key_secret)
+
+                # Initialize Wallet
+                self._wallet = Wallet.import_wallet(
+                    MnemonicSeedPhrase(self.mnemonic_phrase), network_id=self.network_id
+                )
+            return self._wallet
+
+    @property
+    def abi_ethos(self) -> dict:
+        return load_abi(ABI_PATH_ETHOS)
+
+    @property
+    def abi_staking(self) -> dict:
+        return load_abi(ABI_PATH_STAKING)
+
+    @property
+    def abi_seraph(self) -> dict:
+        return load_abi(ABI_PATH_SERAPH)
+
+    @property
+    def abi_sttao(self) -> dict:
+        return load_abi(ABI_PATH_STTAO)
+
+    def token_abi(self, token_address: str):
+        """Returns the bundled ABI of a token, or a minimal ERC-20 ABI."""
+        if token_address.lower() == STTAO_CONTRACT_ADDRESS.lower():
+            return self.abi_sttao
+        if token_address.lower() == SERAPH_CONTRACT_ADDRESS.lower():
+            return self.abi_seraph
+        return ERC20_ABI
+
+    def read_contract(self, contract_address: str, abi, method: str, args: Optional[dict] = None):
+        """Calls a view function through the CDP API; nothing is broadcast."""
+        from cdp import SmartContract
+
+        self.wallet  # configures the CDP API on first use
+        return SmartContract.read(
+            self.network_id, contract_address, method, abi=abi, args=args or {}
+        )
+
+
+_trader = None
+_trader_lock = threading.Lock()
+
+
+def get_trader() -> EthosTrader:
+    """Returns the shared trader, loading .env and credentials on first use."""
+    global _trader
+    with _trader_lock:
+        if _trader is None:
+            from dotenv import load_dotenv
+
+            # Load environment variables
+            load_dotenv()
+            _trader = EthosTrader()
+        return _trader
+
+
+def set_trader(trader: EthosTrader):
+    """Replaces the shared trader, e.g. with one whose wallet is a local stand-in."""
+    global _trader
+    with _trader_lock:
+        _trader = trader
+
 
+def __getattr__(name: str):
+    """Keeps `wallet` and `abi_*` importable as lazily resolved module attributes."""
+    if name == "wallet" or name in ("abi_ethos", "abi_staking", "abi_seraph", "abi_sttao"):
+        return getattr(get_trader(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --- Call Observers ---
+
+# Notified of every contract call as (label, phase, seconds, ok), where phase
+# is "execute" (broadcast and wait), "send" (broadcast) or "confirm"
+_call_observers: List[Callable[[str, str, float, bool], None]] = []
+
+
+def add_call_observer(observer: Callable[[str, str, float, bool], None]):
+    """Registers a callable notified of each contract call's latency and outcome, once."""
+    if observer not in _call_observers:
+        _call_observers.append(observer)
+
+
+def _notify_call(label: str, phase: str, seconds: float, ok: bool):
+    for observer in list(_call_observers):
+        try:
+            observer(label, phase, seconds, ok)
+        except Exception as e:
+            print(f"[WARN] Call observer failed: {e}")
+
+
+# Notified of every settled trade intent and reward transfer, as a dict with
+# "kind" set to "trade" (the audit entry) or "transfer"
+_event_observers: List[Callable[[dict], None]] = []
+
+
+def add_event_observer(observer: Callable[[dict], None]):
+    """Registers a callable notified of each trade and transfer outcome."""
+    _event_observers.append(observer)
+
+
+def _notify_event(event: dict):
+    for observer in list(_event_observers):
+        try:
+            observer(event)
+        except Exception as e:
+            print(f"[WARN] Event observer failed: {e}")
+
+
+# --- Call Guard ---
+
+def _unguarded(operation: str, kind: str, call: Callable[[Optional[float]], Any]):
+    return call(None)
+
+
+# Runs every CDP send and read as guard(operation, kind, call), where kind is
+# "write" or "read" and call takes a timeout in seconds (None for the default).
+# A guard may abandon a hung write by raising TimeoutError; the write is then
+# treated as possibly broadcast and never sent again.
+_call_guard: Callable[[str, str, Callable[[Optional[float]], Any]], Any] = _unguarded
+
+
+def set_call_guard(guard: Optional[Callable[[str, str, Callable[[Optional[float]], Any]], Any]]):
+    """Routes CDP calls through a guard, e.g. a circuit breaker; None removes it."""
+    global _call_guard
+    _call_guard = guard or _unguarded
 
 
 # --- Helper Functions ---
 
+def invoke_contract_method(
+    contract_address: str, abi: dict, method: str, args: dict
+):
+    """Broadcasts a contract method call without waiting for it to be mined."""
+    return get_trader().wallet.invoke_contract(
+        contract_address=contract_address, abi=abi, method=method, args=args
+    )
+
+
 def execute_contract_method(
     contract_address: str, abi: dict, method: str, args: dict
 ):
     """Executes a contract method using the CDP wallet."""
+    started = time.monotonic()
     try:
-        invocation = wallet.invoke_contract(
-            contract_address=contract_address, abi=abi, method=method, args=args
+        invocation = _call_guard(
+            method, "write",
+            lambda timeout: invoke_contract_method(contract_address, abi, method, args)
         )
-        tx = invocation.wait()
+        tx = invocation.wait(timeout_seconds=CONFIRMATION_TIMEOUT_SECONDS)
+        _notify_call(method, "execute", time.monotonic() - started, True)
         return tx
     except Exception as e:
         print(f"Error executing {method}: {e}")
+        _notify_call(method, "execute", time.monotonic() - started, False)
         return None
 
+
+# --- Settlement Queue ---
+
+# Seconds to wait for a transaction before it is reported as stuck
+CONFIRMATION_TIMEOUT_SECONDS = 60
+# Extra confirmation windows a stuck transaction is given before giving up
+MAX_STUCK_WAITS = 4
+# Confirmed, failed and cancelled ledger entries kept for inspection
+MAX_FINISHED_ENTRIES = 1000
+_FINISHED_STATUSES = ("confirmed", "failed", "cancelled", "unknown")
+
+
+class _FileLock:
+    """Exclusive lock on a file, shared by every process that opens it (POSIX)."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a")
+
+    def __enter__(self):
+        import fcntl
+
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        import fcntl
+
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+
+class SettlementQueue:
+    """
+    Submits transactions in the background and resolves them asynchronously.
+
+    A single submitter thread broadcasts intents in the order they were
+    queued, so the wallet's transactions take consecutive nonces, while
+    waiting for confirmations happens on a separate pool so a slow block
+    does not hold up the next submission. Independent transactions from
+    the wallet are therefore pipelined; an intent that depends on earlier
+    ones (e.g. a reward that spends an allowance) is only broadcast once
+    they are mined, since the CDP API simulates each call when building it.
+
+    Every broadcast is tracked in `ledger` by its submission sequence
+    number, so in-flight and stuck transactions can be inspected; only the
+    most recent `max_finished` settled entries are kept. The CDP
+    API assigns nonces and fees itself and cannot re-sign a pending
+    transaction, so a stuck transaction is waited on for a few more windows
+    and then reported as failed rather than replaced. A broadcast abandoned
+    by the call guard's timeout is marked `unknown`, since it may still land.
+
+    Several processes sharing the wallet each run their own queue; given
+    the same `submit_lock_path`, they take turns broadcasting, so their
+    transactions are still sent one at a time in a single order.
+    """
+
+    def __init__(
+        self,
+        confirm_workers: int = 4,
+        confirmation_timeout: float = CONFIRMATION_TIMEOUT_SECONDS,
+        max_stuck_waits: int = MAX_STUCK_WAITS,
+        max_finished: int = MAX_FINISHED_ENTRIES,
+        submit_lock_path: Optional[str] = None,
+    ):
+        self.confirmation_timeout = confirmation_timeout
+        self.max_stuck_waits = max_stuck_waits
+        self.max_finished = max_finished
+        self.ledger = {}
+        self._finished = deque()
+        self._submit_lock = _FileLock(submit_lock_path) if submit_lock_path else nullcontext()
+        self._sequence = itertools.count()
+        self._ledger_lock = threading.Lock()
+        self._intents = queue.Queue()
+        self._confirmer = ThreadPoolExecutor(
+            max_workers=confirm_workers, thread_name_prefix="settlement-confirm"
+        )
+        self._submitter = threading.Thread(
+            target=self._run, name="settlement-submit", daemon=True
+        )
+        self._submitter.start()
+
+    def submit(
+        self, label: str, send: Callable, *args, depends_on: Sequence[Future] = ()
+    ) -> Future:
+        """
+        Queues an intent and returns a handle immediately.
+
+        `send` must broadcast the transaction and return an object with a
+        blocking `wait()`. The handle resolves to the confirmed transaction,
+        or to None if submission or confirmation failed. Intents listed in
+        `depends_on` must be mined first; if any of them fails, this intent
+        is never sent and resolves to None.
+        """
+        handle = Future()
+        entry = self._track(label, "waiting" if depends_on else "queued")
+        intent = (label, send, args, handle, entry)
+        if not depends_on:
+            self._intents.put(intent)
+            return handle
+
+        remaining = [len(depends_on)]
+        remaining_lock = threading.Lock()
+
+        def on_dependency_done(dependency: Future):
+            with remaining_lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if not ready:
+                return
+            if any(d.result() is None for d in depends_on):
+                print(f"Skipping {label}: a transaction it depends on failed")
+                self._update(entry, status="failed")
+                handle.set_result(None)
+                return
+            self._update(entry, status="queued")
+            self._intents.put(intent)
+
+        for dependency in depends_on:
+            dependency.add_done_callback(on_dependency_done)
+        return handle
+
+    def in_flight(self) -> list:
+        """Returns ledger entries that are broadcast but not yet confirmed."""
+        with self._ledger_lock:
+            return [
+                dict(entry) for entry in self.ledger.values()
+                if entry["status"] in ("submitted", "stuck")
+            ]
+
+    def _track(self, label: str, status: str) -> dict:
+        with self._ledger_lock:
+            entry = {"sequence": next(self._sequence), "label": label, "status": status}
+            self.ledger[entry["sequence"]] = entry
+            return entry
+
+    def _update(self, entry: dict, **changes):
+        with self._ledger_lock:
+            entry.update(changes)
+            if changes.get("status") in _FINISHED_STATUSES:
+                self._finished.append(entry["sequence"])
+                while len(self._finished) > self.max_finished:
+                    self.ledger.pop(self._finished.popleft(), None)
+
+    def _run(self):
+        while True:
+            label, send, args, handle, entry = self._intents.get()
+            if not handle.set_running_or_notify_cancel():
+                self._update(entry, status="cancelled")
+                continue
+            started = time.monotonic()
+            try:
+                # Held for the broadcast only, not the confirmation
+                with self._submit_lock:
+                    pending = _call_guard(label, "write", lambda timeout: send(*args))
+            except TimeoutError as e:
+                # The abandoned broadcast may still land, so it is not a plain failure
+                print(f"[WARN] {label} timed out and may still be broadcast: {e}")
+                _notify_call(label, "send", time.monotonic() - started, False)
+                self._update(entry, status="unknown")
+                handle.set_result(None)
+                continue
+            except Exception as e:
+                print(f"Error executing {label}: {e}")
+                _notify_call(label, "send", time.monotonic() - started, False)
+                self._update(entry, status="failed")
+                handle.set_result(None)
+                continue
+            _notify_call(label, "send", time.monotonic() - started, True)
+            self._update(
+                entry,
+                status="submitted",
+                submitted_at=time.time(),
+                tx_hash=getattr(pending, "transaction_hash", None),
+            )
+            self._confirmer.submit(self._confirm, label, pending, handle, entry)
+
+    def _confirm(self, label: str, pending, handle: Future, entry: dict):
+        started = time.monotonic()
+        for attempt in range(self.max_stuck_waits + 1):
+            try:
+                tx = pending.wait(timeout_seconds=self.confirmation_timeout)
+            except TimeoutError:
+                self._update(entry, status="stuck")
+                print(
+                    f"[WARN] {label} not mined after "
+                    f"{self.confirmation_timeout * (attempt + 1):.0f}s, still waiting..."
+                )
+                continue
+            except Exception as e:
+                print(f"Error confirming {label}: {e}")
+                _notify_call(label, "confirm", time.monotonic() - started, False)
+                self._update(entry, status="failed")
+                handle.set_result(None)
+                return
+            self._update(
+                entry,
+                status="confirmed",
+                tx_hash=getattr(tx, "transaction_hash", entry.get("tx_hash")),
+            )
+            _notify_call(label, "confirm", time.monotonic() - started, True)
+            handle.set_result(tx)
+            return
+        print(f"Error confirming {label}: transaction stuck")
+        _notify_call(label, "confirm", time.monotonic() - started, False)
+        self._update(entry, status="failed")
+        handle.set_result(None)
+
+
+_settlement_queue = None
+_settlement_queue_lock = threading.Lock()
+
+
+def get_settlement_queue() -> SettlementQueue:
+    """Returns the shared settlement queue, configured from the environment."""
+    global _settlement_queue
+    with _settlement_queue_lock:
+        if _settlement_queue is None:
+            _settlement_queue = SettlementQueue(
+                submit_lock_path=os.getenv("SETTLEMENT_LOCK_PATH")
+            )
+        return _settlement_queue
+
+
+# --- Token State ---
+
+# Base produces a block every two seconds; a cached read is reused within one
+BLOCK_TIME_SECONDS = 2.0
+
+# A read request: ("balance", token, None) or ("allowance", token, spender)
+TokenRead = Tuple[str, str, Optional[str]]
+# Enough digits for any uint256, so unit conversions never round
+_EXACT = Context(prec=78)
+
+
+class TokenState:
+    """
+    The wallet's token balances and allowances, read in exact base units.
+
+    Reads are cached for one block and a batch of them is issued
+    concurrently, so a reward run costs one round-trip however many tokens
+    it covers. No multicall contract is deployed for these tokens, so each
+    read is still its own CDP call. Decimals never change and are cached
+    for good. Callers invalidate a token once their own transaction
+    touching it is mined.
+    """
+
+    def __init__(
+        self,
+        block_time: float = BLOCK_TIME_SECONDS,
+        max_workers: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.block_time = block_time
+        self._clock = clock
+        self._cache: Dict[TokenRead, Tuple[int, float]] = {}
+        self._decimals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._reader = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="token-read")
+
+    def _read(self, request: TokenRead) -> int:
+        kind, token, spender = request
+        trader = get_trader()
+        owner = trader.wallet.default_address.address_id
+        if kind == "balance":
+            method, args = "balanceOf", {"account": owner}
+        elif kind == "allowance":
+            method, args = "allowance", {"owner": owner, "spender": spender}
+        else:
+            raise ValueError(f"Unknown token read: {kind}")
+        return int(_call_guard(
+            method, "read",
+            lambda timeout: trader.read_contract(token, trader.token_abi(token), method, args)
+        ))
+
+    def read_many(self, requests: Sequence[TokenRead]) -> Dict[TokenRead, int]:
+        """Returns the requested values, reading the uncached ones concurrently."""
+        now = self._clock()
+        results = {}
+        with self._lock:
+            for request in requests:
+                cached = self._cache.get(request)
+                if cached is not None and cached[1] > now:
+                    results[request] = cached[0]
+        missing = [request for request in dict.fromkeys(requests) if request not in results]
+        futures = {request: self._reader.submit(self._read, request) for request in missing}
+        for request, future in futures.items():
+            results[request] = future.result()
+        with self._lock:
+            for request in missing:
+                self._cache[request] = (results[request], now + self.block_time)
+        return results
+
+    def balance(self, token: str) -> int:
+        """Returns the wallet's balance of a token in base units."""
+        request = ("balance", token, None)
+        return self.read_many([request])[request]
+
+    def allowance(self, token: str, spender: str) -> int:
+        """Returns how much of a token the spender may move for the wallet."""
+        request = ("allowance", token, spender)
+        return self.read_many([request])[request]
+
+    def decimals(self, token: str) -> int:
+        """Returns a token's decimals, read once."""
+        with self._lock:
+            if token in self._decimals:
+                return self._decimals[token]
+        trader = get_trader()
+        value = int(_call_guard(
+            "decimals", "read",
+            lambda timeout: trader.read_contract(token, trader.token_abi(token), "decimals")
+        ))
+        with self._lock:
+            self._decimals[token] = value
+        return value
+
+    def to_units(self, amount: Union[Decimal, str, int], token: str) -> int:
+        """Converts a whole-token amount to base units without rounding through float."""
+        units = Decimal(amount).scaleb(self.decimals(token), _EXACT)
+        if units != units.to_integral_value():
+            raise ValueError(f"{amount} has more precision than the token's decimals")
+        return int(units)
+
+    def from_units(self, units: int, token: str) -> Decimal:
+        """Converts base units to an exact whole-token amount."""
+        return Decimal(units).scaleb(-self.decimals(token), _EXACT)
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drops cached reads of a token, or of every token."""
+        with self._lock:
+            for request in list(self._cache):
+                if token is None or request[1] == token:
+                    del self._cache[request]
+
+
+_token_state = None
+
+
+def get_token_state() -> TokenState:
+    """Returns the shared token state cache."""
+    global _token_state
+    with _settlement_queue_lock:
+        if _token_state is None:
+            _token_state = TokenState()
+        return _token_state
+
 # --- Contract Specific Functions ---
 
 def execute_trade(method: str, market_id: int):
     """Executes a trade on the Ethos contract."""
     args = {"_marketId": str(market_id)}
-    return execute_contract_method(CONTRACT_ADDRESS_ETHOS, abi_ethos, method, args)
+    return execute_contract_method(CONTRACT_ADDRESS_ETHOS, get_trader().abi_ethos, method, args)
 
 
 def execute_reward(method: str, rewardToken: str, rewardAmount: int):
     """Executes a reward function on the Staking contract."""
     args = {"_rewardToken": str(rewardToken), "_rewardAmount": str(rewardAmount)}
-    return execute_contract_method(CONTRACT_ADDRESS_STAKING, abi_staking, method, args)
+    return execute_contract_method(CONTRACT_ADDRESS_STAKING, get_trader().abi_staking, method, args)
+
+
+def send_reward(method: str, rewardToken: str, rewardAmount: int):
+    """Broadcasts a reward function on the Staking contract without waiting for it to be mined."""
+    args = {"_rewardToken": str(rewardToken), "_rewardAmount": str(rewardAmount)}
+    return invoke_contract_method(CONTRACT_ADDRESS_STAKING, get_trader().abi_staking, method, args)
+
+
+def send_approve(token_address: str, spender: str, amount: int):
+    """Broadcasts an approve on any token contract without waiting for it to be mined."""
+    args = {"spender": spender, "amount": str(amount)}
+    return invoke_contract_method(
+        token_address, get_trader().token_abi(token_address), "approve", args
+    )
+
+
+def queue_trade(method: str, market_id: int) -> Future:
+    """Queues a trade on the Ethos contract and returns its settlement handle."""
+    args = {"_marketId": str(market_id)}
+    return get_settlement_queue().submit(
+        method, invoke_contract_method, CONTRACT_ADDRESS_ETHOS, get_trader().abi_ethos, method, args
+    )
 
 
 def execute_approve_sttao(method: str, spender: str, amount: int):
     """Executes an approve function on the stTAO contract."""
     args = {"spender": spender, "amount": str(amount)}
-    return execute_contract_method(STTAO_CONTRACT_ADDRESS, abi_sttao, method, args)
+    return execute_contract_method(STTAO_CONTRACT_ADDRESS, get_trader().abi_sttao, method, args)
 
 
 def execute_approve_seraph(method: str, spender: str, amount: int):
     """Executes an approve function on the SERAPH contract."""
     args = {"spender": spender, "amount": str(amount)}
-    return execute_contract_method(SERAPH_CONTRACT_ADDRESS, abi_seraph, method, args)
+    return execute_contract_method(SERAPH_CONTRACT_ADDRESS, get_trader().abi_seraph, method, args)
+
+
+# --- Trade Batching ---
+
+# Audit entries kept in memory; the audit log file, if set, keeps them all
+AUDIT_LOG_ENTRIES = 1000
+
+# Trade methods by position side, as (buy, sell)
+TRADE_SIDES = {
+    "trust": ("longeetTrust", "dumpeetTrust"),
+    "distrust": ("longeetDistrust", "dumpeetDistrust"),
+}
+TRADE_DIRECTIONS = {
+    method: (side, 1 if index == 0 else -1)
+    for side, methods in TRADE_SIDES.items()
+    for index, method in enumerate(methods)
+}
+
+
+class NettedTrade:
+    """Result of a trade intent cancelled out by an opposing one; nothing was sent."""
+
+    transaction_hash = None
+    outcome = "netted against an opposing trade"
+
+    def __init__(self, netted_with: Optional[str]):
+        self.netted_with = netted_with
+
+
+class TradeBatcher:
+    """
+    Coalesces trade intents per market over a short window and nets
+    opposing trades before submitting them.
+
+    Each Ethos trade method moves exactly one vote, so a buy and a sell of
+    the same side within a window cancel out and are never sent; the
+    remaining intents are submitted through the settlement queue. Every
+    intent is written to the audit log with the transaction it was folded
+    into, or with the intent it was netted against; only the latest
+    `audit_entries` are kept in memory.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 2.0,
+        audit_log_path: Optional[str] = None,
+        audit_entries: int = AUDIT_LOG_ENTRIES,
+    ):
+        self.window_seconds = window_seconds
+        self.audit_log_path = audit_log_path
+        self.audit_log = deque(maxlen=audit_entries)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._batch_ids = itertools.count(1)
+
+    def submit(
+        self, method: str, market_id: int, verification_id: Optional[str] = None
+    ) -> Future:
+        """
+        Queues a trade intent and returns a handle immediately.
+
+        The handle resolves to the mined transaction the intent was folded
+        into, to a NettedTrade if it was netted out, or to None if it failed.
+        """
+        if method not in TRADE_DIRECTIONS:
+            raise ValueError(f"Unknown trade method: {method}")
+        handle = Future()
+        with self._lock:
+            intents = self._pending.get(market_id)
+            if intents is None:
+                intents = self._pending[market_id] = []
+                timer = threading.Timer(self.window_seconds, self.flush, args=(market_id,))
+                timer.daemon = True
+                timer.start()
+            intents.append((method, verification_id, handle))
+        return handle
+
+    def flush(self, market_id: int):
+        """Nets and submits all pending intents for a market."""
+        with self._lock:
+            intents = self._pending.pop(market_id, [])
+        if not intents:
+            return
+        batch_id = next(self._batch_ids)
+
+        for side in TRADE_SIDES:
+            buys = [i for i in intents if TRADE_DIRECTIONS[i[0]] == (side, 1)]
+            sells = [i for i in intents if TRADE_DIRECTIONS[i[0]] == (side, -1)]
+            # Pair off opposing intents; only the surplus is traded
+            for buy, sell in zip(buys, sells):
+                for intent, counterpart in ((buy, sell), (sell, buy)):
+                    self._audit(batch_id, market_id, intent, "netted", netted_with=counterpart[1])
+                    intent[2].set_result(NettedTrade(counterpart[1]))
+            netted = min(len(buys), len(sells))
+            for intent in buys[netted:] + sells[netted:]:
+                self._submit(batch_id, market_id, intent)
+
+        print(f"[BATCH] Market {market_id}: {len(intents)} trade intents settled in batch {batch_id}")
+
+    def _submit(self, batch_id: int, market_id: int, intent):
+        method, verification_id, handle = intent
+        settlement = queue_trade(method, market_id)
+
+        def resolve(done: Future):
+            tx = done.result()
+            tx_hash = getattr(tx, "transaction_hash", None)
+            self._audit(
+                batch_id, market_id, intent,
+                "submitted" if tx is not None else "failed",
+                tx_hash=tx_hash,
+            )
+            handle.set_result(tx)
+
+        settlement.add_done_callback(resolve)
+
+    def _audit(self, batch_id: int, market_id: int, intent, status: str, **details):
+        entry = {
+            "batch_id": batch_id,
+            "market_id": market_id,
+            "method": intent[0],
+            "verification_id": intent[1],
+            "status": status,
+            "timestamp": time.time(),
+        }
+        entry.update(details)
+        with self._lock:
+            self.audit_log.append(entry)
+            if self.audit_log_path:
+                with open(self.audit_log_path, "a") as file:
+                    file.write(json.dumps(entry) + "\n")
+        _notify_event(dict(entry, kind="trade"))
+
+
+_trade_batcher = None
+
+
+def get_trade_batcher() -> TradeBatcher:
+    """Returns the shared trade batcher, configured from the environment."""
+    global _trade_batcher
+    with _settlement_queue_lock:
+        if _trade_batcher is None:
+            _trade_batcher = TradeBatcher(
+                window_seconds=float(os.getenv("TRADE_BATCH_WINDOW", "2")),
+                audit_log_path=os.getenv("TRADE_AUDIT_LOG"),
+            )
+        return _trade_batcher
+
+
+def batch_trade(
+    method: str, market_id: int = AIXBT_MARKET_ID, verification_id: Optional[str] = None
+) -> Future:
+    """Queues a trade through the shared batcher, tagged with its verification."""
+    return get_trade_batcher().submit(method, market_id, verification_id)
+
+
+# --- Payout Batching ---
+
+class PayoutBatcher:
+    """
+    Accumulates SERAPH reward payouts and disburses them in batches.
+
+    Payouts are queued per recipient and flushed once `max_batch` are
+    pending or `window_seconds` after the first one, whichever comes first.
+    Payouts to the same address in a batch are merged into one transfer,
+    and a repeated claim returns the handle of the original payout instead
+    of paying twice. No multi-transfer contract is deployed for SERAPH, so
+    a batch goes out as consecutive transfers through the settlement queue,
+    whose confirmations are awaited concurrently. Every payout is written
+    to the audit log with its verification and the transfer it was paid in;
+    only the latest `audit_entries` are kept in memory.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 2.0,
+        max_batch: int = 20,
+        audit_log_path: Optional[str] = None,
+        max_claims: int = 10000,
+        audit_entries: int = AUDIT_LOG_ENTRIES,
+    ):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.audit_log_path = audit_log_path
+        self.max_claims = max_claims
+        self.audit_log = deque(maxlen=audit_entries)
+        self._pending = []
+        self._claims = OrderedDict()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._batch_ids = itertools.count(1)
+
+    def submit(
+        self,
+        to_address: str,
+        amount: Union[Decimal, int] = 1,
+        verification_id: Optional[str] = None,
+        claim_id: Optional[str] = None,
+    ) -> Future:
+        """
+        Queues a payout and returns a handle immediately.
+
+        The handle resolves to the mined transfer the payout was paid in,
+        or to None if it failed. `claim_id` (the verification by default)
+        identifies the claim; a claim already queued or paid is not paid
+        again.
+        """
+        claim_id = claim_id or verification_id
+        with self._lock:
+            if claim_id is not None and claim_id in self._claims:
+                print(f"[INFO] SERAPH payout for {claim_id} already claimed")
+                return self._claims[claim_id]
+            handle = Future()
+            if claim_id is not None:
+                self._claims[claim_id] = handle
+                while len(self._claims) > self.max_claims:
+                    self._claims.popitem(last=False)
+            self._pending.append((to_address, amount, verification_id, handle))
+            if len(self._pending) >= self.max_batch:
+                full = True
+            else:
+                full = False
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window_seconds, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if full:
+            self.flush()
+        return handle
+
+    def flush(self):
+        """Merges pending payouts per recipient and submits the transfers."""
+        with self._lock:
+            payouts, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not payouts:
+            return
+        batch_id = next(self._batch_ids)
+
+        recipients = {}
+        for payout in payouts:
+            recipients.setdefault(payout[0].lower(), []).append(payout)
+        for group in recipients.values():
+            total = sum(payout[1] for payout in group)
+            settlement = get_settlement_queue().submit(
+                "SERAPH payout", _send_seraph, total, group[0][0]
+            )
+            settlement.add_done_callback(
+                partial(self._resolve, batch_id, group, total)
+            )
+
+        print(
+            f"[BATCH] {len(payouts)} SERAPH payouts to {len(recipients)} recipients "
+            f"submitted in batch {batch_id}"
+        )
+
+    def _resolve(self, batch_id: int, group: list, total, done: Future):
+        tx = done.result()
+        for to_address, amount, verification_id, handle in group:
+            self._audit(batch_id, to_address, amount, verification_id, tx, transfer_amount=total)
+            handle.set_result(tx)
+
+    def _audit(self, batch_id: int, to_address: str, amount, verification_id, tx, **details):
+        entry = _transfer_event(to_address, amount, verification_id, tx)
+        entry.update(details, batch_id=batch_id)
+        with self._lock:
+            self.audit_log.append(entry)
+            if self.audit_log_path:
+                with open(self.audit_log_path, "a") as file:
+                    file.write(json.dumps(entry, default=str) + "\n")
+        _notify_event(entry)
+
+
+_payout_batcher = None
+
+
+def get_payout_batcher() -> PayoutBatcher:
+    """Returns the shared payout batcher, configured from the environment."""
+    global _payout_batcher
+    with _settlement_queue_lock:
+        if _payout_batcher is None:
+            _payout_batcher = PayoutBatcher(
+                window_seconds=float(os.getenv("PAYOUT_BATCH_WINDOW", "2")),
+                max_batch=int(os.getenv("PAYOUT_BATCH_SIZE", "20")),
+                audit_log_path=os.getenv("PAYOUT_AUDIT_LOG"),
+            )
+        return _payout_batcher
+
+
+def batch_transfer_seraph(
+    to_address: str, verification_id: Optional[str] = None, amount: Union[Decimal, int] = 1
+) -> Future:
+    """Queues a SERAPH reward through the shared payout batcher, tagged with its verification."""
+    return get_payout_batcher().submit(to_address, amount, verification_id)
 
 
 # --- Public API Functions ---
 
 def get_wallet_address():
     """Returns the default wallet address."""
-    return wallet.default_address.address_id
+    return get_trader().wallet.default_address.address_id
 
 
 def buy_trust(market_id: int = AIXBT_MARKET_ID):
@@ -133,57 +973,467 @@ def sell_distrust(market_id: int = AIXBT_MARKET_ID):
 def transfer_seraph(to_address: str):
     """Transfers 1 SERAPH token to the specified address."""
     try:
-        tx = wallet.transfer(1, SERAPH_CONTRACT_ADDRESS, to_address)
+        tx = _call_guard(
+            "transfer", "write",
+            lambda timeout: get_trader().wallet.transfer(1, SERAPH_CONTRACT_ADDRESS, to_address)
+        )
         return tx
     except Exception as e:
         print(f"Error transferring SERAPH: {e}")
         return None
 
 
-def approve_and_execute_rewards():
-    """Approves and executes rewards for stTAO and SERAPH."""
+# --- Non-blocking Public API Functions ---
+# Each returns a Future resolving to the mined transaction (or None on failure).
 
-    # Approve stTAO
-    sttao_balance = int(float(wallet.balance(STTAO_CONTRACT_ADDRESS)) * 1e9)
-    sttao_approve_tx = execute_approve_sttao(
-        "approve", str(CONTRACT_ADDRESS_STAKING), sttao_balance
-    )
+def buy_trust_async(market_id: int = AIXBT_MARKET_ID) -> Future:
+    """Queues a trust purchase on the Ethos market."""
+    return queue_trade("longeetTrust", market_id)
 
-    if sttao_approve_tx is None:
-        print("Failed to approve stTAO")
-        return None
 
-    # Approve SERAPH
-    seraph_balance = int(float(wallet.balance(SERAPH_CONTRACT_ADDRESS)) * 1e18)
-    seraph_approve_tx = execute_approve_seraph(
-        "approve", str(CONTRACT_ADDRESS_STAKING), seraph_balance
-    )
-    if seraph_approve_tx is None:
-        print("Failed to approve SERAPH")
-        return None
+def buy_distrust_async(market_id: int = AIXBT_MARKET_ID) -> Future:
+    """Queues a distrust purchase on the Ethos market."""
+    return queue_trade("longeetDistrust", market_id)
 
-    # Execute reward for stTAO
-    rewardAmount_sttao = sttao_balance // 10
-    sttao_reward_tx = execute_reward(
-        "updateRewardIndex", str(STTAO_CONTRACT_ADDRESS), rewardAmount_sttao
-    )
-    if sttao_reward_tx is None:
-        print("Failed to execute reward for stTAO")
-        return None
 
-    # Execute reward for SERAPH
-    rewardAmount_seraph = seraph_balance // 10
-    seraph_reward_tx = execute_reward(
-        "updateRewardIndex", str(SERAPH_CONTRACT_ADDRESS), rewardAmount_seraph
-    )
-    if seraph_reward_tx is None:
-        print("Failed to execute reward for SERAPH")
-        return None
+def sell_trust_async(market_id: int = AIXBT_MARKET_ID) -> Future:
+    """Queues a trust sale on the Ethos market."""
+    return queue_trade("dumpeetTrust", market_id)
+
+
+def sell_distrust_async(market_id: int = AIXBT_MARKET_ID) -> Future:
+    """Queues a distrust sale on the Ethos market."""
+    return queue_trade("dumpeetDistrust", market_id)
+
 
+def _send_seraph(amount, to_address: str):
+    """Broadcasts a SERAPH transfer without waiting for it to be mined."""
+    return get_trader().wallet.transfer(amount, SERAPH_CONTRACT_ADDRESS, to_address)
+
+
+def _transfer_event(to_address: str, amount, verification_id: Optional[str], tx) -> dict:
+    """Builds the event published for a settled SERAPH transfer."""
     return {
-        "sttao_approve_tx": sttao_approve_tx,
-        "seraph_approve_tx": seraph_approve_tx,
-        "sttao_reward_tx": sttao_reward_tx,
-        "seraph_reward_tx": seraph_reward_tx,
+        "kind": "transfer",
+        "asset": "SERAPH",
+        "amount": amount,
+        "to_address": to_address,
+        "verification_id": verification_id,
+        "status": "confirmed" if tx is not None else "failed",
+        "tx_hash": getattr(tx, "transaction_hash", None),
+        "timestamp": time.time(),
     }
-    
\ No newline at end of file
+
+
+def transfer_seraph_async(to_address: str, verification_id: Optional[str] = None) -> Future:
+    """Queues a transfer of 1 SERAPH token to the specified address."""
+    handle = get_settlement_queue().submit(
+        "SERAPH transfer", _send_seraph, 1, to_address
+    )
+    handle.add_done_callback(
+        lambda done: _notify_event(_transfer_event(to_address, 1, verification_id, done.result()))
+    )
+    return handle
+
+
+def approve_and_execute_rewards(run_id: Optional[str] = None):
+    """
+    Executes one reward run now, by default 1/10th of the stTAO and SERAPH
+    balances into staking rewards.
+
+    Returns the run's transaction hashes keyed like `sttao_reward_tx`, or
+    None if any reward failed. Passing the run_id of an interrupted run
+    resumes it.
+    """
+    return get_reward_engine().run(run_id)
+
+
+# --- Reward Engine ---
+
+# Seconds between scheduled reward runs
+REWARD_INTERVAL_SECONDS = 24 * 60 * 60
+
+# Steps after which a token's reward is never sent again within a run
+_FINAL_REWARD_STEPS = ("rewarded", "skipped", "unconfirmed")
+# Steps after which the reward may have reached the chain
+_BROADCAST_REWARD_STEPS = ("reward_sending", "reward_sent", "reward_failed")
+# Completed runs kept in the run log; older ones are compacted away
+MAX_COMPLETED_RUNS = 100
+
+
+class SplitPolicy:
+    """
+    How much of a token balance one reward run distributes.
+
+    The reward is `share` of whatever the balance holds above `reserve`,
+    capped at `cap`. Reserve and cap are whole-token amounts; the result is
+    computed exactly in base units.
+    """
+
+    def __init__(
+        self,
+        share: Union[Decimal, str, int] = "0.1",
+        reserve: Union[Decimal, str, int] = 0,
+        cap: Optional[Union[Decimal, str, int]] = None,
+    ):
+        self.share = Fraction(Decimal(share))
+        self.reserve = Decimal(reserve)
+        self.cap = None if cap is None else Decimal(cap)
+        if not 0 <= self.share <= 1:
+            raise ValueError(f"Reward share must be between 0 and 1, got {share}")
+
+    def amount(self, balance: int, decimals: int) -> int:
+        """Returns the reward in base units for a balance in base units."""
+        available = balance - int(self.reserve.scaleb(decimals, _EXACT))
+        if available <= 0:
+            return 0
+        reward = available * self.share.numerator // self.share.denominator
+        if self.cap is not None:
+            reward = min(reward, int(self.cap.scaleb(decimals, _EXACT)))
+        return reward
+
+
+class RewardToken(NamedTuple):
+    """A token distributed into staking rewards and its split policy."""
+    name: str
+    address: str
+    policy: SplitPolicy
+
+
+DEFAULT_REWARD_TOKENS = [
+    RewardToken("stTAO", STTAO_CONTRACT_ADDRESS, SplitPolicy("0.1")),
+    RewardToken("SERAPH", SERAPH_CONTRACT_ADDRESS, SplitPolicy("0.1")),
+]
+
+
+def load_reward_tokens(path: str) -> List[RewardToken]:
+    """
+    Loads reward tokens from a JSON list of objects with `name`, `address`
+    and optional `share`, `reserve` and `cap`.
+    """
+    with open(path, "r") as file:
+        config = json.load(file)
+    return [
+        RewardToken(
+            item["name"],
+            item["address"],
+            SplitPolicy(
+                share=str(item.get("share", "0.1")),
+                reserve=str(item.get("reserve", 0)),
+                cap=None if item.get("cap") is None else str(item["cap"]),
+            ),
+        )
+        for item in config
+    ]
+
+
+class RewardEngine:
+    """
+    Distributes a configurable list of tokens into staking rewards, on a
+    schedule or on demand.
+
+    A run reads every token's balance and allowance in one batch, sends the
+    approvals it needs back to back and queues each `updateRewardIndex`
+    behind its own approval only, so a run waits for about one confirmation
+    however many tokens it covers.
+
+    Every step of a run is appended to the run log, and a reward is logged
+    before it is broadcast. Re-running an interrupted run reuses its
+    planned amounts and never re-sends a reward that may have reached the
+    chain: rewards with a logged broadcast but no logged outcome are
+    reported as unconfirmed instead. Only rewards that failed before being
+    broadcast are retried. The log is indexed by run, and only the latest
+    `max_completed_runs` completed runs are kept, in memory and in the
+    file; incomplete runs are never dropped.
+    """
+
+    def __init__(
+        self,
+        tokens: Optional[Sequence[RewardToken]] = None,
+        run_log_path: Optional[str] = None,
+        interval: float = REWARD_INTERVAL_SECONDS,
+        max_completed_runs: int = MAX_COMPLETED_RUNS,
+    ):
+        self.tokens = list(tokens if tokens is not None else DEFAULT_REWARD_TOKENS)
+        self.run_log_path = run_log_path
+        self.interval = interval
+        self.max_completed_runs = max_completed_runs
+        # Entries per run, in the order runs started
+        self._runs: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._completed: "OrderedDict[str, None]" = OrderedDict()
+        self._log_lock = threading.Lock()
+        # One run at a time, so runs never read each other's stale balances
+        self._run_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._scheduler = None
+        if run_log_path and os.path.exists(run_log_path):
+            with open(run_log_path, "r") as file:
+                compacted = False
+                for line in file:
+                    if line.strip():
+                        compacted = self._index(json.loads(line)) or compacted
+            if compacted:
+                self._rewrite_log()
+
+    @property
+    def run_log(self) -> List[dict]:
+        """Returns the retained run log entries, run by run."""
+        with self._log_lock:
+            return [entry for entries in self._runs.values() for entry in entries]
+
+    def _index(self, entry: dict) -> bool:
+        """Adds an entry to its run. Returns True if an old completed run was dropped."""
+        self._runs.setdefault(entry["run_id"], []).append(entry)
+        if entry["step"] != "completed":
+            return False
+        self._completed[entry["run_id"]] = None
+        dropped = False
+        while len(self._completed) > self.max_completed_runs:
+            run_id, _ = self._completed.popitem(last=False)
+            self._runs.pop(run_id, None)
+            dropped = True
+        return dropped
+
+    def _rewrite_log(self):
+        """Replaces the log file with the retained runs, atomically; needs _log_lock or sole access."""
+        temp_path = f"{self.run_log_path}.tmp"
+        with open(temp_path, "w") as file:
+            for entries in self._runs.values():
+                for entry in entries:
+                    file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.run_log_path)
+
+    def _record(self, run_id: str, step: str, token: Optional[RewardToken] = None, **details):
+        entry = {
+            "run_id": run_id,
+            "token": token.address if token else None,
+            "name": token.name if token else None,
+            "step": step,
+            "timestamp": time.time(),
+        }
+        entry.update(details)
+        with self._log_lock:
+            dropped = self._index(entry)
+            if self.run_log_path:
+                with open(self.run_log_path, "a") as file:
+                    file.write(json.dumps(entry) + "\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                if dropped:
+                    self._rewrite_log()
+
+    def _progress(self, run_id: str) -> Dict[str, dict]:
+        """Returns each token's planned entry and latest reward entry in a run."""
+        progress = {}
+        with self._log_lock:
+            for entry in self._runs.get(run_id, ()):
+                if entry["token"] is None:
+                    continue
+                token = progress.setdefault(entry["token"], {"planned": None, "last": None})
+                if entry["step"] == "planned":
+                    token["planned"] = entry
+                elif entry["step"] not in ("approve_sent", "approved", "approve_failed"):
+                    token["last"] = entry
+        return progress
+
+    def is_completed(self, run_id: str) -> bool:
+        """Returns True if a run has nothing left to send."""
+        with self._log_lock:
+            return run_id in self._completed
+
+    def incomplete_runs(self) -> List[str]:
+        """Returns the logged runs that were interrupted or had retryable failures."""
+        with self._log_lock:
+            return [run_id for run_id in self._runs if run_id not in self._completed]
+
+    def _send_logged(self, run_id: str, token: RewardToken, step: str, send: Callable, *args):
+        """Broadcasts through `send` and logs the transaction hash right away."""
+        pending = send(*args)
+        self._record(run_id, step, token, tx_hash=getattr(pending, "transaction_hash", None))
+        return pending
+
+    def _send_reward(self, run_id: str, token: RewardToken, amount: int):
+        """Logs the reward as sending, then broadcasts it; runs on the submitter thread."""
+        # Logged right before the broadcast, not when queued behind the approval,
+        # so only a crash mid-send leaves the reward unconfirmed on resume
+        self._record(run_id, "reward_sending", token, amount=amount)
+        try:
+            return self._send_logged(
+                run_id, token, "reward_sent",
+                send_reward, "updateRewardIndex", token.address, amount,
+            )
+        except Exception as e:
+            # The CDP API refused it, so a resumed run may send it again
+            self._record(run_id, "reward_rejected", token, error=str(e))
+            raise
+
+    def run(self, run_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Executes one reward run, resuming it if run_id is already logged.
+
+        Returns:
+            dict: transaction hashes keyed like `sttao_approve_tx` and
+                `sttao_reward_tx`, or None if any reward failed or is
+                unconfirmed
+        """
+        run_id = run_id or f"manual-{int(time.time() * 1000)}"
+        with self._run_lock:
+            return self._run(run_id)
+
+    def _run(self, run_id: str) -> Optional[dict]:
+        settlement_queue = get_settlement_queue()
+        token_state = get_token_state()
+        progress = self._progress(run_id)
+
+        results = {}
+        pending = []
+        for token in self.tokens:
+            key = token.name.lower()
+            last = progress.get(token.address, {}).get("last")
+            if (
+                last is None
+                or last["step"] not in _FINAL_REWARD_STEPS + _BROADCAST_REWARD_STEPS
+                or (last["step"] == "reward_failed" and not last.get("tx_hash"))
+            ):
+                # Planned or approving only: the reward itself never went out
+                pending.append(token)
+                continue
+            if last["step"] not in _FINAL_REWARD_STEPS:
+                print(
+                    f"[WARN] {token.name} reward of run {run_id} may have been broadcast "
+                    f"({last.get('tx_hash') or 'hash unknown'}) without a confirmed "
+                    f"outcome; not sending it again"
+                )
+                self._record(run_id, "unconfirmed", token, tx_hash=last.get("tx_hash"))
+                last = dict(last, step="unconfirmed")
+            results[f"{key}_reward_tx"] = last.get("tx_hash")
+
+        if pending:
+            print(f"[INFO] Reward run {run_id}: distributing {', '.join(t.name for t in pending)}")
+        state = token_state.read_many(
+            [("balance", token.address, None) for token in pending]
+            + [("allowance", token.address, CONTRACT_ADDRESS_STAKING) for token in pending]
+        )
+
+        handles = {}
+        for token in pending:
+            key = token.name.lower()
+            balance = state[("balance", token.address, None)]
+            allowance = state[("allowance", token.address, CONTRACT_ADDRESS_STAKING)]
+            planned = progress.get(token.address, {}).get("planned")
+            if planned is not None:
+                amount = planned["amount"]
+            else:
+                amount = token.policy.amount(balance, token_state.decimals(token.address))
+                self._record(run_id, "planned", token, amount=amount, balance=balance)
+            if amount <= 0 or amount > balance:
+                if amount > 0:
+                    print(f"[WARN] {token.name} balance no longer covers the planned reward")
+                print(f"[INFO] Nothing to distribute for {token.name} in run {run_id}")
+                self._record(run_id, "skipped", token, amount=amount, balance=balance)
+                results[f"{key}_reward_tx"] = None
+                continue
+
+            depends_on = []
+            if allowance < amount:
+                # Approvals are independent of each other and go out back to back
+                approve = settlement_queue.submit(
+                    f"approve {token.name}", self._send_logged,
+                    run_id, token, "approve_sent",
+                    send_approve, token.address, str(CONTRACT_ADDRESS_STAKING), balance,
+                )
+                handles[(token, "approve")] = approve
+                depends_on.append(approve)
+            else:
+                print(f"[INFO] Allowance covers the {token.name} reward, skipping approval")
+
+            handles[(token, "reward")] = settlement_queue.submit(
+                f"updateRewardIndex {token.name}", self._send_reward,
+                run_id, token, amount,
+                depends_on=depends_on,
+            )
+
+        failed = False
+        for (token, kind), handle in handles.items():
+            key = token.name.lower()
+            tx = handle.result()
+            tx_hash = getattr(tx, "transaction_hash", None)
+            results[f"{key}_{kind}_tx"] = tx_hash
+            if kind == "approve":
+                self._record(run_id, "approved" if tx is not None else "approve_failed", token,
+                             tx_hash=tx_hash)
+                continue
+            if tx is not None:
+                self._record(run_id, "rewarded", token, tx_hash=tx_hash)
+                continue
+            failed = True
+            print(f"Failed to execute reward for {token.name}")
+            sent = self._progress(run_id)[token.address]["last"] or {}
+            if sent.get("step") == "reward_sending":
+                # The broadcast was abandoned mid-send and may still land
+                print(f"[WARN] {token.name} reward of run {run_id} timed out; not sending it again")
+                self._record(run_id, "unconfirmed", token)
+                continue
+            # A reward that reached the chain may still be mined; keep its hash
+            # so a resumed run does not send it again. A reward skipped after
+            # its approval failed, or rejected by the API, was never sent.
+            self._record(run_id, "reward_failed", token, tx_hash=sent.get("tx_hash"))
+
+        # The rewards moved balances and spent allowances
+        for token in pending:
+            token_state.invalidate(token.address)
+
+        steps = [
+            (self._progress(run_id).get(token.address, {}).get("last") or {}).get("step")
+            for token in self.tokens
+        ]
+        if all(step in _FINAL_REWARD_STEPS for step in steps):
+            self._record(run_id, "completed")
+        if failed or "unconfirmed" in steps:
+            return None
+        return results
+
+    def start(self):
+        """Runs rewards once per interval on a background thread."""
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(
+                target=self._run_scheduled, name="reward-engine", daemon=True
+            )
+            self._scheduler.start()
+
+    def stop(self):
+        """Stops the scheduler after the current run."""
+        self._stopped.set()
+
+    def _run_scheduled(self):
+        while not self._stopped.is_set():
+            period_start = int(time.time() // self.interval * self.interval)
+            # Finish interrupted runs before starting this period's run
+            run_ids = self.incomplete_runs() + [f"scheduled-{period_start}"]
+            for run_id in dict.fromkeys(run_ids):
+                if self.is_completed(run_id):
+                    continue
+                try:
+                    self.run(run_id)
+                except Exception as e:
+                    print(f"[ERROR] Reward run {run_id} failed: {e}")
+            self._stopped.wait(max(period_start + self.interval - time.time(), 1))
+
+
+_reward_engine = None
+
+
+def get_reward_engine() -> RewardEngine:
+    """Returns the shared reward engine, configured from the environment."""
+    global _reward_engine
+    with _settlement_queue_lock:
+        if _reward_engine is None:
+            config_path = os.getenv("REWARD_CONFIG")
+            _reward_engine = RewardEngine(
+                tokens=load_reward_tokens(config_path) if config_path else None,
+                run_log_path=os.getenv("REWARD_RUN_LOG"),
+                interval=float(os.getenv("REWARD_INTERVAL", str(REWARD_INTERVAL_SECONDS))),
+            )
+        return _reward_engine
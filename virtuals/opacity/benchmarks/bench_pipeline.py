@@ -0,0 +1,458 @@
+"""
+End-to-end benchmark of the mention pipeline against local stand-ins for
+Twitter, the Opacity prover and the CDP wallet.
+
+A workload of threads, proofs and timed mentions is replayed through the
+real worker, pipeline, rate limiter, prover client, trade batcher and
+settlement queue. Only the network edges are replaced (see fakes.py), so
+nothing touches a live account or wallet. The report gives throughput,
+end-to-end latency percentiles, per-stage latencies and API calls per
+verification.
+
+Run from virtuals/opacity:
+
+    python benchmarks/bench_pipeline.py --mentions 200
+    python benchmarks/bench_pipeline.py --save-workload wave.json
+    python benchmarks/bench_pipeline.py --workload wave.json --json after.json --compare before.json
+
+All simulated delays (API latency, block time, rate-limit windows, batch
+window, polling interval) are multiplied by --time-scale, so the default
+of 0.1 replays ten times faster than real time. Compare runs only at the
+same scale.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+REPO_ROOT = os.path.dirname(os.path.dirname(PACKAGE_DIR))
+for path in (os.path.join(PACKAGE_DIR, "examples"), PACKAGE_DIR, REPO_ROOT):
+    sys.path.insert(0, path)
+
+from fakes import (  # noqa: E402
+    TWITTER_WINDOW_SECONDS,
+    CallLog,
+    FakeChain,
+    FakeProverServer,
+    FakeTwitterClient,
+    FakeTwitterPlugin,
+    FakeWallet,
+    LatencyModel,
+)
+from opacity_game_sdk.tweet_parser import to_checksum_address  # noqa: E402
+
+# Production defaults the time scale is applied to
+BLOCK_TIME_SECONDS = 2.0
+TRADE_BATCH_WINDOW_SECONDS = 2.0
+PAYOUT_BATCH_WINDOW_SECONDS = 2.0
+FOLLOW_UP_COALESCE_WINDOW_SECONDS = 2.0
+FOLLOW_UP_MAX_WAIT_SECONDS = 600.0
+POLL_INTERVAL_SECONDS = 60.0
+PIPELINE_STAGES = ("resolve_thread", "fetch_proof", "check_proof", "settle_and_reply")
+
+FIRST_TWEET_ID = 1886017939822047367
+
+
+# --- Workloads ---
+
+def generate_workload(
+    mentions: int = 200,
+    threads: int = 50,
+    rate: float = 2.0,
+    valid_ratio: float = 0.7,
+    unknown_ratio: float = 0.1,
+    no_proof_ratio: float = 0.05,
+    wallet_ratio: float = 0.6,
+    seed: int = 7
+) -> Dict[str, Any]:
+    """
+    Build a synthetic workload
+
+    A few popular threads draw most mentions, as during an onboarding wave.
+    Each agent posts about two threads.
+
+    Args:
+        mentions (int): Mentions to replay
+        threads (int): Distinct threads mentioned
+        rate (float): Mean mentions per simulated second (Poisson arrivals)
+        valid_ratio (float): Share of proofs the prover accepts
+        unknown_ratio (float): Share of proofs the prover does not know
+        no_proof_ratio (float): Share of threads without a proof ID
+        wallet_ratio (float): Share of mentions carrying a wallet address
+        seed (int): Random seed
+
+    Returns:
+        Dict[str, Any]: The workload, in the format read by --workload
+    """
+    rng = random.Random(seed)
+    ids = iter(range(FIRST_TWEET_ID, FIRST_TWEET_ID + 10 * (mentions + threads), 7))
+    bot = {"id": "1700000000000000001", "username": "seraph_agent"}
+    users = {bot["id"]: bot["username"]}
+    agents = [str(1800000000000000000 + i) for i in range(max(1, threads // 2))]
+    requesters = [str(1900000000000000000 + i) for i in range(max(1, mentions // 4))]
+    for user_id in agents + requesters:
+        users[user_id] = f"user{user_id[-6:]}"
+
+    tweets: List[Dict[str, Any]] = []
+    proofs: Dict[str, Optional[bool]] = {}
+    for _ in range(threads):
+        root_id = str(next(ids))
+        text = f"Market update: $AIXBT momentum is building {rng.randint(1, 99)}%."
+        if rng.random() >= no_proof_ratio:
+            proof_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            roll = rng.random()
+            proofs[proof_id] = None if roll < unknown_ratio else roll < unknown_ratio + valid_ratio
+            text += f" Proof ID: {proof_id}"
+        tweets.append({
+            "id": root_id,
+            "conversation_id": root_id,
+            "author_id": rng.choice(agents),
+            "text": text,
+        })
+
+    # Zipf-like popularity: thread i is mentioned about 1/(i+1) as often
+    weights = [1.0 / (i + 1) for i in range(threads)]
+    replay: List[Dict[str, Any]] = []
+    at = 0.0
+    for _ in range(mentions):
+        at += rng.expovariate(rate)
+        root = rng.choices(tweets, weights)[0]
+        text = f"@{bot['username']} verify this"
+        if rng.random() < wallet_ratio:
+            address = to_checksum_address("0x" + "%040x" % rng.getrandbits(160))
+            text += f" wallet address: {address}"
+        tweet_id = str(next(ids))
+        replay.append({
+            "at": round(at, 3),
+            "tweet": {
+                "id": tweet_id,
+                "conversation_id": root["id"],
+                "author_id": rng.choice(requesters),
+                "text": text,
+                "referenced_tweets": [{"type": "replied_to", "id": root["id"]}],
+            },
+        })
+
+    return {"bot": bot, "users": users, "tweets": tweets, "proofs": proofs, "mentions": replay}
+
+
+def load_workload(path: str) -> Dict[str, Any]:
+    """Read a workload saved with --save-workload or recorded from production."""
+    with open(path) as f:
+        workload = json.load(f)
+    for field in ("bot", "users", "tweets", "proofs", "mentions"):
+        if field not in workload:
+            raise ValueError(f"Workload {path} is missing '{field}'")
+    workload["mentions"].sort(key=lambda mention: mention["at"])
+    return workload
+
+
+# --- Harness ---
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _build_worker(twitter_client: FakeTwitterClient, chain: FakeChain):
+    """Create the real worker, wired to the fakes instead of live services."""
+    from ethosMarket.ethos_trade_cdp.py.main import EthosTrader, set_trader
+    from opacity_worker import OpacityVerificationWorker
+
+    class _LocalTrader(EthosTrader):
+        def __init__(self, wallet: FakeWallet):
+            super().__init__("benchmark", "benchmark", "benchmark")
+            self._wallet = wallet
+
+    class _BenchmarkWorker(OpacityVerificationWorker):
+        def _initialize_environment(self):
+            self.game_api_key = None
+
+        def _create_twitter_plugin(self):
+            return FakeTwitterPlugin(twitter_client)
+
+        def _create_worker(self):
+            # The pipeline calls the stages directly; no GAME agent needed
+            return None
+
+    set_trader(_LocalTrader(FakeWallet(chain)))
+    return _BenchmarkWorker()
+
+
+def run_benchmark(workload: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Replay a workload and measure it
+
+    Returns:
+        Dict[str, Any]: The report printed by print_report
+    """
+    scale = args.time_scale
+    rng = random.Random(args.seed)
+    call_log = CallLog()
+
+    prover = FakeProverServer(
+        workload["proofs"],
+        logs_latency=LatencyModel(0.4, 2.0, scale, random.Random(rng.random())),
+        verify_latency=LatencyModel(0.6, 3.0, scale, random.Random(rng.random())),
+        call_log=call_log,
+        error_rate=args.prover_error_rate,
+        rng=random.Random(rng.random())
+    ).start()
+    twitter = FakeTwitterClient(
+        workload["tweets"],
+        workload["users"],
+        workload["bot"]["id"],
+        latency=LatencyModel(0.15, 0.8, scale, random.Random(rng.random())),
+        call_log=call_log,
+        window_seconds=TWITTER_WINDOW_SECONDS * scale
+    )
+    chain = FakeChain(
+        BLOCK_TIME_SECONDS * scale,
+        call_log,
+        broadcast_latency=LatencyModel(0.3, 1.5, scale, random.Random(rng.random()))
+    )
+
+    workdir = tempfile.mkdtemp(prefix="opacity-bench-")
+    os.environ.update({
+        "OPACITY_PROVER_URL": prover.url,
+        "VERIFICATION_DB_PATH": os.path.join(workdir, "verification_state.db"),
+        "TRADE_BATCH_WINDOW": str(TRADE_BATCH_WINDOW_SECONDS * scale),
+        "PAYOUT_BATCH_WINDOW": str(PAYOUT_BATCH_WINDOW_SECONDS * scale),
+        "FOLLOW_UP_COALESCE_WINDOW": str(FOLLOW_UP_COALESCE_WINDOW_SECONDS * scale),
+        "FOLLOW_UP_MAX_WAIT": str(FOLLOW_UP_MAX_WAIT_SECONDS * scale),
+    })
+    # Legacy flat files are looked up relative to the working directory
+    os.chdir(workdir)
+
+    from mention_pipeline import MentionPipeline
+    from opacity_game_sdk.metrics import get_metrics
+    from opacity_game_sdk.mention_ingester import MentionIngester
+
+    worker = _build_worker(twitter, chain)
+    pipeline = MentionPipeline(worker)
+
+    posted_at: Dict[str, float] = {}
+    finished_at: Dict[str, float] = {}
+    outcomes: Counter = Counter()
+    lock = threading.Lock()
+    all_done = threading.Event()
+    total = len(workload["mentions"])
+
+    def on_result(tweet_id: str, result: tuple) -> None:
+        with lock:
+            finished_at[tweet_id] = time.monotonic()
+            outcomes[result[1]] += 1
+            if len(finished_at) >= total:
+                all_done.set()
+
+    submitted = set()
+
+    def submit(tweet_id: str) -> None:
+        if tweet_id not in submitted:
+            submitted.add(tweet_id)
+            pipeline.submit(tweet_id, callback=on_result)
+
+    def replay() -> None:
+        for mention in workload["mentions"]:
+            delay = started + mention["at"] * scale - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            tweet_id = str(mention["tweet"]["id"])
+            with lock:
+                posted_at[tweet_id] = time.monotonic()
+            twitter.post(mention["tweet"])
+            if args.ingest == "event":
+                submit(tweet_id)
+
+    def poll() -> None:
+        # The agent's polling cycle: page from the cursor, verify, checkpoint
+        ingester = MentionIngester(worker.twitter_plugin.twitter_client, worker.store)
+        while not all_done.is_set():
+            mentions = ingester.fetch_new()
+            jobs = []
+            for mention in mentions:
+                tweet_id = str(int(mention.id))
+                if tweet_id not in submitted:
+                    submitted.add(tweet_id)
+                    jobs.append(pipeline.submit(tweet_id, callback=on_result))
+            for job in jobs:
+                job.done.wait()
+            ingester.checkpoint(mentions)
+            all_done.wait(POLL_INTERVAL_SECONDS * scale)
+
+    if total == 0:
+        all_done.set()
+    started = time.monotonic()
+    threads = [threading.Thread(target=replay, name="bench-replay", daemon=True)]
+    if args.ingest == "poll":
+        threads.append(threading.Thread(target=poll, name="bench-poll", daemon=True))
+    for thread in threads:
+        thread.start()
+    completed_in_time = all_done.wait(args.timeout)
+    wall = time.monotonic() - started
+    # Settlement links are posted after the verdicts; let them drain
+    drain_deadline = started + args.timeout
+    while worker.follow_ups.pending() and time.monotonic() < drain_deadline:
+        time.sleep(0.05)
+    prover.stop()
+
+    latencies = [finished_at[t] - posted_at[t] for t in finished_at if t in posted_at]
+    completed = len(finished_at)
+    metrics = get_metrics()
+    stages = {
+        stage: {
+            "p50": metrics.quantile(f"{stage}_seconds", 0.5, status="ok"),
+            "p99": metrics.quantile(f"{stage}_seconds", 0.99, status="ok"),
+        }
+        for stage in PIPELINE_STAGES
+    }
+    calls = {f"{service}.{endpoint}": count for (service, endpoint), count in sorted(call_log.counts().items())}
+    return {
+        "time_scale": scale,
+        "ingest": args.ingest,
+        "mentions": total,
+        "completed": completed,
+        "timed_out": not completed_in_time,
+        "wall_seconds": wall,
+        "throughput_per_second": completed / wall if wall else 0.0,
+        "latency": {
+            "p50": _percentile(latencies, 0.50),
+            "p90": _percentile(latencies, 0.90),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies) if latencies else None,
+        },
+        "stages": stages,
+        "follow_up_delay": {
+            "p50": metrics.quantile("follow_up_delay_seconds", 0.5),
+            "p99": metrics.quantile("follow_up_delay_seconds", 0.99),
+        },
+        "calls": calls,
+        "calls_per_verification": {
+            service: call_log.total(service) / completed if completed else None
+            for service in ("twitter", "prover", "chain")
+        },
+        "rate_limited": twitter.rate_limited,
+        "replies": len(twitter.replies),
+        "transactions": len(chain.transactions),
+        "outcomes": dict(outcomes.most_common()),
+    }
+
+
+# --- Reporting ---
+
+def _fmt(value: Optional[float], unit: str = "s") -> str:
+    if value is None:
+        return "-"
+    if unit == "s":
+        return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.2f}s"
+    return f"{value:.2f}"
+
+
+def _delta(value: Optional[float], baseline: Optional[float]) -> str:
+    if value is None or not baseline:
+        return ""
+    return f"  ({(value - baseline) / baseline * 100:+.1f}%)"
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """Print a report, with the change against a baseline report if given."""
+    base = baseline or {}
+    base_latency = base.get("latency", {})
+    base_calls = base.get("calls_per_verification", {})
+
+    print(f"\nMentions: {report['completed']}/{report['mentions']} completed "
+          f"in {report['wall_seconds']:.1f}s ({report['ingest']} ingestion, "
+          f"time scale {report['time_scale']:g})")
+    if report["timed_out"]:
+        print("[WARN] Timed out before every mention completed")
+    print(f"Throughput: {report['throughput_per_second']:.2f} verifications/s"
+          f"{_delta(report['throughput_per_second'], base.get('throughput_per_second'))}")
+
+    print("\nEnd-to-end latency (mention posted to result):")
+    for name in ("p50", "p90", "p99", "max"):
+        print(f"  {name:<4} {_fmt(report['latency'][name]):>8}"
+              f"{_delta(report['latency'][name], base_latency.get(name))}")
+
+    print("\nStage latency (histogram bucket bounds):")
+    for stage, values in report["stages"].items():
+        print(f"  {stage:<18} p50 <= {_fmt(values['p50']):>7}   p99 <= {_fmt(values['p99']):>7}")
+
+    follow_up = report.get("follow_up_delay", {})
+    print(f"  {'follow-up links':<18} p50 <= {_fmt(follow_up.get('p50')):>7}   "
+          f"p99 <= {_fmt(follow_up.get('p99')):>7}")
+
+    print("\nAPI calls per verification:")
+    for service, value in report["calls_per_verification"].items():
+        print(f"  {service:<8} {_fmt(value, unit=''):>6}{_delta(value, base_calls.get(service))}")
+    for name, count in report["calls"].items():
+        print(f"    {name:<32} {count}")
+
+    print(f"\nTwitter 429s: {report['rate_limited']}   Replies: {report['replies']}   "
+          f"Transactions: {report['transactions']}")
+    print("Outcomes:")
+    for message, count in report["outcomes"].items():
+        print(f"  {count:>5}  {message}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the mention pipeline against local fakes")
+    parser.add_argument("--workload", help="Replay a saved or recorded workload (JSON)")
+    parser.add_argument("--save-workload", help="Write the generated workload to this file and exit")
+    parser.add_argument("--mentions", type=int, default=200, help="Mentions in a generated workload")
+    parser.add_argument("--threads", type=int, default=50, help="Threads in a generated workload")
+    parser.add_argument("--rate", type=float, default=2.0, help="Mentions per simulated second")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for workloads and latencies")
+    parser.add_argument("--ingest", choices=("poll", "event"), default="poll",
+                        help="Poll the mentions cursor like the agent, or submit on arrival like the webhook")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="Multiplier for every simulated delay")
+    parser.add_argument("--prover-error-rate", type=float, default=0.0,
+                        help="Share of prover requests answered with 503")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up after this many seconds")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Show changes against an earlier --json report")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's log output")
+    args = parser.parse_args()
+
+    if args.workload:
+        workload = load_workload(args.workload)
+    else:
+        workload = generate_workload(args.mentions, args.threads, args.rate, seed=args.seed)
+    if args.save_workload:
+        with open(args.save_workload, "w") as f:
+            json.dump(workload, f, indent=1)
+        print(f"Saved {len(workload['mentions'])} mentions to {args.save_workload}")
+        return
+
+    # Resolve output paths before the run changes the working directory
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    if args.verbose:
+        report = run_benchmark(workload, args)
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report = run_benchmark(workload, args)
+
+    print_report(report, baseline)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Micro-benchmark of TweetParser against the sequential re.search extraction
+it replaced.
+
+Run from virtuals/opacity:
+
+    python benchmarks/bench_tweet_parser.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from opacity_game_sdk.tweet_parser import TweetParser  # noqa: E402
+
+TWEETS = [
+    "@seraph_agent please verify this one, wallet address: "
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "Market update: $AIXBT is trending. Proof ID: 3f1c9a0e-7d2b-4c55-9b8e-1a2b3c4d5e6f",
+    "@seraph_agent @maybe_aixbt address: 0xfb6916095ca1df60bb79ce92ce3ea74c37c5d359",
+    "gm @seraph_agent, no proof here, just vibes",
+    "@seraph_agent verify 0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB thanks!",
+] * 20
+
+
+def legacy_parse(text):
+    wallet_address = None
+    for pattern in (
+        r'wallet address:\s*(0x[a-fA-F0-9]{40})',
+        r'address:\s*(0x[a-fA-F0-9]{40})',
+        r'(0x[a-fA-F0-9]{40})'
+    ):
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            wallet_address = match.group(1)
+            break
+    proof_match = re.search(r'Proof ID:\s*(\S+)\s*$', text, re.IGNORECASE)
+    return proof_match.group(1) if proof_match else None, wallet_address
+
+
+def main(number: int = 200) -> None:
+    parser = TweetParser()
+    benchmarks = [
+        ("legacy re.search", lambda: [legacy_parse(text) for text in TWEETS]),
+        ("TweetParser.parse_many", lambda: parser.parse_many(TWEETS)),
+    ]
+    for name, fn in benchmarks:
+        fn()
+        seconds = min(timeit.repeat(fn, number=number, repeat=5))
+        per_tweet = seconds / (number * len(TWEETS)) * 1e6
+        print(f"{name:<24} {per_tweet:8.2f} us/tweet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Local stand-ins for Twitter, the Opacity prover and the CDP wallet, used by
+the pipeline benchmark.
+
+Each fake reproduces the behaviour that shapes the agent's performance,
+not the full API. Calls take a sampled latency. Twitter enforces
+per-endpoint quotas and reports them in x-rate-limit headers. The prover
+is a real HTTP server, so connection pooling and retries are exercised.
+Transactions are mined on block boundaries. Every call is counted in a
+shared CallLog.
+"""
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Twitter API v2 user-context quotas per 15-minute window
+TWITTER_WINDOW_SECONDS = 900
+DEFAULT_RATE_LIMITS = {
+    "get_me": 75,
+    "get_tweet": 900,
+    "get_user": 900,
+    "get_users_mentions": 180,
+    "create_tweet": 200,
+}
+
+
+class LatencyModel:
+    """
+    Log-normal latency given its median and 99th percentile.
+
+    Every sample is multiplied by time_scale, so a whole scenario can be
+    replayed faster than real time.
+    """
+
+    def __init__(
+        self,
+        median: float,
+        p99: float,
+        time_scale: float = 1.0,
+        rng: Optional[random.Random] = None
+    ) -> None:
+        if median <= 0 or p99 < median:
+            raise ValueError("Latency needs 0 < median <= p99")
+        self.median = median
+        self.p99 = p99
+        self.time_scale = time_scale
+        # 2.326 is the standard normal's 99th percentile
+        self._sigma = math.log(p99 / median) / 2.326
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            value = self._rng.lognormvariate(math.log(self.median), self._sigma)
+        return value * self.time_scale
+
+    def sleep(self) -> float:
+        delay = self.sample()
+        time.sleep(delay)
+        return delay
+
+
+class CallLog:
+    """Thread-safe count of calls made to each fake service."""
+
+    def __init__(self) -> None:
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, service: str, endpoint: str) -> None:
+        with self._lock:
+            self._counts[(service, endpoint)] += 1
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def total(self, service: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(
+                count for (name, _), count in self._counts.items()
+                if service is None or name == service
+            )
+
+
+# --- Twitter ---
+
+class FakeTwitterError(Exception):
+    """An HTTP error from the fake Twitter API, shaped like tweepy's."""
+
+    def __init__(self, status_code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"{status_code} {message}")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def _tweet(record: Dict[str, Any]) -> SimpleNamespace:
+    referenced = [
+        SimpleNamespace(type=ref["type"], id=ref["id"])
+        for ref in record.get("referenced_tweets") or []
+    ]
+    return SimpleNamespace(
+        id=int(record["id"]),
+        text=record["text"],
+        author_id=str(record["author_id"]),
+        conversation_id=str(record.get("conversation_id") or record["id"]),
+        referenced_tweets=referenced or None,
+        created_at=record.get("created_at"),
+    )
+
+
+class FakeTwitterClient:
+    """
+    In-memory stand-in for the tweepy client used by the agent.
+
+    Tweets are visible once posted. Every endpoint has a quota per window,
+    reported through the session's response hooks exactly as tweepy's
+    requests session does. A call over quota fails with a 429 that carries
+    x-rate-limit-reset.
+    """
+
+    def __init__(
+        self,
+        tweets: Iterable[Dict[str, Any]],
+        users: Dict[str, str],
+        bot_id: str,
+        latency: LatencyModel,
+        call_log: CallLog,
+        rate_limits: Optional[Dict[str, int]] = None,
+        window_seconds: float = TWITTER_WINDOW_SECONDS
+    ) -> None:
+        """
+        Initialize the client
+
+        Args:
+            tweets (Iterable[Dict[str, Any]]): Tweets that exist before the
+                replay starts, e.g. the threads being mentioned
+            users (Dict[str, str]): User ID to username, including the bot
+            bot_id (str): The bot's user ID
+            latency (LatencyModel): Latency of every call
+            call_log (CallLog): Receives one entry per call
+            rate_limits (Optional[Dict[str, int]]): Calls allowed per window
+                by endpoint; endpoints not listed are unlimited
+            window_seconds (float): Length of a rate-limit window
+        """
+        self._tweets: Dict[int, Dict[str, Any]] = {int(t["id"]): t for t in tweets}
+        self._mentions: List[int] = []
+        self.users = users
+        self.bot_id = str(bot_id)
+        self.latency = latency
+        self.call_log = call_log
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.window_seconds = window_seconds
+        self.replies: List[Tuple[str, str]] = []
+        self.rate_limited = 0
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._reply_ids = itertools.count(int(time.time() * 1000) << 22)
+        self._lock = threading.Lock()
+        # Hooks the rate limiter reads x-rate-limit headers from
+        self.session = SimpleNamespace(hooks={"response": []})
+
+    def post(self, record: Dict[str, Any]) -> None:
+        """Publish a tweet; it becomes a mention if it names the bot."""
+        with self._lock:
+            self._tweets[int(record["id"])] = record
+            if f"@{self.users[self.bot_id]}".lower() in record["text"].lower():
+                self._mentions.append(int(record["id"]))
+
+    def _call(self, endpoint: str) -> None:
+        self.call_log.record("twitter", endpoint)
+        self.latency.sleep()
+        limit = self.rate_limits.get(endpoint)
+        if limit is None:
+            return
+        now = time.time()
+        with self._lock:
+            reset_at, used = self._windows.get(endpoint, (0.0, 0))
+            if now >= reset_at:
+                reset_at, used = now + self.window_seconds, 0
+            used += 1
+            self._windows[endpoint] = (reset_at, used)
+            over_quota = used > limit
+            if over_quota:
+                self.rate_limited += 1
+        headers = {
+            "x-rate-limit-limit": str(limit),
+            "x-rate-limit-remaining": str(max(0, limit - used)),
+            "x-rate-limit-reset": str(reset_at),
+        }
+        if over_quota:
+            raise FakeTwitterError(429, "Too Many Requests", headers)
+        response = SimpleNamespace(status_code=200, headers=headers)
+        for hook in list(self.session.hooks["response"]):
+            hook(response)
+
+    def get_me(self, **kwargs: Any) -> SimpleNamespace:
+        self._call("get_me")
+        return SimpleNamespace(data=SimpleNamespace(id=int(self.bot_id), username=self.users[self.bot_id]))
+
+    def get_user(self, id: str, **kwargs: Any) -> SimpleNamespace:
+        self._call("get_user")
+        username = self.users.get(str(id))
+        if username is None:
+            raise FakeTwitterError(404, "Not Found")
+        return SimpleNamespace(data=SimpleNamespace(id=int(id), username=username))
+
+    def get_tweet(self, id: Any, expansions: Optional[List[str]] = None, **kwargs: Any) -> SimpleNamespace:
+        self._call("get_tweet")
+        with self._lock:
+            record = self._tweets.get(int(id))
+            if record is None:
+                return SimpleNamespace(data=None, includes={})
+            included = []
+            if expansions and "referenced_tweets.id" in expansions:
+                for ref in record.get("referenced_tweets") or []:
+                    parent = self._tweets.get(int(ref["id"]))
+                    if parent is not None:
+                        included.append(_tweet(parent))
+        return SimpleNamespace(data=_tweet(record), includes={"tweets": included})
+
+    def get_users_mentions(
+        self,
+        id: Any,
+        since_id: Optional[str] = None,
+        max_results: int = 10,
+        pagination_token: Optional[str] = None,
+        **kwargs: Any
+    ) -> SimpleNamespace:
+        self._call("get_users_mentions")
+        with self._lock:
+            newest_first = sorted(
+                (tweet_id for tweet_id in self._mentions if since_id is None or tweet_id > int(since_id)),
+                reverse=True
+            )
+            if pagination_token:
+                newest_first = [tweet_id for tweet_id in newest_first if tweet_id < int(pagination_token)]
+            page = newest_first[:max_results]
+            data = [_tweet(self._tweets[tweet_id]) for tweet_id in page]
+        meta = {"result_count": len(data)}
+        if len(newest_first) > max_results:
+            meta["next_token"] = str(page[-1])
+        return SimpleNamespace(data=data or None, meta=meta)
+
+    def create_tweet(self, text: str, in_reply_to_tweet_id: Optional[str] = None, **kwargs: Any) -> SimpleNamespace:
+        self._call("create_tweet")
+        tweet_id = next(self._reply_ids)
+        with self._lock:
+            self.replies.append((str(in_reply_to_tweet_id), text))
+        return SimpleNamespace(data={"id": str(tweet_id), "text": text})
+
+
+class FakeTwitterPlugin:
+    """The parts of the GAME Twitter plugin the worker uses."""
+
+    def __init__(self, twitter_client: FakeTwitterClient) -> None:
+        self.twitter_client: Any = twitter_client
+
+    def get_function(self, name: str) -> Any:
+        if name != "reply_tweet":
+            raise KeyError(name)
+
+        def reply_tweet(tweet_id: str, reply: str) -> None:
+            # Goes through whatever wraps twitter_client, as in the real plugin
+            self.twitter_client.create_tweet(text=reply, in_reply_to_tweet_id=tweet_id)
+
+        return reply_tweet
+
+
+# --- Opacity prover ---
+
+class FakeProverServer:
+    """
+    HTTP stand-in for the Opacity prover's log and verify endpoints.
+
+    Proofs map to True (valid), False (rejected by the prover) or None
+    (unknown, so /api/logs answers 404). A fraction of requests can fail
+    with 503 to exercise client retries.
+    """
+
+    def __init__(
+        self,
+        proofs: Dict[str, Optional[bool]],
+        logs_latency: LatencyModel,
+        verify_latency: LatencyModel,
+        call_log: CallLog,
+        error_rate: float = 0.0,
+        rng: Optional[random.Random] = None
+    ) -> None:
+        self.proofs = proofs
+        self.logs_latency = logs_latency
+        self.verify_latency = verify_latency
+        self.call_log = call_log
+        self.error_rate = error_rate
+        self._rng = rng or random.Random()
+        self._rng_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Prover server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _fails(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+    def start(self) -> "FakeProverServer":
+        prover = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _reply(self, status: int, body: Any) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if not self.path.startswith("/api/logs/"):
+                    self._reply(404, {"error": "not found"})
+                    return
+                prover.call_log.record("prover", "logs")
+                prover.logs_latency.sleep()
+                if prover._fails():
+                    self._reply(503, {"error": "unavailable"})
+                    return
+                proof_id = self.path[len("/api/logs/"):]
+                if prover.proofs.get(proof_id) is None:
+                    self._reply(404, {"error": "unknown proof"})
+                    return
+                self._reply(200, {"proof_id": proof_id, "timestamp": time.time(), "logs": ["inference"]})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prover.call_log.record("prover", "verify")
+                prover.verify_latency.sleep()
+                if prover._fails():
+                    self._reply(503, {"error": "unavailable"})
+                    return
+                self._reply(200, {"success": bool(prover.proofs.get(body.get("proof_id")))})
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-prover", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# --- CDP wallet ---
+
+class FakeInvocation:
+    """A broadcast transaction, mined on the first block after it was sent."""
+
+    def __init__(self, chain: "FakeChain", label: str) -> None:
+        self.chain = chain
+        self.label = label
+        self.transaction_hash = chain.next_hash()
+        self.mined_at = chain.mined_at(time.monotonic())
+
+    def wait(self, timeout_seconds: Optional[float] = None, **kwargs: Any) -> "FakeInvocation":
+        self.chain.call_log.record("chain", "wait")
+        remaining = self.mined_at - time.monotonic()
+        if timeout_seconds is not None and remaining > timeout_seconds:
+            time.sleep(timeout_seconds)
+            raise TimeoutError(f"{self.label} not mined after {timeout_seconds}s")
+        if remaining > 0:
+            time.sleep(remaining)
+        return self
+
+
+class FakeChain:
+    """
+    Block clock shared by the fake wallet's transactions.
+
+    Blocks are produced every block_time seconds. A transaction is mined
+    confirmations blocks after the block following its broadcast.
+    """
+
+    def __init__(
+        self,
+        block_time: float,
+        call_log: CallLog,
+        broadcast_latency: LatencyModel,
+        confirmations: int = 1
+    ) -> None:
+        self.block_time = block_time
+        self.call_log = call_log
+        self.broadcast_latency = broadcast_latency
+        self.confirmations = confirmations
+        self._genesis = time.monotonic()
+        self._hashes = itertools.count(1)
+        self._lock = threading.Lock()
+        self.transactions: List[Tuple[str, str]] = []
+
+    def next_hash(self) -> str:
+        with self._lock:
+            return "0x%064x" % next(self._hashes)
+
+    def mined_at(self, sent_at: float) -> float:
+        block = math.floor((sent_at - self._genesis) / self.block_time) + self.confirmations
+        return self._genesis + block * self.block_time
+
+    def broadcast(self, endpoint: str, label: str) -> FakeInvocation:
+        self.call_log.record("chain", endpoint)
+        self.broadcast_latency.sleep()
+        invocation = FakeInvocation(self, label)
+        with self._lock:
+            self.transactions.append((label, invocation.transaction_hash))
+        return invocation
+
+
+class FakeWallet:
+    """The parts of a cdp.Wallet the trading helpers use."""
+
+    def __init__(self, chain: FakeChain, balances: Optional[Dict[str, float]] = None) -> None:
+        self.chain = chain
+        self.balances = balances or {}
+        self.default_address = SimpleNamespace(address_id="0x" + "00" * 20)
+
+    def invoke_contract(self, contract_address: str, abi: Any, method: str, args: Dict[str, Any]) -> FakeInvocation:
+        return self.chain.broadcast("invoke_contract", method)
+
+    def transfer(self, amount: Any, asset_id: str, destination: str, **kwargs: Any) -> FakeInvocation:
+        return self.chain.broadcast("transfer", f"transfer {amount} to {destination}")
+
+    def balance(self, asset_id: str) -> float:
+        self.chain.call_log.record("chain", "balance")
+        self.chain.broadcast_latency.sleep()
+        return self.balances.get(asset_id, 0.0)
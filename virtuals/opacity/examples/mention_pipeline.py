@@ -0,0 +1,179 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from game_sdk.game.custom_types import FunctionResultStatus
+from opacity_game_sdk.metrics import get_metrics
+from opacity_game_sdk.rate_limiter import is_rate_limit_error, rate_limit_reset_delay
+from opacity_worker import (
+    OpacityVerificationWorker,
+    VerificationHalted,
+    record_verification_result
+)
+
+
+class _Job:
+    """A mention travelling through the pipeline."""
+
+    def __init__(self, tweet_id: str, callback: Optional[Callable] = None):
+        self.tweet_id = tweet_id
+        self.payload = tweet_id
+        self.callback = callback
+        self.result: Optional[Tuple[FunctionResultStatus, str, Dict]] = None
+        self.done = threading.Event()
+
+    def finish(self, result: Tuple[FunctionResultStatus, str, Dict]) -> None:
+        self.result = result
+        record_verification_result(result)
+        self.done.set()
+        if self.callback is not None:
+            try:
+                self.callback(self.tweet_id, result)
+            except Exception as e:
+                print(f"[ERROR] Result callback failed for tweet {self.tweet_id}: {e}")
+
+
+class _Stage:
+    """A bounded queue drained by a fixed pool of worker threads."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        workers: int,
+        queue_size: int,
+        retry_on_rate_limit: bool,
+        max_retries: int
+    ):
+        self.name = name
+        self.fn = fn
+        self.queue: "queue.Queue[_Job]" = queue.Queue(maxsize=queue_size)
+        self.retry_on_rate_limit = retry_on_rate_limit
+        self.max_retries = max_retries
+        self.next_stage: Optional["_Stage"] = None
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every worker of this stage until the rate-limit window resets."""
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_until_resumed(self) -> None:
+        while True:
+            with self._pause_lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            get_metrics().inc("sleep_seconds_total", remaining, source="pipeline_pause", stage=self.name)
+            time.sleep(remaining)
+
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            try:
+                self._process(job)
+            finally:
+                self.queue.task_done()
+
+    def _process(self, job: _Job) -> None:
+        attempt = 0
+        while True:
+            self._wait_until_resumed()
+            try:
+                output = self.fn(job.payload)
+                break
+            except VerificationHalted as halted:
+                job.finish(halted.result)
+                return
+            except Exception as e:
+                if is_rate_limit_error(e) and self.retry_on_rate_limit and attempt < self.max_retries:
+                    pause = rate_limit_reset_delay(e)
+                    print(f"[WARN] Rate limit hit in {self.name} stage, pausing {pause:.0f} seconds...")
+                    self.pause(pause)
+                    attempt += 1
+                    continue
+                error_msg = f"Unexpected error during verification: {str(e)}"
+                print(f"[ERROR] {self.name} stage failed for tweet {job.tweet_id}: {e}")
+                job.finish((FunctionResultStatus.FAILED, error_msg, {}))
+                return
+
+        if self.next_stage is None:
+            job.finish(output)
+            return
+        job.payload = output
+        # Blocks while the next stage is saturated, pushing back on this one
+        self.next_stage.queue.put(job)
+
+
+class MentionPipeline:
+    """
+    Staged, concurrent verification of mentioned tweets.
+
+    Each stage (resolve thread, fetch proof, verify proof, settle and reply)
+    has its own bounded queue and worker pool. A full queue blocks the stage
+    feeding it. Twitter calls block on the shared rate limiter once their
+    endpoint's quota is spent, and a 429 that outlasts the limiter's retries
+    pauses the whole stage until the window resets, so back-pressure follows
+    the observed API headroom rather than fixed sleeps.
+    """
+
+    def __init__(
+        self,
+        worker: OpacityVerificationWorker,
+        resolve_workers: int = 4,
+        fetch_workers: int = 4,
+        verify_workers: int = 4,
+        reply_workers: int = 2,
+        queue_size: int = 16,
+        max_rate_limit_retries: int = 3
+    ):
+        self.stages: List[_Stage] = [
+            _Stage("resolve", worker.resolve_thread, resolve_workers, queue_size,
+                   retry_on_rate_limit=True, max_retries=max_rate_limit_retries),
+            _Stage("fetch_proof", worker.fetch_proof, fetch_workers, queue_size,
+                   retry_on_rate_limit=True, max_retries=max_rate_limit_retries),
+            # Stages with on-chain side effects are never retried automatically
+            _Stage("verify", worker.check_proof, verify_workers, queue_size,
+                   retry_on_rate_limit=False, max_retries=0),
+            _Stage("reply", worker.settle_and_reply, reply_workers, queue_size,
+                   retry_on_rate_limit=False, max_retries=0),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+        for stage in self.stages:
+            stage.start()
+        get_metrics().register_gauge(
+            "pipeline_queue_depth",
+            "Mentions waiting for each pipeline stage",
+            lambda: {(("stage", stage.name),): stage.queue.qsize() for stage in self.stages}
+        )
+
+    def submit(self, tweet_id: str, callback: Optional[Callable] = None) -> _Job:
+        """
+        Queue a tweet for verification, blocking while the first stage is full
+
+        Args:
+            tweet_id (str): Mention tweet ID
+            callback (Optional[Callable]): Called with (tweet_id, result) once
+                the verification completes
+        """
+        job = _Job(tweet_id, callback)
+        self.stages[0].queue.put(job)
+        return job
+
+    def process(self, tweet_ids: Iterable[str]) -> List[Tuple[str, Tuple[FunctionResultStatus, str, Dict]]]:
+        """Verify a batch of tweets and wait for all of them to complete."""
+        jobs = [self.submit(tweet_id) for tweet_id in tweet_ids]
+        for job in jobs:
+            job.done.wait()
+        return [(job.tweet_id, job.result) for job in jobs]
@@ -11,14 +11,27 @@ import os
 from dotenv import load_dotenv
 import threading
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 import re
 import requests
 from opacity_game_sdk.opacity_plugin import OpacityPlugin
 from twitter_plugin_gamesdk.twitter_plugin import TwitterPlugin
+from opacity_game_sdk.rate_limiter import is_rate_limit_error
+from opacity_game_sdk.mention_ingester import MentionIngester
+from opacity_game_sdk.mention_stream import (
+    FilteredStreamSource,
+    LocalMentionSource,
+    WebhookReceiver
+)
+from opacity_game_sdk.cache import TTLCache
+from opacity_game_sdk.metrics import start_metrics_server
+from opacity_game_sdk.reputation_index import start_reputation_server
 from opacity_worker import OpacityVerificationWorker
+from mention_pipeline import MentionPipeline
 
 CHECK_INTERVAL_MINUTES = 1
+# Polling interval while an event source (webhook or stream) is delivering
+FALLBACK_CHECK_INTERVAL_MINUTES = 10
 
 # Load environment variables
 load_dotenv()
@@ -26,105 +39,125 @@ load_dotenv()
 # Initialize worker
 opacity_worker = OpacityVerificationWorker()
 
+# Concurrent verification pipeline shared across check cycles
+mention_pipeline = MentionPipeline(opacity_worker)
+
+# Pages through new mentions from a since_id cursor kept in the store
+mention_ingester = MentionIngester(
+    opacity_worker.twitter_plugin.twitter_client,
+    opacity_worker.store,
+    initial_lookback=timedelta(minutes=CHECK_INTERVAL_MINUTES)
+)
+
+# Mentions already handed to the pipeline by any ingestion path, so a tweet
+# delivered by both the event source and the polling fallback runs once
+dispatched_mentions = TTLCache(maxsize=16384, ttl=24 * 3600)
+_dispatch_lock = threading.Lock()
+
+# "poll" (default), "webhook", "stream" or "local"
+INGESTION_MODE = os.environ.get("MENTION_INGESTION_MODE", "poll").lower()
+mention_source = None
+
+
+def _claim_mention(tweet_id: str) -> bool:
+    """Return True the first time a mention is seen."""
+    with _dispatch_lock:
+        if tweet_id in dispatched_mentions:
+            return False
+        dispatched_mentions.put(tweet_id, True)
+        return True
+
+
+def _log_result(tweet_id: str, result: tuple) -> None:
+    status, message, _ = result
+    print(f"[INFO] Verification result for {tweet_id}: {message}")
+
+
+def dispatch_mention(tweet_id: str) -> None:
+    """Queue a mention delivered by an event source for verification."""
+    tweet_id = str(int(tweet_id))
+    if not _claim_mention(tweet_id):
+        return
+    print(f"\n[INFO] Queueing streamed mention tweet ID: {tweet_id}")
+    mention_pipeline.submit(tweet_id, callback=_log_result)
+
+
+def start_event_ingestion():
+    """Start the event source selected by MENTION_INGESTION_MODE, if any."""
+    global mention_source
+    if INGESTION_MODE == "webhook":
+        mention_source = WebhookReceiver(
+            dispatch_mention,
+            host=os.environ.get("WEBHOOK_HOST", "127.0.0.1"),
+            port=int(os.environ.get("WEBHOOK_PORT", 8080)),
+            consumer_secret=os.environ.get("TWITTER_API_SECRET_KEY"),
+            bot_id=mention_ingester.bot_id
+        )
+    elif INGESTION_MODE == "stream":
+        mention_source = FilteredStreamSource(
+            os.environ["TWITTER_BEARER_TOKEN"],
+            dispatch_mention,
+            bot_username=mention_ingester.bot_username,
+            bot_id=mention_ingester.bot_id
+        )
+    elif INGESTION_MODE == "local":
+        mention_source = LocalMentionSource(dispatch_mention)
+    elif INGESTION_MODE != "poll":
+        raise ValueError(f"Unknown MENTION_INGESTION_MODE: {INGESTION_MODE}")
+
+    if mention_source is not None:
+        mention_source.start()
+    return mention_source
+
 def verify_mentioned_results(**kwargs) -> tuple:
     """Function to process Twitter mentions and verify proofs."""
     try:
-        # Calculate the cutoff time (5 minutes ago) with RFC3339 formatting
-        cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=CHECK_INTERVAL_MINUTES)
-        formatted_time = cutoff_time.strftime('%Y-%m-%dT%H:%M:%SZ')
-        print(f"[INFO] Processing mentions after: {formatted_time}")
-        
+        since_id = mention_ingester.since_id
+        if since_id:
+            print(f"[INFO] Processing mentions after tweet ID: {since_id}")
+        else:
+            print("[INFO] No mention cursor stored, reading recent mentions")
+
         try:
-            # Get bot ID
-            me = opacity_worker.twitter_plugin.twitter_client.get_me()
-            if not me or not me.data:
-                print("[ERROR] Could not retrieve bot's user ID")
-                return FunctionResultStatus.FAILED, "Failed to get bot's user ID", {}
-            bot_id = me.data.id
-            
-            # Add delay between API calls
-            time.sleep(2)
-
-            # Get mentions
-            mentions = opacity_worker.twitter_plugin.twitter_client.get_users_mentions(
-                id=bot_id,
-                max_results=5,
-                tweet_fields=['id', 'created_at', 'text'],
-                start_time=formatted_time 
-            )
+            mentions = mention_ingester.fetch_new()
         except Exception as e:
-            if "429" in str(e):
-                print("[WARN] Rate limit hit, waiting 60 seconds...")
-                time.sleep(60)
+            # The rate limiter has already waited out and retried 429s
+            if is_rate_limit_error(e):
+                print("[WARN] Rate limit persisted after retries")
                 return FunctionResultStatus.FAILED, "Rate limit hit, please retry", {}
             raise e
-        
-        print("got mentions")
-        print(f"Mentions type: {type(mentions)}")
-        print(f"Mentions data: {mentions}")
-        
+
         if not mentions:
-            return FunctionResultStatus.DONE, "No mentions retrieved", {}
-        
-        # Access data through the Response object properly
-        mentions_data = mentions.data if hasattr(mentions, 'data') else None
-        
-        if not mentions_data:
-            return FunctionResultStatus.DONE, "No mentions data available", {}
-        
+            return FunctionResultStatus.DONE, "No new mentions", {}
+
         processed_count = 0
         verified_count = 0
-        skipped_count = 0
+        tweet_ids = []
 
-        for mention in mentions_data:
+        for mention in mentions:
             if not hasattr(mention, 'id'):
                 print(f"Invalid mention data: {mention}")
                 continue
-            
-            tweet_time = datetime.fromisoformat(str(mention.created_at).replace('Z', '+00:00'))
-
-            # Skip tweets older than cutoff
-            if tweet_time < cutoff_time:
-                print(f"[INFO] Skipping tweet {mention.id} from {tweet_time.isoformat()} - too old")
-                skipped_count += 1
+            tweet_id = str(int(mention.id))
+            if not _claim_mention(tweet_id):
                 continue
-            
-            print("mention.id:")
-            print(mention.id)
-            tweet_id = int(mention.id)
-            print(f"\n[INFO] Processing mention tweet ID: {tweet_id} from {tweet_time.isoformat()}")
-            
-            time.sleep(5)
-
-            # Use the opacity worker to verify the tweet
-            try:
-                status, message, result = opacity_worker.verify_tweet_thread(str(tweet_id)) 
-                if status == FunctionResultStatus.DONE and result.get("valid", False):
-                    verified_count += 1
-                print(f"[INFO] Verification result: {message}")
-            except Exception as e:
-                if "429" in str(e):
-                    print("[WARN] Rate limit hit during verification, waiting 60 seconds...")
-                    time.sleep(60)
-                    try:
-                        # One retry after rate limit wait
-                        status, message, result = opacity_worker.verify_tweet_thread(str(tweet_id))
-                        if status == FunctionResultStatus.DONE and result.get("valid", False):
-                            verified_count += 1
-                        print(f"[INFO] Retry verification result: {message}")
-                    except Exception as retry_e:
-                        print(f"[ERROR] Failed to verify tweet {tweet_id} on retry: {retry_e}")
-                        if "429" in str(retry_e):
-                            return FunctionResultStatus.FAILED, "Rate limit persists after retry", {}
-                else:
-                    print(f"[ERROR] Failed to verify tweet {tweet_id}: {e}")
-            
+            print(f"\n[INFO] Queueing mention tweet ID: {tweet_id} from {mention.created_at}")
+            tweet_ids.append(tweet_id)
+
+        # Verify all mentions concurrently through the staged pipeline
+        for tweet_id, (status, message, result) in mention_pipeline.process(tweet_ids):
+            if status == FunctionResultStatus.DONE and result.get("valid", False):
+                verified_count += 1
+            print(f"[INFO] Verification result for {tweet_id}: {message}")
             processed_count += 1
-        
+
+        # Only move the cursor once every mention has been handled, so a
+        # crash mid-cycle replays the batch instead of dropping it
+        mention_ingester.checkpoint(mentions)
+
         result_message = (
             f"Processed {processed_count} mentions, "
-            f"verified {verified_count} proofs, "
-            f"skipped {skipped_count} old tweets"
+            f"verified {verified_count} proofs"
         )
         print(f"\n[SUMMARY] {result_message}")
         return FunctionResultStatus.DONE, result_message, {}
@@ -132,8 +165,6 @@ def verify_mentioned_results(**kwargs) -> tuple:
     except Exception as e:
         error_msg = f"Error encountered while processing mentions: {str(e)}"
         print(f"[ERROR] {error_msg}")
-        if "429" in str(e):
-            time.sleep(60)
         return FunctionResultStatus.FAILED, error_msg, {}
 
 # Action space with verification capability
@@ -162,7 +193,11 @@ def check_mentions():
             print("\n[INFO] Starting new mention check cycle...")
             worker.run("Check Twitter mentions for verification requests")
             print("[INFO] Waiting for next check cycle...")
-            time.sleep(CHECK_INTERVAL_MINUTES * 60)  # Wait between checks
+            # Events arrive as they happen; polling only catches missed ones
+            if mention_source is not None and mention_source.running:
+                time.sleep(FALLBACK_CHECK_INTERVAL_MINUTES * 60)
+            else:
+                time.sleep(CHECK_INTERVAL_MINUTES * 60)  # Wait between checks
         except Exception as e:
             print(f"[ERROR] Error in check_mentions loop: {e}")
             time.sleep(60)  # Wait a minute before retrying on error
@@ -171,7 +206,13 @@ def check_mentions():
 mention_checker = threading.Thread(target=check_mentions, daemon=True)
 
 if __name__ == "__main__":
-    # Start thread
+    if os.environ.get("METRICS_PORT"):
+        start_metrics_server(int(os.environ["METRICS_PORT"]))
+    if os.environ.get("REPUTATION_PORT"):
+        start_reputation_server(opacity_worker.reputation, int(os.environ["REPUTATION_PORT"]))
+
+    # Start event-driven ingestion, with polling kept as the fallback
+    start_event_ingestion()
     mention_checker.start()
 
     try:
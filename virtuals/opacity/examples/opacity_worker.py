@@ -5,18 +5,100 @@ from game_sdk.game.custom_types import (
     FunctionResult,
     FunctionResultStatus
 )
-from typing import Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 import os
 from dotenv import load_dotenv
-import re
 import requests
-from opacity_game_sdk.opacity_plugin import OpacityPlugin
+from opacity_game_sdk.opacity_plugin import (
+    OpacityPlugin,
+    InvalidProofError,
+    ProofRejectedLocallyError
+)
+from opacity_game_sdk.verification_cache import VerificationCache
+from opacity_game_sdk.prover_client import ProverClient
+from opacity_game_sdk.proof_precheck import ProofPrechecker
+from opacity_game_sdk.rate_limiter import RateLimitedClient, is_rate_limit_error
+from opacity_game_sdk.tweet_cache import TweetCache
+from opacity_game_sdk.tweet_parser import TweetParser
+from opacity_game_sdk.verification_store import VerificationStore, DEFAULT_DB_PATH
+from opacity_game_sdk.reputation_index import ReputationIndex
+from opacity_game_sdk.reply_followups import FollowUpReplier
+from opacity_game_sdk.resilience import CircuitOpenError, Dependency, DependencyTimeoutError
+from opacity_game_sdk.metrics import get_metrics
 from twitter_plugin_gamesdk.twitter_plugin import TwitterPlugin
-import time
+import functools
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 import sys
 
-from ethosMarket.ethos_trade_cdp.py.main import buy_trust, sell_trust, transfer_seraph
+from ethosMarket.ethos_trade_cdp.py.main import (
+    add_call_observer,
+    add_event_observer,
+    batch_trade,
+    batch_transfer_seraph,
+    set_call_guard
+)
+
+
+class _SettledTx:
+    """A settlement handled by an earlier attempt, with its hash if one was recorded."""
+
+    outcome = "handled by an earlier attempt"
+
+    def __init__(self, transaction_hash: Optional[str]):
+        self.transaction_hash = transaction_hash
+
+
+def _resolved(value) -> Future:
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+class VerificationHalted(Exception):
+    """Raised by a verification stage once it has produced the final result."""
+
+    def __init__(self, status: FunctionResultStatus, message: str, info: Dict):
+        super().__init__(message)
+        self.result = (status, message, info)
+
+
+def record_verification_result(result: Tuple[FunctionResultStatus, str, Dict]) -> None:
+    """Count a finished verification by status and verdict."""
+    status, _, info = result
+    valid = info.get("valid") if isinstance(info, dict) else None
+    get_metrics().inc(
+        "verification_results_total",
+        status=getattr(status, "name", str(status)).lower(),
+        verdict="none" if valid is None else ("valid" if valid else "invalid")
+    )
+
+
+def _traced_stage(name: str):
+    """Record a pipeline stage as a span of the mention's trace."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(self, payload):
+            tweet_id = payload if isinstance(payload, str) else payload.get("tweet_id")
+            with get_metrics().span(name, trace_id=tweet_id) as attributes:
+                try:
+                    return fn(self, payload)
+                except VerificationHalted as halted:
+                    # A halt is a result, not a failure of the stage
+                    attributes["halted"] = halted.result[1]
+                    stopped = halted
+            raise stopped
+        return wrapper
+    return decorate
+
+
+def _observe_contract_call(label: str, phase: str, seconds: float, ok: bool) -> None:
+    get_metrics().observe(
+        "contract_call_seconds", seconds,
+        method=label, phase=phase, status="ok" if ok else "error"
+    )
+
 
 class OpacityVerificationWorker:
     def __init__(self):
@@ -54,33 +136,128 @@ class OpacityVerificationWorker:
 
     def _initialize_plugins(self):
         """Initialize Opacity and Twitter plugins."""
-        self.opacity_plugin = OpacityPlugin()
+        self._initialize_dependencies()
+        max_proof_age = os.environ.get("PROOF_MAX_AGE")
+        self.opacity_plugin = OpacityPlugin(
+            prechecker=ProofPrechecker(
+                max_age=float(max_proof_age) if max_proof_age else None
+            ),
+            dependency=self.prover
+        )
+        self.prover_client = ProverClient(
+            self.opacity_plugin.prover_url,
+            session=self.opacity_plugin.session,
+            timeout=float(os.environ.get("PROVER_TIMEOUT", 15)),
+            max_retries=int(os.environ.get("PROVER_MAX_RETRIES", 2)),
+            dependency=self.prover
+        )
+        self.verification_cache = VerificationCache(
+            ttl=float(os.environ.get("VERIFICATION_CACHE_TTL", 3600)),
+            negative_ttl=float(os.environ.get("VERIFICATION_CACHE_NEGATIVE_TTL", 60)),
+            maxsize=int(os.environ.get("VERIFICATION_CACHE_SIZE", 4096))
+        )
+        self.tweet_parser = TweetParser()
+        self.tweet_cache = TweetCache(
+            maxsize=int(os.environ.get("TWEET_CACHE_SIZE", 4096))
+        )
 
         try:
-            twitter_options = {
-                "id": "opacity_twitter_plugin",
-                "name": "Opacity Twitter Plugin",
-                "description": "Twitter Plugin for Opacity verification.",
-                "credentials": {
-                    "bearerToken": os.environ["TWITTER_BEARER_TOKEN"],
-                    "apiKey": os.environ["TWITTER_API_KEY"],
-                    "apiSecretKey": os.environ["TWITTER_API_SECRET_KEY"],
-                    "accessToken": os.environ["TWITTER_ACCESS_TOKEN"],
-                    "accessTokenSecret": os.environ["TWITTER_ACCESS_TOKEN_SECRET"],
-                    "clientKey": os.environ["TWITTER_CLIENT_KEY"],
-                    "clientSecret": os.environ["TWITTER_CLIENT_SECRET"],
-                },
-            }
-            self.twitter_plugin = TwitterPlugin(twitter_options)
+            self.twitter_plugin = self._create_twitter_plugin()
+            # Every Twitter call shares the process-wide per-endpoint quota
+            self.twitter_plugin.twitter_client = RateLimitedClient(
+                self.twitter_plugin.twitter_client,
+                guard=self.twitter
+            )
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Twitter plugin: {str(e)}")
 
+        self._register_metrics()
+
+    def _initialize_dependencies(self):
+        """Guard prover, Twitter and CDP calls with circuit breakers and timeouts."""
+        breaker = {
+            "failure_threshold": int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5)),
+            "reset_timeout": float(os.environ.get("CIRCUIT_RESET_SECONDS", 30)),
+        }
+        prover_timeout = float(os.environ.get("PROVER_TIMEOUT", 15))
+        self.prover = Dependency(
+            "prover",
+            default_timeout=prover_timeout,
+            max_timeout=prover_timeout,
+            **breaker
+        )
+        # A 429 means Twitter is healthy but the quota is spent, and a hedge
+        # would spend it twice
+        self.twitter = Dependency(
+            "twitter",
+            is_failure=lambda error: not is_rate_limit_error(error),
+            hedge=False,
+            **breaker
+        )
+        self.cdp = Dependency("cdp", default_timeout=60, max_timeout=120, **breaker)
+        set_call_guard(
+            lambda operation, kind, call: self.cdp.call(call, operation=operation, kind=kind)
+        )
+
+    def _create_twitter_plugin(self) -> TwitterPlugin:
+        """Create the Twitter plugin from the credentials in the environment."""
+        twitter_options = {
+            "id": "opacity_twitter_plugin",
+            "name": "Opacity Twitter Plugin",
+            "description": "Twitter Plugin for Opacity verification.",
+            "credentials": {
+                "bearerToken": os.environ["TWITTER_BEARER_TOKEN"],
+                "apiKey": os.environ["TWITTER_API_KEY"],
+                "apiSecretKey": os.environ["TWITTER_API_SECRET_KEY"],
+                "accessToken": os.environ["TWITTER_ACCESS_TOKEN"],
+                "accessTokenSecret": os.environ["TWITTER_ACCESS_TOKEN_SECRET"],
+                "clientKey": os.environ["TWITTER_CLIENT_KEY"],
+                "clientSecret": os.environ["TWITTER_CLIENT_SECRET"],
+            },
+        }
+        return TwitterPlugin(twitter_options)
+
+    def _register_metrics(self):
+        """Export cache statistics and on-chain call latencies."""
+        metrics = get_metrics()
+        caches = {
+            "verification": self.verification_cache,
+            "tweets": self.tweet_cache.tweets,
+            "roots": self.tweet_cache.roots,
+            "usernames": self.tweet_cache.usernames,
+        }
+        metrics.register_counter(
+            "cache_hits_total",
+            "Cache lookups answered from memory",
+            lambda: {(("cache", name),): cache.hits for name, cache in caches.items()}
+        )
+        metrics.register_counter(
+            "cache_misses_total",
+            "Cache lookups that went to the network",
+            lambda: {(("cache", name),): cache.misses for name, cache in caches.items()}
+        )
+        # Registered once per process, however many workers exist
+        add_call_observer(_observe_contract_call)
+
     def _initialize_verified_agents(self):
         """Initialize tracking of verified agents."""
-        self.verified_agents_file = "verified_agents.txt"
-        self.verified_tweets_file = "verified_tweets.txt"
-        self.verified_agents = self._load_verified_agents()
-        self.verified_tweets = self._load_verified_tweets()
+        self.store = VerificationStore(
+            os.environ.get("VERIFICATION_DB_PATH", DEFAULT_DB_PATH)
+        )
+        # Carry over history from the flat files used by earlier versions
+        self.store.import_legacy_files("verified_agents.txt", "verified_tweets.txt")
+        # Per-agent aggregates, fed by verdicts and by settled trades and rewards
+        self.reputation = ReputationIndex(self.store.path)
+        self.reputation.backfill(self.store)
+        add_event_observer(self.reputation.record_settlement_event)
+        self._settle_lock = threading.Lock()
+        # Verdicts are replied at once; transaction links follow once mined
+        self.follow_ups = FollowUpReplier(
+            self._follow_up_once,
+            max_pending=int(os.environ.get("FOLLOW_UP_MAX_PENDING", 100)),
+            coalesce_window=float(os.environ.get("FOLLOW_UP_COALESCE_WINDOW", 2)),
+            max_wait=float(os.environ.get("FOLLOW_UP_MAX_WAIT", 600))
+        )
 
     def _get_state(
         self,
@@ -90,124 +267,228 @@ class OpacityVerificationWorker:
         """Simple state management."""
         return {}
 
-    def _load_verified_agents(self) -> set:
-        """Load previously verified agents from file."""
-        try:
-            if os.path.exists(self.verified_agents_file):
-                with open(self.verified_agents_file, 'r') as f:
-                    return set(line.strip() for line in f)
-            return set()
-        except Exception as e:
-            print(f"Error loading verified agents: {e}")
-            return set()
-
     def _save_verified_agent(self, agent_id: str) -> bool:
-        """Save newly verified agent to file. Returns True if agent was newly added."""
+        """Save newly verified agent. Returns True if agent was newly added."""
         try:
-            if agent_id in self.verified_agents:
-                return False
-            with open(self.verified_agents_file, 'a') as f:
-                f.write(f"{agent_id}\n")
-            self.verified_agents.add(agent_id)
-            return True
+            return self.store.add_verified_agent(agent_id)
         except Exception as e:
             print(f"[ERROR] Failed to save verified agent: {e}")
             return False
-        
-    def _load_verified_tweets(self) -> set:
-        """Load previously verified tweet IDs from file."""
-        try:
-            if os.path.exists(self.verified_tweets_file):
-                with open(self.verified_tweets_file, 'r') as f:
-                    return set(line.strip() for line in f)
-            return set()
-        except Exception as e:
-            print(f"Error loading verified tweets: {e}")
-            return set()
 
-    def _save_verified_tweet(self, tweet_id: str) -> bool:
-        """Save verified tweet ID to file. Returns True if tweet was newly added."""
+    def _save_verified_tweet(
+        self,
+        tweet_id: str,
+        author_id: Optional[str] = None,
+        proof_id: Optional[str] = None
+    ) -> bool:
+        """Save verified tweet ID. Returns True if tweet was newly added."""
         try:
-            if tweet_id in self.verified_tweets:
-                return False
-            with open(self.verified_tweets_file, 'a') as f:
-                f.write(f"{tweet_id}\n")
-            self.verified_tweets.add(tweet_id)
-            return True
+            return self.store.record_verification(
+                tweet_id,
+                True,
+                author_id=author_id,
+                proof_id=proof_id
+            )
         except Exception as e:
             print(f"[ERROR] Failed to save verified tweet: {e}")
             return False
 
-    def _extract_wallet_address(self, tweet_text: str) -> Optional[str]:
-        """Extract Ethereum wallet address from tweet text."""
+    def _record_reputation(
+        self,
+        tweet_id: str,
+        author_id: Optional[str],
+        valid: bool,
+        proof_id: Optional[str] = None,
+        mention_id: Optional[str] = None
+    ) -> None:
+        """Add a verdict to the author's reputation."""
+        if author_id is None:
+            return
         try:
-            patterns = [
-                r'wallet address:\s*(0x[a-fA-F0-9]{40})',
-                r'address:\s*(0x[a-fA-F0-9]{40})',
-                r'(0x[a-fA-F0-9]{40})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, tweet_text, re.IGNORECASE)
-                if match:
-                    return match.group(1)
-            return None
+            self.reputation.record_verification(
+                tweet_id, author_id, valid, proof_id=proof_id, mention_id=mention_id
+            )
         except Exception as e:
-            print(f"Error extracting wallet address: {e}")
-            return None
-        
-    def _get_tweet_data(self, tweet_id: str) -> Optional[Dict]:
-        """Get tweet data with specified fields."""
-        return self.twitter_plugin.twitter_client.get_tweet(
+            print(f"[ERROR] Failed to record reputation: {e}")
+
+    def _record_tx(self, tx, tweet_id: Optional[str]) -> None:
+        """Store the hash of a settlement transaction against a verification."""
+        tx_hash = getattr(tx, 'transaction_hash', None)
+        if tweet_id and tx_hash:
+            try:
+                self.store.record_tx_hash(tx_hash, tweet_id=tweet_id)
+            except Exception as e:
+                print(f"[ERROR] Failed to record transaction hash: {e}")
+
+    def _claim_once(self, key: str, owner: str, already_done: Callable[[], bool]) -> bool:
+        """
+        Return True if owner is the one verification entitled to do the work
+        behind key, including when owner is resuming after a crash.
+
+        already_done covers work recorded before idempotency keys existed.
+        """
+        if self.store.get_key(key) is None and already_done():
+            return False
+        if self.store.claim_key(key, owner=owner):
+            return True
+        record = self.store.get_key(key)
+        return record is not None and record["owner"] == owner
+
+    def _settle_once(self, key: str, owner: str, send: Callable[[], Future]) -> Future:
+        """
+        Queue a settlement at most once per idempotency key.
+
+        A settlement sent by an earlier attempt is never resent; its recorded
+        transaction is returned instead.
+        """
+        if not self.store.claim_key(key, owner=owner):
+            record = self.store.get_key(key) or {}
+            print(f"[INFO] Settlement {key} already {record.get('status')}, not resending")
+            return _resolved(_SettledTx(record.get("result")))
+
+        try:
+            handle = send()
+        except Exception:
+            # Nothing was queued, so a retry may send it
+            self.store.fail_key(key)
+            raise
+
+        def finish(done: Future) -> None:
+            # A None result may still have been broadcast; never release it
+            tx = done.result()
+            self.store.complete_key(key, getattr(tx, "transaction_hash", None))
+
+        handle.add_done_callback(finish)
+        return handle
+
+    def _reply_once(self, tweet_id: str, text: str) -> bool:
+        """Reply to a tweet unless an earlier attempt already did."""
+        key = f"reply:{tweet_id}"
+        if not self.store.claim_key(key, owner=tweet_id):
+            print(f"[INFO] Already replied to {tweet_id}, skipping")
+            return False
+        reply_tweet_fn = self.twitter_plugin.get_function('reply_tweet')
+        try:
+            reply_tweet_fn(tweet_id, text)
+        except DependencyTimeoutError:
+            # The abandoned reply may still be posted; never post it twice
+            print(f"[WARN] Reply to {tweet_id} timed out and may still be posted")
+            self.store.complete_key(key)
+            raise
+        except Exception:
+            self.store.fail_key(key)
+            raise
+        self.store.complete_key(key)
+        self.store.advance_step(tweet_id, "replied")
+        return True
+
+    def _follow_up_once(self, tweet_id: str, text: str) -> None:
+        """Post the settlement follow-up to a tweet unless an earlier attempt already did."""
+        key = f"followup:{tweet_id}"
+        if not self.store.claim_key(key, owner=tweet_id):
+            return
+        reply_tweet_fn = self.twitter_plugin.get_function('reply_tweet')
+        try:
+            reply_tweet_fn(tweet_id, text)
+        except DependencyTimeoutError:
+            # The abandoned reply may still be posted; never post it twice
+            print(f"[WARN] Reply to {tweet_id} timed out and may still be posted")
+            self.store.complete_key(key)
+            raise
+        except Exception:
+            self.store.fail_key(key)
+            raise
+        self.store.complete_key(key)
+
+    def _follow_up_settlements(
+        self,
+        reply_tweet_id: str,
+        header: str,
+        links: list
+    ) -> None:
+        """Record the settlements' hashes and link them in a follow-up once mined."""
+        for _, handle, tweet_id in links:
+            handle.add_done_callback(
+                lambda done, tweet_id=tweet_id: self._record_tx(done.result(), tweet_id)
+            )
+        self.follow_ups.schedule(
+            reply_tweet_id, header, [(label, handle) for label, handle, _ in links]
+        )
+
+    def _extract_wallet_address(self, tweet_text: str) -> Optional[str]:
+        """Extract a checksum-valid Ethereum wallet address from tweet text."""
+        return self.tweet_parser.parse(tweet_text).wallet_address
+
+    def _get_tweet_data(self, tweet_id: str) -> Optional[Any]:
+        """Get tweet data with specified fields, served from the tweet cache when possible."""
+        tweet = self.tweet_cache.get_tweet(tweet_id)
+        if tweet is not None:
+            return tweet
+
+        response = self.twitter_plugin.twitter_client.get_tweet(
             tweet_id,
             tweet_fields=['conversation_id', 'referenced_tweets', 'text', 'author_id'],
             expansions=['referenced_tweets.id']
         )
+        # Expanded referenced tweets are cached too, saving a call per thread hop
+        self.tweet_cache.put_response(response)
+        return getattr(response, 'data', None)
 
-    def _get_original_tweet(self, tweet_id: str) -> Optional[Dict]:
-        """Get the original (root) tweet of a thread."""
-        max_retries = 3
-        base_wait_time = 60  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                current_tweet = self._get_tweet_data(tweet_id)
+    def _get_author_username(self, author_id: str) -> str:
+        """Get an author's username, falling back to the author ID."""
+        username = self.tweet_cache.get_username(author_id)
+        if username is not None:
+            return username
 
-                if not current_tweet or not current_tweet.data:
-                    raise ValueError(f"Tweet with ID {tweet_id} not found")
+        try:
+            author_data = self.twitter_plugin.twitter_client.get_user(id=author_id)
+            username = author_data.data.username
+        except Exception as e:
+            print(f"Error getting author username: {e}")
+            return author_id
 
-                referenced_tweets = getattr(current_tweet.data, 'referenced_tweets', None)
-                if not referenced_tweets:
-                    return self._format_tweet_data(current_tweet.data)
+        self.tweet_cache.put_username(author_id, username)
+        return username
 
-                while referenced_tweets:
-                    parent_ref = next(
-                        (ref for ref in referenced_tweets if ref.type == 'replied_to'),
-                        None
-                    )
-                    if not parent_ref:
-                        break
+    def _get_original_tweet(self, tweet_id: str) -> Optional[Dict]:
+        """Get the original (root) tweet of a thread."""
+        with get_metrics().span("get_original_tweet", tweet_id=tweet_id):
+            return self._find_original_tweet(tweet_id)
+
+    def _find_original_tweet(self, tweet_id: str) -> Optional[Dict]:
+        # Rate limits are handled by the limiter wrapping twitter_client
+        current_tweet = self._get_tweet_data(tweet_id)
+        if not current_tweet:
+            raise ValueError(f"Tweet with ID {tweet_id} not found")
+
+        # The conversation ID is the root tweet's ID, so the root is one lookup away
+        conversation_id = getattr(current_tweet, 'conversation_id', None)
+        if conversation_id:
+            root_tweet = self.tweet_cache.get_root(conversation_id)
+            if root_tweet is None:
+                root_tweet = self._get_tweet_data(str(conversation_id))
+            if root_tweet:
+                self.tweet_cache.put_root(conversation_id, root_tweet)
+                return self._format_tweet_data(root_tweet)
+
+        # Fall back to walking the reply chain, e.g. when the root is unavailable
+        referenced_tweets = getattr(current_tweet, 'referenced_tweets', None)
+        while referenced_tweets:
+            parent_ref = next(
+                (ref for ref in referenced_tweets if ref.type == 'replied_to'),
+                None
+            )
+            if not parent_ref:
+                break
 
-                    # Add delay between API calls
-                    time.sleep(2)
-                    
-                    current_tweet = self._get_tweet_data(str(parent_ref.id))
-                    if not current_tweet or not current_tweet.data:
-                        break
-                    
-                    referenced_tweets = getattr(current_tweet.data, 'referenced_tweets', None)
+            parent_tweet = self._get_tweet_data(str(parent_ref.id))
+            if not parent_tweet:
+                break
 
-                return self._format_tweet_data(current_tweet.data)
+            current_tweet = parent_tweet
+            referenced_tweets = getattr(current_tweet, 'referenced_tweets', None)
 
-            except Exception as e:
-                if "429" in str(e):
-                    wait_time = base_wait_time * (attempt + 1)  # Exponential backoff
-                    print(f"[WARN] Rate limit hit, waiting {wait_time} seconds (attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(wait_time)
-                    if attempt == max_retries - 1:  # Last attempt
-                        raise RuntimeError(f"Rate limit persisted after {max_retries} retries")
-                    continue  # Try again
-                raise  # Re-raise other exceptions
+        return self._format_tweet_data(current_tweet)
 
     def _format_tweet_data(self, tweet_data) -> Dict:
         """Format tweet data into consistent structure."""
@@ -219,23 +500,61 @@ class OpacityVerificationWorker:
 
     def _extract_proof_from_tweet(self, tweet_text: str) -> Optional[Dict]:
         """Extract proof ID from tweet text."""
-        try:
-            print(f"Attempting to extract proof from tweet text: {tweet_text}")
-            proof_match = re.search(
-                r'Proof ID:\s*(\S+)\s*$',
-                tweet_text,
-                re.IGNORECASE
-            )
-            if proof_match:
-                proof_id = proof_match.group(1)
-                print(f"Found proof ID: {proof_id}")
-                return {"proof_id": proof_id}
-
-            print("No proof ID found in tweet text")
+        proof_id = self.tweet_parser.parse(tweet_text).proof_id
+        if proof_id is None:
             return None
+        print(f"[INFO] Found proof ID: {proof_id}")
+        return {"proof_id": proof_id}
+
+    def _handle_invalid_proof(
+        self,
+        proof_id: str,
+        original_tweet_id: str,
+        reply_tweet_id: str,
+        author_id: str,
+        sell_trust: bool = False
+    ) -> Tuple[FunctionResultStatus, str, Dict]:
+        """
+        Settle and reply for a proof that is invalid or expired.
+
+        An agent that was verified before loses trust; any other agent
+        (or a proof the prover does not know) gets a distrust signal.
+        """
+        try:
+            self.store.record_verification(original_tweet_id, False, proof_id=proof_id)
         except Exception as e:
-            print(f"Error extracting proof ID: {e}")
-            return None
+            print(f"[ERROR] Failed to record invalid proof: {e}")
+        self._record_reputation(original_tweet_id, author_id, False, proof_id, reply_tweet_id)
+
+        if sell_trust:
+            method, reply_text, label = "dumpeetTrust", "[FAILED] Trust diminished", "Trust withdrawn"
+            print(f"[TRUST] Selling trust for {original_tweet_id}")
+        else:
+            method, reply_text, label = "longeetDistrust", "[FAILED] Invalid or expired proof", "Distrust signal"
+            print(f"[DISTRUST] Invalid proof detected for {original_tweet_id}")
+        trade_handle = self._settle_once(
+            f"trade:{method}:{original_tweet_id}",
+            reply_tweet_id,
+            lambda: batch_trade(method, verification_id=original_tweet_id)
+        )
+        self.store.advance_step(reply_tweet_id, "settled")
+
+        self._reply_once(reply_tweet_id, f"{reply_text}\n└─ Proof {proof_id}")
+        self._follow_up_settlements(
+            reply_tweet_id,
+            f"[SETTLED] Proof {proof_id}",
+            [(label, trade_handle, original_tweet_id)]
+        )
+
+        return (
+            FunctionResultStatus.DONE,
+            "Invalid proof ID - verification failed",
+            {
+                "valid": False,
+                "original_tweet_id": original_tweet_id,
+                "proof_id": proof_id
+            }
+        )
 
     def _handle_verification_response(
         self,
@@ -245,26 +564,29 @@ class OpacityVerificationWorker:
         wallet_address: Optional[str],
         original_tweet_id: str,
         reply_tweet_id: str,
-        original_author_id: str
+        original_author_id: str,
+        agent_id: Optional[str] = None
     ) -> Tuple[FunctionResultStatus, str, Dict]:
         """Handle verification result and post appropriate responses."""
         try:
-            reply_tweet_fn = self.twitter_plugin.get_function('reply_tweet')
-            base_reply_text = self._generate_reply_text(
-                verification_result,
+            base_reply_text, links = self._generate_reply_text(
                 proof_id,
                 is_previously_verified,
-                wallet_address
+                wallet_address,
+                original_tweet_id,
+                reply_tweet_id,
+                agent_id
             )
+            self.store.advance_step(reply_tweet_id, "settled")
 
             # Add mention of original author if replying to a different tweet
-            if reply_tweet_id != original_tweet_id:
-                reply_text = f"@{original_author_id} {base_reply_text}"
-            else:
-                reply_text = base_reply_text
+            mention = f"@{original_author_id} " if reply_tweet_id != original_tweet_id else ""
 
-            # Only reply to the incoming tweet
-            reply_tweet_fn(reply_tweet_id, reply_text)
+            # Only reply to the incoming tweet; links follow once mined
+            self._reply_once(reply_tweet_id, f"{mention}{base_reply_text}")
+            self._follow_up_settlements(
+                reply_tweet_id, f"{mention}[SETTLED] Proof {proof_id}", links
+            )
 
             return (
                 FunctionResultStatus.DONE,
@@ -285,210 +607,325 @@ class OpacityVerificationWorker:
 
     def _generate_reply_text(
         self,
-        verification_result: bool,
         proof_id: str,
         is_previously_verified: bool,
-        wallet_address: Optional[str]
-    ) -> str:
-        """Generate appropriate reply text based on verification result."""
-        def get_scan_url(tx):
-            if tx and hasattr(tx, 'transaction_hash'):
-                return f"https://basescan.org/tx/{tx.transaction_hash}"
-            return None
+        wallet_address: Optional[str],
+        original_tweet_id: Optional[str] = None,
+        reply_tweet_id: Optional[str] = None,
+        agent_id: Optional[str] = None
+    ) -> Tuple[str, list]:
+        """
+        Queue the settlements for a valid verdict and generate its reply text.
+
+        Invalid verdicts are settled and replied by _handle_invalid_proof.
+        Returns the text and the follow-up links as (label, handle, tweet
+        ID to record the hash against); nothing waits for a confirmation.
+        """
+        # Queue every settlement up front so they confirm in parallel
+        # Trades are netted against other verifications for the same market
+        # Idempotency keys make retries and restarts reuse earlier settlements
+        trade_handle = self._settle_once(
+            f"trade:longeetTrust:{original_tweet_id}",
+            reply_tweet_id,
+            lambda: batch_trade("longeetTrust", verification_id=original_tweet_id)
+        )
+        print(f"[TRUST] Buying trust for {original_tweet_id}")
 
-        if verification_result:
-            if not is_previously_verified:
-                trust_tx = buy_trust()
-                trust_url = get_scan_url(trust_tx)
-                print(f"[TRUST] Bought trust: {trust_url}")
-                
-                base_message = f"[SUCCESS] Agent verified by Seraph x Opacity\n└─ Proof {proof_id}"
-                if trust_url:
-                    base_message += f"\n└─ Trust intialized: {trust_url}"
-
-                if wallet_address:
-                    try:
-                        seraph_tx = transfer_seraph(wallet_address)
-                        seraph_url = get_scan_url(seraph_tx)
-                        if seraph_url:
-                            print(f"[SERAPH] Transferred to {wallet_address}: {seraph_url}")
-                            short_wallet = f"{wallet_address[:6]}...{wallet_address[-4:]}"
-                            return (
-                                f"{base_message}\n"
-                                f"└─ Welcome reward: 1.0 SERAPH → {short_wallet}: {seraph_url}\n"
-                            )
-                    except Exception as e:
-                        print(f"[ERROR] SERAPH transfer failed: {e}")
-                        return f"{base_message}\n└─ [ERROR] SERAPH transfer failed"
-                return f"{base_message}\n└─ [WARN] No wallet provided"
-            else:
-                trust_tx = buy_trust()
-                trust_url = get_scan_url(trust_tx)
-                print(f"[TRUST] Bought trust: {trust_url}")
-                base_message = f"[SUCCESS] Trust strengthened\n└─ Verifiable inference proof {proof_id}"
-                if trust_url:
-                    base_message += f"\n└─ Trust reinforced: {trust_url}"
-                return base_message
+        if is_previously_verified:
+            links = [("Trust reinforced", trade_handle, original_tweet_id)]
+            return f"[SUCCESS] Trust strengthened\n└─ Verifiable inference proof {proof_id}", links
+
+        links = [("Trust intialized", trade_handle, original_tweet_id)]
+        base_message = f"[SUCCESS] Agent verified by Seraph x Opacity\n└─ Proof {proof_id}"
+        if not wallet_address:
+            return f"{base_message}\n└─ [WARN] No wallet provided", links
+
+        seraph_handle = self._settle_once(
+            f"seraph:{agent_id or wallet_address}",
+            reply_tweet_id,
+            lambda: batch_transfer_seraph(wallet_address, verification_id=original_tweet_id)
+        )
+        short_wallet = f"{wallet_address[:6]}...{wallet_address[-4:]}"
+        links.append((f"Welcome reward: 1.0 SERAPH → {short_wallet}", seraph_handle, None))
+        return f"{base_message}\n└─ Welcome reward: 1.0 SERAPH → {short_wallet} (pending)", links
+
+    def _reply_already_verified(
+        self,
+        tweet_id: str,
+        original_tweet: Dict,
+        author_username: Optional[str] = None
+    ) -> Tuple[FunctionResultStatus, str, Dict]:
+        """Reply that the thread's original tweet has already been verified."""
+        original_tweet_id = original_tweet['id']
+        if author_username is None:
+            author_username = self._get_author_username(original_tweet['author_id'])
+
+        if tweet_id != original_tweet_id:
+            reply_text = f"@{author_username} [INFO] Tweet already verified\n└─ Original tweet: {original_tweet_id}"
         else:
-            if not is_previously_verified:
-                distrust_tx = buy_distrust()
-                distrust_url = get_scan_url(distrust_tx)
-                print(f"[DISTRUST] Invalid inference detected: {distrust_url}")
-                base_message = f"[FAILED] Invalid inference detected\n└─ Proof {proof_id}"
-                if distrust_url:
-                    base_message += f"\n└─ Distrust signal: {distrust_url}"
-                return base_message
-            else:
-                trust_tx = sell_trust()
-                trust_url = get_scan_url(trust_tx)
-                print(f"[TRUST] Sold trust: {trust_url}")
-                base_message = f"[FAILED] Trust diminished\n└─ Proof {proof_id}"
-                if trust_url:
-                    base_message += f"\n└─ Trust withdrawn: {trust_url}"
-                return base_message
-    
-    def verify_tweet_thread(self, tweet_id: str) -> tuple:
-        """Verify a proof from the original tweet in a thread."""
+            reply_text = f"[INFO] Tweet already verified"
+
+        self._reply_once(tweet_id, reply_text)
+
+        return (
+            FunctionResultStatus.DONE,
+            "Tweet was previously verified",
+            {"original_tweet_id": original_tweet_id}
+        )
+
+    def _verified_by_other(self, original_tweet_id: str, tweet_id: str) -> bool:
+        """Return True if a different mention already verified the thread."""
+        record = self.store.get_key(f"verify:{original_tweet_id}")
+        if record is None:
+            return self.store.is_tweet_verified(original_tweet_id)
+        return record["owner"] != tweet_id
+
+    @_traced_stage("resolve_thread")
+    def resolve_thread(self, tweet_id: str) -> Dict:
+        """
+        Pipeline stage: resolve the thread a tweet belongs to.
+
+        Returns the verification context for the remaining stages, or raises
+        VerificationHalted when the thread needs no further verification.
+        """
+        if not tweet_id or not isinstance(tweet_id, str):
+            raise VerificationHalted(FunctionResultStatus.FAILED, "Invalid tweet ID provided", {})
+
         try:
-            if not tweet_id or not isinstance(tweet_id, str):
-                return FunctionResultStatus.FAILED, "Invalid tweet ID provided", {}
-            
-            try:
-                original_tweet = self._get_original_tweet(tweet_id)
-                if not original_tweet:
-                    return FunctionResultStatus.FAILED, "Could not retrieve original tweet", {}
-            except Exception as e:
-                return FunctionResultStatus.FAILED, f"Error retrieving tweet: {str(e)}", {}
-            
-            original_tweet_id = original_tweet['id']
-            if original_tweet_id in self.verified_tweets:
-                try:
-                    author_data = self.twitter_plugin.twitter_client.get_user(id=original_tweet['author_id'])
-                    author_username = author_data.data.username
-                except Exception as e:
-                    author_username = original_tweet['author_id']
-                    
-                reply_tweet_fn = self.twitter_plugin.get_function('reply_tweet')
-                
-                if tweet_id != original_tweet_id:
-                    reply_text = f"@{author_username} [INFO] Tweet already verified\n└─ Original tweet: {original_tweet_id}"
-                else:
-                    reply_text = f"[INFO] Tweet already verified"
-                    
-                reply_tweet_fn(tweet_id, reply_text)
-                
-                return (
-                    FunctionResultStatus.DONE,
-                    "Tweet was previously verified",
-                    {"original_tweet_id": original_tweet_id}
-                )
+            original_tweet = self._get_original_tweet(tweet_id)
+            if not original_tweet:
+                raise VerificationHalted(FunctionResultStatus.FAILED, "Could not retrieve original tweet", {})
+        except VerificationHalted:
+            raise
+        except Exception as e:
+            if is_rate_limit_error(e):
+                raise
+            raise VerificationHalted(FunctionResultStatus.FAILED, f"Error retrieving tweet: {str(e)}", {})
 
-            reply_tweet = self._get_tweet_data(tweet_id)
-            if not reply_tweet or not reply_tweet.data:
-                return FunctionResultStatus.FAILED, "Could not retrieve reply tweet", {}
+        step = self.store.get_step(tweet_id)
+        if step is not None and step["state"] == "replied":
+            raise VerificationHalted(
+                FunctionResultStatus.DONE,
+                "Mention already handled",
+                {"original_tweet_id": original_tweet['id']}
+            )
 
-            reply_text = reply_tweet.data.text
-            wallet_address = self._extract_wallet_address(reply_text)
+        if self._verified_by_other(original_tweet['id'], tweet_id):
+            raise VerificationHalted(*self._reply_already_verified(tweet_id, original_tweet))
 
-            original_tweet_author = original_tweet['author_id']
-            # Check if author is already verified before proceeding
-            is_previously_verified = str(original_tweet_author) in self.verified_agents
-            print(f"[DEBUG] Author {original_tweet_author} verification status: {'verified' if is_previously_verified else 'not verified'}")
-            print(f"[DEBUG] Current verified agents: {self.verified_agents}")
+        # Already cached by the thread lookup above
+        reply_tweet = self._get_tweet_data(tweet_id)
+        if not reply_tweet:
+            raise VerificationHalted(FunctionResultStatus.FAILED, "Could not retrieve reply tweet", {})
 
-            try:
-                author_data = self.twitter_plugin.twitter_client.get_user(id=original_tweet_author)
-                author_username = author_data.data.username
-            except Exception as e:
-                print(f"Error getting author username: {e}")
-                author_username = original_tweet_author
-
-            proof_data = self._extract_proof_from_tweet(original_tweet['text'])
-            if not proof_data:
-                return (
-                    FunctionResultStatus.FAILED,
-                    "No proof ID found in the original tweet",
-                    {"original_tweet_id": original_tweet['id']}
-                )
+        reply_text = reply_tweet.text
+        wallet_address = self._extract_wallet_address(reply_text)
 
-            try:
-                proof_id = proof_data["proof_id"]
-                
-                try:
-                    proof_response = requests.get(
-                        f"{self.opacity_plugin.prover_url}/api/logs/{proof_id}"
-                    )
-                    if not proof_response.ok:
-                        distrust_tx = buy_distrust()
-                        distrust_url = None
-                        if distrust_tx and hasattr(distrust_tx, 'transaction_hash'):
-                            distrust_url = f"https://basescan.org/tx/{distrust_tx.transaction_hash}"
-                            print(f"[DISTRUST] Invalid proof detected: {distrust_url}")
-
-                        reply_tweet_fn = self.twitter_plugin.get_function('reply_tweet')
-                        reply_text = f"[FAILED] Invalid or expired proof\n└─ Proof {proof_id}"
-                        if distrust_url:
-                            reply_text += f"\n└─ Distrust signal: {distrust_url}"
-                        
-                        reply_tweet_fn(tweet_id, reply_text)
-                        
-                        return (
-                            FunctionResultStatus.DONE,
-                            "Invalid proof ID - verification failed",
-                            {
-                                "valid": False,
-                                "original_tweet_id": original_tweet['id'],
-                                "proof_id": proof_id
-                            }
-                        )
+        original_tweet_author = original_tweet['author_id']
+        # Check if author is already verified before proceeding
+        is_previously_verified = self.store.is_agent_verified(original_tweet_author)
+        print(f"[DEBUG] Author {original_tweet_author} verification status: {'verified' if is_previously_verified else 'not verified'}")
+
+        author_username = self._get_author_username(original_tweet_author)
+
+        proof_data = self._extract_proof_from_tweet(original_tweet['text'])
+        if not proof_data:
+            raise VerificationHalted(
+                FunctionResultStatus.FAILED,
+                "No proof ID found in the original tweet",
+                {"original_tweet_id": original_tweet['id']}
+            )
+
+        # Start the log request now so it overlaps the fetch stage's queue
+        proof_id = proof_data["proof_id"]
+        if proof_id not in self.verification_cache:
+            self.prover_client.prefetch([proof_id])
+
+        return {
+            "tweet_id": tweet_id,
+            "original_tweet": original_tweet,
+            "is_previously_verified": is_previously_verified,
+            "wallet_address": wallet_address,
+            "author_username": author_username,
+            "proof_id": proof_id,
+        }
 
-                    proof_data = proof_response.json()
-                    verification_result = self.opacity_plugin.verify_proof({"proof": proof_data})
+    @_traced_stage("fetch_proof")
+    def fetch_proof(self, context: Dict) -> Dict:
+        """Pipeline stage: fetch the proof logs from the prover, unless cached."""
+        proof_id = context["proof_id"]
+        # Resume a mention whose verdict was reached before a restart
+        step = self.store.get_step(context["tweet_id"])
+        if step is not None and step["valid"] is not None and step["proof_id"] == proof_id:
+            print(f"[INFO] Resuming verification of {context['tweet_id']} from {step['state']}")
+            return dict(context, verification_result=bool(step["valid"]))
+
+        cached_result = self.verification_cache.get(proof_id=proof_id)
+        if cached_result is not None:
+            print(f"[CACHE] Reusing verification result for proof {proof_id}")
+            return dict(context, verification_result=cached_result)
 
-                except requests.RequestException as e:
-                    print(f"Error fetching proof data: {e}")
-                    return (
+        try:
+            proof_payload = self.prover_client.fetch_logs(proof_id)
+        except (requests.RequestException, CircuitOpenError, TimeoutError) as e:
+            print(f"Error fetching proof data: {e}")
+            raise VerificationHalted(
+                FunctionResultStatus.FAILED,
+                f"Error fetching proof data: {str(e)}",
+                {
+                    "original_tweet_id": context["original_tweet"]['id'],
+                    "proof_id": proof_id
+                }
+            )
+
+        if proof_payload is None:
+            self.verification_cache.put(False, proof_id=proof_id)
+            return dict(context, verification_result=False, proof_missing=True)
+
+        self.store.advance_step(
+            context["tweet_id"],
+            "fetched",
+            original_tweet_id=context["original_tweet"]['id'],
+            proof_id=proof_id
+        )
+        return dict(context, proof_payload=proof_payload)
+
+    @_traced_stage("check_proof")
+    def check_proof(self, context: Dict) -> Dict:
+        """Pipeline stage: verify the fetched proof with the prover, unless cached."""
+        proof_id = context["proof_id"]
+        verification_result = context.get("verification_result")
+        if verification_result is None:
+            proof_payload = context["proof_payload"]
+            verification_result = self.verification_cache.get(payload=proof_payload)
+            if verification_result is None:
+                try:
+                    verification_result = self.opacity_plugin.verify_proof({"proof": proof_payload})
+                except InvalidProofError:
+                    verification_result = False
+                except ProofRejectedLocallyError as e:
+                    # Not a prover verdict: fail without caching or trading on it
+                    print(f"[WARN] Proof {proof_id} rejected locally: {e}")
+                    raise VerificationHalted(
+                        FunctionResultStatus.FAILED,
+                        str(e),
+                        {
+                            "original_tweet_id": context["original_tweet"]['id'],
+                            "proof_id": proof_id
+                        }
+                    )
+                except Exception as e:
+                    error_msg = f"Error during proof verification: {str(e)}"
+                    print(f"Verification error details: {error_msg}")
+                    raise VerificationHalted(
                         FunctionResultStatus.FAILED,
-                        f"Error fetching proof data: {str(e)}",
+                        error_msg,
                         {
-                            "original_tweet_id": original_tweet['id'],
+                            "original_tweet_id": context["original_tweet"]['id'],
                             "proof_id": proof_id
                         }
                     )
+            self.verification_cache.put(
+                verification_result,
+                proof_id=proof_id,
+                payload=proof_payload
+            )
+
+        get_metrics().inc(
+            "proof_verdicts_total",
+            verdict="valid" if verification_result else "invalid"
+        )
+        self.store.advance_step(
+            context["tweet_id"],
+            "verified",
+            original_tweet_id=context["original_tweet"]['id'],
+            proof_id=proof_id,
+            valid=verification_result
+        )
 
-                # Continue with existing verification logic
-                if verification_result:
-                    self._save_verified_tweet(original_tweet_id)
-                    if not is_previously_verified:
-                        self._save_verified_agent(str(original_tweet_author))
-                        print(f"[DEBUG] Saved new verified agent: {original_tweet_author}")
-
-                return self._handle_verification_response(
-                    verification_result,
-                    proof_id,
-                    is_previously_verified,
-                    wallet_address,
-                    original_tweet['id'],
+        if not verification_result:
+            raise VerificationHalted(*self._handle_invalid_proof(
+                proof_id,
+                context["original_tweet"]['id'],
+                context["tweet_id"],
+                str(context["original_tweet"]['author_id']),
+                # A proof the prover does not know is always a distrust signal
+                sell_trust=context["is_previously_verified"] and not context.get("proof_missing")
+            ))
+
+        return dict(context, verification_result=verification_result)
+
+    @_traced_stage("settle_and_reply")
+    def settle_and_reply(self, context: Dict) -> Tuple[FunctionResultStatus, str, Dict]:
+        """Pipeline stage: record a valid verification, settle on-chain and reply."""
+        original_tweet = context["original_tweet"]
+        original_tweet_author = original_tweet['author_id']
+
+        tweet_id = context["tweet_id"]
+
+        # Concurrent mentions of one thread or agent must only settle once;
+        # the mention that claims them keeps ownership across restarts
+        with self._settle_lock:
+            if not self._claim_once(
+                f"verify:{original_tweet['id']}",
+                tweet_id,
+                lambda: self.store.is_tweet_verified(original_tweet['id'])
+            ):
+                return self._reply_already_verified(
                     tweet_id,
-                    author_username
+                    original_tweet,
+                    context["author_username"]
                 )
+            self._save_verified_tweet(
+                original_tweet['id'],
+                author_id=original_tweet_author,
+                proof_id=context["proof_id"]
+            )
+            self._record_reputation(
+                original_tweet['id'],
+                str(original_tweet_author),
+                True,
+                context["proof_id"],
+                tweet_id
+            )
+            self.store.complete_key(f"verify:{original_tweet['id']}")
+            is_previously_verified = not self._claim_once(
+                f"agent:{original_tweet_author}",
+                tweet_id,
+                lambda: self.store.is_agent_verified(original_tweet_author)
+            )
+            if not is_previously_verified:
+                self._save_verified_agent(str(original_tweet_author))
+                self.store.complete_key(f"agent:{original_tweet_author}")
+                print(f"[DEBUG] Saved new verified agent: {original_tweet_author}")
+
+        return self._handle_verification_response(
+            context["verification_result"],
+            context["proof_id"],
+            is_previously_verified,
+            context["wallet_address"],
+            original_tweet['id'],
+            tweet_id,
+            context["author_username"],
+            str(original_tweet_author)
+        )
 
+    def verify_tweet_thread(self, tweet_id: str) -> tuple:
+        """Verify a proof from the original tweet in a thread."""
+        with get_metrics().span("verify_tweet_thread", trace_id=tweet_id):
+            try:
+                context = self.resolve_thread(tweet_id)
+                context = self.fetch_proof(context)
+                context = self.check_proof(context)
+                result = self.settle_and_reply(context)
+            except VerificationHalted as halted:
+                result = halted.result
             except Exception as e:
-                error_msg = f"Error during proof verification: {str(e)}"
-                print(f"Verification error details: {error_msg}")
-                return (
-                    FunctionResultStatus.FAILED,
-                    error_msg,
-                    {
-                        "original_tweet_id": original_tweet['id'],
-                        "proof_id": proof_data["proof_id"]
-                    }
-                )
-
-        except Exception as e:
-            error_msg = f"Unexpected error during verification: {str(e)}"
-            print(error_msg)
-            return FunctionResultStatus.FAILED, error_msg, {}
+                error_msg = f"Unexpected error during verification: {str(e)}"
+                print(error_msg)
+                result = (FunctionResultStatus.FAILED, error_msg, {})
+        record_verification_result(result)
+        return result
 
     def _create_worker(self) -> Worker:
         """Create worker with thread verification capability."""
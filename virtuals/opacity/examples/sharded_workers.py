@@ -0,0 +1,166 @@
+"""
+Horizontal-scale mode: one ingester process and several verifier processes
+sharing a SQLite job queue.
+
+The ingester reads new mentions from the since_id cursor and enqueues each
+one, sharded by its conversation root. Every verifier process serves one
+shard, so all mentions of a thread are handled by the same process, while
+verified tweets, agents and settlements are shared through the verification
+database. Every process spends an equal share of the Twitter quota, and the
+verifiers take turns broadcasting wallet transactions through a lock file.
+
+    python sharded_workers.py --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from opacity_game_sdk.job_queue import JobQueue
+from opacity_game_sdk.rate_limiter import get_rate_limiter
+from opacity_game_sdk.verification_store import DEFAULT_DB_PATH
+
+CHECK_INTERVAL_SECONDS = 60
+LEASE_POLL_SECONDS = 2
+# Jobs a verifier holds at once; matches the pipeline's first-stage capacity
+MAX_LEASED_JOBS = 16
+
+
+def _db_path() -> str:
+    return os.environ.get("VERIFICATION_DB_PATH", DEFAULT_DB_PATH)
+
+
+def _share_twitter_quota(num_shards: int) -> None:
+    # The ingester and every verifier draw on the same account's quota
+    get_rate_limiter().share = 1.0 / (num_shards + 1)
+
+
+def run_ingester(num_shards: int, interval: float) -> None:
+    """Enqueue new mentions until the process is stopped."""
+    load_dotenv()
+    _share_twitter_quota(num_shards)
+    from opacity_game_sdk.mention_ingester import MentionIngester
+    from opacity_worker import OpacityVerificationWorker
+
+    worker = OpacityVerificationWorker()
+    ingester = MentionIngester(worker.twitter_plugin.twitter_client, worker.store)
+    jobs = JobQueue(_db_path(), num_shards=num_shards)
+
+    while True:
+        try:
+            mentions = ingester.fetch_new()
+            queued = 0
+            for mention in mentions:
+                conversation_id = getattr(mention, "conversation_id", None)
+                if jobs.enqueue(str(int(mention.id)), shard_key=conversation_id):
+                    queued += 1
+            # The queue is durable, so the cursor can move on right away
+            ingester.checkpoint(mentions)
+            if queued:
+                print(f"[INFO] Queued {queued} mentions, queue: {jobs.counts()}")
+        except Exception as e:
+            print(f"[ERROR] Mention ingestion failed: {e}")
+        time.sleep(interval)
+
+
+def run_verifier(shard: int, num_shards: int) -> None:
+    """Verify queued mentions of one shard until the process is stopped."""
+    load_dotenv()
+    _share_twitter_quota(num_shards)
+    from game_sdk.game.custom_types import FunctionResultStatus
+    from mention_pipeline import MentionPipeline
+    from opacity_worker import OpacityVerificationWorker
+
+    worker = OpacityVerificationWorker()
+    pipeline = MentionPipeline(worker)
+    jobs = JobQueue(_db_path(), num_shards=num_shards)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    slots = threading.Semaphore(MAX_LEASED_JOBS)
+    active = set()
+    active_lock = threading.Lock()
+    print(f"[INFO] Verifier {owner} serving shard {shard}/{num_shards}")
+
+    def finish(tweet_id: str, result: tuple) -> None:
+        status, message, _ = result
+        with active_lock:
+            active.discard(tweet_id)
+        try:
+            jobs.complete(tweet_id, message, failed=status == FunctionResultStatus.FAILED)
+        finally:
+            slots.release()
+        print(f"[INFO] Verification result for {tweet_id}: {message}")
+
+    def renew_leases() -> None:
+        # A job can wait out a rate-limit pause longer than its lease
+        while True:
+            time.sleep(jobs.lease_seconds / 3)
+            with active_lock:
+                tweet_ids = list(active)
+            try:
+                jobs.renew(owner, tweet_ids)
+            except Exception as e:
+                print(f"[ERROR] Failed to renew job leases: {e}")
+
+    threading.Thread(target=renew_leases, name="lease-renewal", daemon=True).start()
+
+    while True:
+        # Only lease what the pipeline can take; leases of jobs in the
+        # pipeline are renewed until they finish
+        available = 0
+        while available < MAX_LEASED_JOBS and slots.acquire(blocking=False):
+            available += 1
+        leased = jobs.lease(owner, [shard], limit=available) if available else []
+        for _ in range(available - len(leased)):
+            slots.release()
+        for job in leased:
+            with active_lock:
+                active.add(job["tweet_id"])
+            pipeline.submit(job["tweet_id"], callback=finish)
+        if not leased:
+            time.sleep(LEASE_POLL_SECONDS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run sharded Opacity verifier processes")
+    parser.add_argument("--workers", type=int, default=2, help="Number of verifier processes")
+    parser.add_argument(
+        "--interval", type=float, default=CHECK_INTERVAL_SECONDS,
+        help="Seconds between mention checks"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Spawned processes inherit it, so all verifiers share one broadcast lock
+    os.environ.setdefault("SETTLEMENT_LOCK_PATH", f"{_db_path()}.settle.lock")
+
+    context = multiprocessing.get_context("spawn")
+    targets = {"ingester": (run_ingester, (args.workers, args.interval))}
+    for shard in range(args.workers):
+        targets[f"verifier-{shard}"] = (run_verifier, (shard, args.workers))
+
+    processes = {}
+    try:
+        while True:
+            # Start, and restart after a crash, every process; a restarted
+            # verifier picks up its shard's expired leases
+            for name, (target, target_args) in targets.items():
+                process = processes.get(name)
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        print(f"[WARN] {name} exited with code {process.exitcode}, restarting")
+                    process = context.Process(target=target, args=target_args, name=name, daemon=True)
+                    process.start()
+                    processes[name] = process
+            time.sleep(5)
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        for process in processes.values():
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .verification_store import DEFAULT_DB_PATH
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    tweet_id      TEXT PRIMARY KEY,
+    shard_key     TEXT NOT NULL,
+    shard         INTEGER NOT NULL,
+    status        TEXT NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    enqueued_at   REAL NOT NULL,
+    finished_at   REAL,
+    result        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_shard_status ON jobs (shard, status, enqueued_at);
+"""
+
+
+def shard_for(shard_key: str, num_shards: int) -> int:
+    """Map a shard key (a conversation root ID) to a shard."""
+    try:
+        return int(shard_key) % num_shards
+    except ValueError:
+        return sum(shard_key.encode()) % num_shards
+
+
+class JobQueue:
+    """
+    Verification jobs shared by several worker processes through SQLite.
+
+    Each mention is enqueued once, keyed by tweet ID, and sharded by its
+    conversation root so every mention of a thread goes to the same worker.
+    Workers lease jobs for their own shards and renew the leases of jobs
+    they are still working on; a lease that is not renewed in time (the
+    worker died) expires and the job is handed out again.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        num_shards: int = 1,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        timeout: float = 30.0
+    ) -> None:
+        """
+        Open or create the queue
+
+        Args:
+            path (str): SQLite database file, shared by all processes
+            num_shards (int): Number of shards jobs are spread over
+            lease_seconds (float): How long a leased job stays with its worker
+            max_attempts (int): Leases a job gets before it is marked failed
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.path = path
+        self.num_shards = num_shards
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, tweet_id: str, shard_key: Optional[str] = None) -> bool:
+        """
+        Add a mention to the queue
+
+        Args:
+            tweet_id (str): Mention tweet ID
+            shard_key (Optional[str]): Conversation root ID; defaults to the
+                tweet ID
+
+        Returns:
+            bool: True if the mention was not queued before
+        """
+        shard_key = str(shard_key or tweet_id)
+        with self._lock:
+            return self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (tweet_id, shard_key, shard, status, enqueued_at) "
+                "VALUES (?, ?, ?, 'queued', ?)",
+                (str(tweet_id), shard_key, shard_for(shard_key, self.num_shards), time.time())
+            ).rowcount > 0
+
+    def lease(self, owner: str, shards: Iterable[int], limit: int = 16) -> List[Dict[str, Any]]:
+        """
+        Lease the oldest available jobs of the given shards
+
+        Args:
+            owner (str): Worker identifier
+            shards (Iterable[int]): Shards served by the worker
+            limit (int): Maximum jobs to lease
+
+        Returns:
+            List[Dict[str, Any]]: The leased jobs
+        """
+        shards = list(shards)
+        if not shards:
+            return []
+        placeholders = ", ".join("?" for _ in shards)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose worker died too often are given up on
+            self._conn.execute(
+                f"UPDATE jobs SET status = 'failed', finished_at = ?, result = 'Lease expired too often' "
+                f"WHERE status = 'leased' AND lease_expires < ? AND attempts >= ? "
+                f"AND shard IN ({placeholders})",
+                (now, now, self.max_attempts, *shards)
+            )
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE shard IN ({placeholders}) "
+                f"AND (status = 'queued' OR (status = 'leased' AND lease_expires < ?)) "
+                f"ORDER BY enqueued_at LIMIT ?",
+                (*shards, now, limit)
+            ).fetchall()
+            for row in rows:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE tweet_id = ?",
+                    (owner, now + self.lease_seconds, row["tweet_id"])
+                )
+            return [dict(row) for row in rows]
+
+    def renew(self, owner: str, tweet_ids: Iterable[str]) -> int:
+        """
+        Extend the leases an owner holds on jobs it is still processing
+
+        Returns:
+            int: Number of leases extended; a job missing from the count was
+            handed to another worker after its lease expired
+        """
+        tweet_ids = [str(tweet_id) for tweet_id in tweet_ids]
+        if not tweet_ids:
+            return 0
+        placeholders = ", ".join("?" for _ in tweet_ids)
+        with self._lock:
+            return self._conn.execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE status = 'leased' AND lease_owner = ? "
+                f"AND tweet_id IN ({placeholders})",
+                (time.time() + self.lease_seconds, owner, *tweet_ids)
+            ).rowcount
+
+    def complete(self, tweet_id: str, result: Optional[str] = None, failed: bool = False) -> None:
+        """Record the outcome of a leased job."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, lease_owner = NULL, "
+                "lease_expires = NULL WHERE tweet_id = ?",
+                ("failed" if failed else "done", time.time(), result, str(tweet_id))
+            )
+
+    def release(self, tweet_id: str) -> None:
+        """Return a leased job to the queue for another attempt."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL "
+                "WHERE tweet_id = ? AND status = 'leased'",
+                (str(tweet_id),)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs in each status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
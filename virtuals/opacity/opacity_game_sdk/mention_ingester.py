@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from .verification_store import VerificationStore
+
+# Largest page the mentions endpoint accepts
+MAX_PAGE_SIZE = 100
+CURSOR_KEY = "mentions_since_id"
+
+
+class MentionIngester:
+    """
+    Cursor-based reader of the bot's mentions.
+
+    Pages through every mention newer than the stored since_id cursor, so
+    nothing is dropped however many mentions arrive between polls or how
+    long a cycle takes. The cursor is checkpointed in the verification
+    store once the caller has handed the mentions off, giving
+    at-least-once delivery across restarts.
+    """
+
+    def __init__(
+        self,
+        twitter_client: Any,
+        store: VerificationStore,
+        page_size: int = MAX_PAGE_SIZE,
+        initial_lookback: timedelta = timedelta(minutes=1),
+        cursor_key: str = CURSOR_KEY
+    ) -> None:
+        """
+        Initialize the ingester
+
+        Args:
+            twitter_client (Any): tweepy client (or RateLimitedClient)
+            store (VerificationStore): Store holding the durable cursor
+            page_size (int): Mentions requested per page, at most 100
+            initial_lookback (timedelta): How far back to read when no
+                cursor has been stored yet
+            cursor_key (str): Store key of the cursor
+        """
+        self.twitter_client = twitter_client
+        self.store = store
+        self.page_size = max(5, min(page_size, MAX_PAGE_SIZE))
+        self.initial_lookback = initial_lookback
+        self.cursor_key = cursor_key
+        self._bot_user: Any = None
+
+    @property
+    def bot_user(self) -> Any:
+        """The bot's user object, fetched once."""
+        if self._bot_user is None:
+            me = self.twitter_client.get_me()
+            if not me or not me.data:
+                raise RuntimeError("Could not retrieve bot's user ID")
+            self._bot_user = me.data
+        return self._bot_user
+
+    @property
+    def bot_id(self) -> str:
+        """The bot's user ID."""
+        return str(self.bot_user.id)
+
+    @property
+    def bot_username(self) -> str:
+        """The bot's username."""
+        return self.bot_user.username
+
+    @property
+    def since_id(self) -> Optional[str]:
+        """The ID of the newest mention already handed off."""
+        return self.store.get_meta(self.cursor_key)
+
+    def fetch_new(self) -> List[Any]:
+        """
+        Fetch every mention newer than the cursor
+
+        Returns:
+            List[Any]: Mentions ordered oldest first
+        """
+        params = {
+            "id": self.bot_id,
+            "max_results": self.page_size,
+            "tweet_fields": ['id', 'created_at', 'text', 'conversation_id'],
+        }
+        since_id = self.since_id
+        if since_id:
+            params["since_id"] = since_id
+        else:
+            start_time = datetime.now(timezone.utc) - self.initial_lookback
+            params["start_time"] = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        mentions: List[Any] = []
+        pagination_token = None
+        while True:
+            if pagination_token:
+                params["pagination_token"] = pagination_token
+            response = self.twitter_client.get_users_mentions(**params)
+            mentions.extend(getattr(response, "data", None) or [])
+            meta = getattr(response, "meta", None) or {}
+            pagination_token = meta.get("next_token")
+            if not pagination_token:
+                break
+
+        # Pages arrive newest first; process in posting order
+        mentions.sort(key=lambda mention: int(mention.id))
+        return mentions
+
+    def checkpoint(self, mentions: List[Any]) -> None:
+        """Advance the cursor past the given mentions."""
+        if not mentions:
+            return
+        newest_id = max(int(mention.id) for mention in mentions)
+        since_id = self.since_id
+        if since_id is None or newest_id > int(since_id):
+            self.store.set_meta(self.cursor_key, str(newest_id))
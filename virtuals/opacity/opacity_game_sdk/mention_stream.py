@@ -0,0 +1,293 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Receives the ID of a tweet that mentions the bot
+MentionHandler = Callable[[str], None]
+
+DEFAULT_WEBHOOK_PATH = "/webhooks/twitter"
+
+
+def extract_tweet_ids(event: Dict[str, Any], bot_id: Optional[str] = None) -> List[str]:
+    """
+    Return the IDs of mention tweets in a webhook or stream payload
+
+    Understands Account Activity events ("tweet_create_events"), filtered
+    stream payloads ("data") and a plain {"tweet_ids": [...]} body.
+
+    Args:
+        event (Dict[str, Any]): Decoded JSON payload
+        bot_id (Optional[str]): The bot's user ID; its own tweets are skipped
+
+    Returns:
+        List[str]: Tweet IDs in delivery order
+    """
+    tweet_ids: List[str] = []
+    for tweet in event.get("tweet_create_events", []):
+        author_id = str((tweet.get("user") or {}).get("id_str", ""))
+        if bot_id is not None and author_id == str(bot_id):
+            continue
+        tweet_id = tweet.get("id_str") or tweet.get("id")
+        if tweet_id is not None:
+            tweet_ids.append(str(tweet_id))
+
+    data = event.get("data")
+    if isinstance(data, dict):
+        data = [data]
+    for tweet in data or []:
+        if bot_id is not None and str(tweet.get("author_id", "")) == str(bot_id):
+            continue
+        if tweet.get("id") is not None:
+            tweet_ids.append(str(tweet["id"]))
+
+    tweet_ids.extend(str(tweet_id) for tweet_id in event.get("tweet_ids", []))
+    return tweet_ids
+
+
+def crc_response_token(crc_token: str, consumer_secret: str) -> str:
+    """Answer Twitter's challenge-response check for a webhook URL."""
+    digest = hmac.new(
+        consumer_secret.encode(), crc_token.encode(), hashlib.sha256
+    ).digest()
+    return "sha256=" + base64.b64encode(digest).decode()
+
+
+class LocalMentionSource:
+    """
+    In-process stand-in for a mention stream, for local runs and tests.
+
+    Tweet IDs pushed here reach the handler exactly as a webhook or
+    filtered-stream delivery would.
+    """
+
+    def __init__(self, handler: MentionHandler) -> None:
+        self.handler = handler
+        self.running = False
+
+    def start(self) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def push(self, *tweet_ids: str) -> None:
+        """Deliver mention tweet IDs to the handler."""
+        if not self.running:
+            raise RuntimeError("Mention source is not running")
+        for tweet_id in tweet_ids:
+            self.handler(str(tweet_id))
+
+
+class WebhookReceiver:
+    """
+    Local HTTP endpoint for Account Activity webhooks.
+
+    Answers CRC challenges, checks the x-twitter-webhooks-signature header
+    when a consumer secret is configured, acknowledges each delivery at once
+    and then hands the mentioned tweet IDs to the handler.
+    """
+
+    def __init__(
+        self,
+        handler: MentionHandler,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        path: str = DEFAULT_WEBHOOK_PATH,
+        consumer_secret: Optional[str] = None,
+        bot_id: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the receiver
+
+        Args:
+            handler (MentionHandler): Called with each mention tweet ID
+            host (str): Interface to listen on
+            port (int): Port to listen on, or 0 for any free port
+            path (str): URL path Twitter posts events to
+            consumer_secret (Optional[str]): App secret used for CRC and
+                signature checks
+            bot_id (Optional[str]): The bot's user ID; its own tweets are skipped
+        """
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.path = path
+        self.consumer_secret = consumer_secret
+        self.bot_id = bot_id
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Host and port the server is bound to."""
+        if self._server is None:
+            return self.host, self.port
+        return self._server.server_address[:2]
+
+    def _valid_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.consumer_secret:
+            return True
+        if not signature:
+            return False
+        digest = hmac.new(self.consumer_secret.encode(), body, hashlib.sha256).digest()
+        expected = "sha256=" + base64.b64encode(digest).decode()
+        return hmac.compare_digest(expected, signature)
+
+    def _make_handler(self) -> type:
+        receiver = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send(self, status: int, body: Optional[Dict[str, Any]] = None) -> None:
+                payload = json.dumps(body or {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                crc_token = parse_qs(url.query).get("crc_token", [None])[0]
+                if url.path != receiver.path or not crc_token:
+                    self._send(404)
+                    return
+                if not receiver.consumer_secret:
+                    self._send(500, {"error": "No consumer secret configured"})
+                    return
+                self._send(200, {
+                    "response_token": crc_response_token(crc_token, receiver.consumer_secret)
+                })
+
+            def do_POST(self) -> None:
+                if urlparse(self.path).path != receiver.path:
+                    self._send(404)
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not receiver._valid_signature(
+                    body, self.headers.get("x-twitter-webhooks-signature")
+                ):
+                    self._send(401)
+                    return
+                try:
+                    event = json.loads(body or b"{}")
+                except ValueError:
+                    self._send(400)
+                    return
+
+                # Acknowledge before processing; Twitter expects a quick 200
+                self._send(200)
+                for tweet_id in extract_tweet_ids(event, receiver.bot_id):
+                    try:
+                        receiver.handler(tweet_id)
+                    except Exception as e:
+                        print(f"[ERROR] Failed to dispatch mention {tweet_id}: {e}")
+
+        return _RequestHandler
+
+    def start(self) -> None:
+        """Start serving on a background thread."""
+        if self.running:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mention-webhook", daemon=True
+        )
+        self._thread.start()
+        host, port = self.address
+        print(f"[INFO] Listening for mention webhooks on http://{host}:{port}{self.path}")
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._thread = None
+
+
+class FilteredStreamSource:
+    """
+    Mention source backed by the Twitter v2 filtered stream.
+
+    Keeps a single "@username" rule on the stream and forwards every
+    matching tweet to the handler. tweepy reconnects with backoff on
+    disconnects; `running` is False while the stream is down.
+    """
+
+    def __init__(
+        self,
+        bearer_token: str,
+        handler: MentionHandler,
+        bot_username: str,
+        bot_id: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the source
+
+        Args:
+            bearer_token (str): App bearer token with filtered-stream access
+            handler (MentionHandler): Called with each mention tweet ID
+            bot_username (str): Username whose mentions are streamed
+            bot_id (Optional[str]): The bot's user ID; its own tweets are skipped
+        """
+        self.bearer_token = bearer_token
+        self.handler = handler
+        self.rule = f"@{bot_username.lstrip('@')}"
+        self.bot_id = bot_id
+        self._stream: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and bool(getattr(self._stream, "running", False))
+
+    def _sync_rules(self) -> None:
+        import tweepy
+
+        rules = self._stream.get_rules().data or []
+        stale = [rule.id for rule in rules if rule.value != self.rule]
+        if stale:
+            self._stream.delete_rules(stale)
+        if not any(rule.value == self.rule for rule in rules):
+            self._stream.add_rules(tweepy.StreamRule(self.rule))
+
+    def start(self) -> None:
+        """Connect to the stream on a background thread."""
+        import tweepy
+
+        source = self
+
+        class _Stream(tweepy.StreamingClient):
+            def on_tweet(self, tweet: Any) -> None:
+                if source.bot_id is not None and str(tweet.author_id) == str(source.bot_id):
+                    return
+                try:
+                    source.handler(str(tweet.id))
+                except Exception as e:
+                    print(f"[ERROR] Failed to dispatch mention {tweet.id}: {e}")
+
+            def on_errors(self, errors: Any) -> None:
+                print(f"[WARN] Mention stream errors: {errors}")
+
+        self._stream = _Stream(self.bearer_token, wait_on_rate_limit=True)
+        self._sync_rules()
+        self._stream.filter(tweet_fields=["author_id", "conversation_id"], threaded=True)
+        print(f"[INFO] Streaming mentions matching {self.rule}")
+
+    def stop(self) -> None:
+        """Disconnect from the stream."""
+        if self._stream is not None:
+            self._stream.disconnect()
+            self._stream = None
@@ -0,0 +1,337 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Seconds; spans the range from a cache hit to a block confirmation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_SPAN_BUFFER = 2048
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound holding the q-th observation."""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, latency histograms and per-request spans.
+
+    Metrics render in the Prometheus text exposition format. Spans are kept
+    in a bounded buffer and, if configured, appended to a JSON-lines file.
+    """
+
+    def __init__(
+        self,
+        span_buffer: int = DEFAULT_SPAN_BUFFER,
+        span_log_path: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the registry
+
+        Args:
+            span_buffer (int): Finished spans kept in memory
+            span_log_path (Optional[str]): JSON-lines file finished spans are
+                appended to
+        """
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._callbacks: Dict[str, Callable[[], Dict[LabelSet, float]]] = {}
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=span_buffer)
+        self._local = threading.local()
+        self.span_log_path = span_log_path
+        # Separate from _lock so metric updates never wait on disk I/O
+        self._span_log_lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Set the TYPE and HELP lines of a metric."""
+        with self._lock:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        """Increase a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a value, usually a duration in seconds, in a histogram."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def set_buckets(self, name: str, buckets: Tuple[float, ...]) -> None:
+        """Use custom bucket bounds for a histogram not yet observed."""
+        with self._lock:
+            self._buckets[name] = tuple(sorted(buckets))
+
+    def register_gauge(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Any]
+    ) -> None:
+        """
+        Export a value read at render time
+
+        Args:
+            name (str): Metric name
+            help_text (str): HELP line
+            fn (Callable[[], Any]): Returns a number, or a dict mapping label
+                dicts (as tuples of pairs) to numbers
+        """
+        self._register_callback(name, "gauge", help_text, fn)
+
+    def register_counter(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Any]
+    ) -> None:
+        """
+        Export a running total kept elsewhere, read at render time
+
+        Args:
+            name (str): Metric name, ending in _total
+            help_text (str): HELP line
+            fn (Callable[[], Any]): Returns a number that never decreases, or
+                a dict mapping label dicts (as tuples of pairs) to such numbers
+        """
+        self._register_callback(name, "counter", help_text, fn)
+
+    def _register_callback(self, name: str, kind: str, help_text: str, fn: Callable[[], Any]) -> None:
+        def collect() -> Dict[LabelSet, float]:
+            value = fn()
+            if isinstance(value, dict):
+                return {_labels(dict(labels)): float(v) for labels, v in value.items()}
+            return {(): float(value)}
+
+        with self._lock:
+            self._help[name] = (kind, help_text)
+            self._callbacks[name] = collect
+
+    def quantile(self, name: str, q: float, **labels: Any) -> Optional[float]:
+        """Approximate quantile of a histogram series."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(_labels(labels))
+            return histogram.quantile(q) if histogram else None
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block as a span and record its duration in a histogram
+
+        Spans opened inside another span on the same thread become its
+        children. The duration is also observed in "<name>_seconds".
+
+        Args:
+            name (str): Span and histogram name
+            trace_id (Optional[str]): Groups spans of one request, e.g. the
+                mention tweet ID; inherited from the parent span by default
+            **attributes: Recorded on the span; the yielded dict can be
+                updated inside the block
+        """
+        stack: List[Dict[str, Any]] = getattr(self._local, "stack", None) or []
+        self._local.stack = stack
+        parent = stack[-1] if stack else None
+        span = {
+            "name": name,
+            "trace_id": str(trace_id or (parent["trace_id"] if parent else uuid.uuid4().hex)),
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "start": time.time(),
+            "attributes": dict(attributes),
+            "status": "ok",
+        }
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span["attributes"]
+        except BaseException as e:
+            span["status"] = "error"
+            span["error"] = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            span["duration"] = duration
+            self.observe(f"{name}_seconds", duration, status=span["status"])
+            self._finish(span)
+
+    def _finish(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self._spans.append(span)
+        if self.span_log_path:
+            line = json.dumps(span, default=str) + "\n"
+            with self._span_log_lock:
+                try:
+                    with open(self.span_log_path, "a") as f:
+                        f.write(line)
+                except OSError as e:
+                    print(f"[WARN] Could not write span log: {e}")
+
+    def recent_spans(self, trace_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent finished spans, optionally of one trace."""
+        with self._lock:
+            spans = [s for s in self._spans if trace_id is None or s["trace_id"] == str(trace_id)]
+        return spans[-limit:] if limit > 0 else []
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {labels: (h.buckets, list(h.counts), h.total, h.sum) for labels, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            callbacks = dict(self._callbacks)
+            help_lines = dict(self._help)
+
+        lines: List[str] = []
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help_text = help_lines.get(name, (default_kind, name.replace("_", " ")))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name in sorted(counters):
+            header(name, "counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name in sorted(histograms):
+            header(name, "histogram")
+            for labels, (buckets, counts, total, value_sum) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(buckets, counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {total}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value_sum:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {total}")
+
+        for name in sorted(callbacks):
+            try:
+                series = callbacks[name]()
+            except Exception as e:
+                print(f"[WARN] Could not collect {name}: {e}")
+                continue
+            header(name, "gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+_default_registry = MetricsRegistry(span_log_path=os.environ.get("TRACE_LOG_PATH"))
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _default_registry
+
+
+def start_metrics_server(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: Optional[MetricsRegistry] = None
+) -> ThreadingHTTPServer:
+    """
+    Serve /metrics (Prometheus text) and /spans (recent spans as JSON) on a
+    background thread
+
+    GET /metrics
+    GET /spans?trace_id=<id>&limit=100
+    """
+    registry = registry or get_metrics()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status = 200
+            if url.path == "/metrics":
+                body = registry.render_prometheus().encode()
+                content_type = "text/plain; version=0.0.4"
+            elif url.path == "/spans":
+                try:
+                    spans: Any = registry.recent_spans(
+                        trace_id=query.get("trace_id"),
+                        limit=int(query.get("limit", 100))
+                    )
+                except ValueError as e:
+                    status, spans = 400, {"error": str(e)}
+                body = json.dumps(spans, default=str).encode()
+                content_type = "application/json"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"[INFO] Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
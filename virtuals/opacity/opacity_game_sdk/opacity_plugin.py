@@ -1,17 +1,58 @@
 import os
-from typing import Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import get_metrics
+from .proof_precheck import ProofPrechecker
+from .resilience import Dependency, get_dependency
+
+# Default cap on concurrent requests to the prover
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+class InvalidProofError(Exception):
+    """Raised when the prover reports a proof as invalid"""
+
+
+class ProofRejectedLocallyError(Exception):
+    """
+    Raised when a proof fails the local prechecks.
+
+    Not a verdict: the prover never saw the proof, so callers should treat
+    it as a failed verification rather than an invalid proof.
+    """
+
 
 class OpacityPlugin:
     """
     Opacity Plugin for verifying AI inference proofs via Opacity
     """
-    
-    def __init__(self) -> None:
-        """Initialize the Opacity plugin"""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        prechecker: Optional[ProofPrechecker] = None,
+        dependency: Optional[Dependency] = None
+    ) -> None:
+        """
+        Initialize the Opacity plugin
+
+        Args:
+            session (Optional[requests.Session]): Session for prover requests
+            prechecker (Optional[ProofPrechecker]): Local checks that reject
+                unverifiable proofs without a prover round-trip
+            dependency (Optional[Dependency]): Circuit breaker and timeouts
+                for prover calls, defaults to the process-wide "prover" one
+        """
         self.id: str = "opacity_plugin"
         self.name: str = "Opacity Plugin"
         self.prover_url = os.environ.get("OPACITY_PROVER_URL")
+        # Reuse one keep-alive session instead of reconnecting per request
+        self.session = session or requests.Session()
+        self.prechecker = prechecker
+        self.dependency = dependency or get_dependency("prover")
 
     def initialize(self):
         """Initialize the plugin"""
@@ -21,24 +62,130 @@ class OpacityPlugin:
     def verify_proof(self, result: Dict[str, Any]) -> bool:
         """
         Verify a proof
-        
+
         Args:
             result (Dict[str, Any]): The result containing the proof to verify
-            
+
         Returns:
             bool: True if proof is valid, False otherwise
+
+        Raises:
+            InvalidProofError: If the prover rejects the proof
+            ProofRejectedLocallyError: If the proof fails local checks
+            CircuitOpenError: If the prover's circuit is open
+            DependencyTimeoutError: If the prover did not answer in time
         """
-        response = requests.post(
-            f"{self.prover_url}/api/verify",
-            headers={"Content-Type": "application/json"},
-            json=result["proof"]
-        )
-        
+        metrics = get_metrics()
+        if self.prechecker is not None:
+            reason = self.prechecker.check(result.get("proof"))
+            if reason is not None:
+                metrics.inc("proofs_rejected_locally_total", reason=reason)
+                raise ProofRejectedLocallyError(f"Proof rejected locally: {reason}")
+
+        with metrics.span("opacity_verify_proof"):
+            # Verifying is read-only, so a slow request may be hedged
+            response = self.dependency.call(
+                lambda timeout: self.session.post(
+                    f"{self.prover_url}/api/verify",
+                    headers={"Content-Type": "application/json"},
+                    json=result["proof"],
+                    timeout=timeout
+                ),
+                operation="verify",
+                failed=lambda r: r.status_code >= 500
+            )
+
         if response.status_code != 200:
             raise Exception(f"Failed to verify proof: {response.text}")
-            
+
         verification = response.json()
         if not verification.get("success"):
-            raise Exception("Proof is invalid")
-            
-        return verification["success"]
\ No newline at end of file
+            raise InvalidProofError("Proof is invalid")
+
+        return verification["success"]
+
+
+class AsyncOpacityPlugin(OpacityPlugin):
+    """
+    Opacity Plugin that verifies proofs concurrently over a shared
+    keep-alive connection pool
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        prechecker: Optional[ProofPrechecker] = None
+    ) -> None:
+        """
+        Initialize the plugin
+
+        Args:
+            max_in_flight (int): Maximum number of concurrent prover requests
+            prechecker (Optional[ProofPrechecker]): Local checks run before
+                each prover request
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        super().__init__(session=session, prechecker=prechecker)
+
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight,
+            thread_name_prefix="opacity-verify"
+        )
+
+    def submit_proof(self, result: Dict[str, Any]) -> Future:
+        """
+        Schedule a proof for verification without blocking
+
+        Args:
+            result (Dict[str, Any]): The result containing the proof to verify
+
+        Returns:
+            Future: Resolves to the outcome of verify_proof
+        """
+        return self._executor.submit(self.verify_proof, result)
+
+    def verify_proofs(
+        self,
+        batch: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[int, Optional[bool], Optional[Exception]]]:
+        """
+        Verify a batch of proofs, yielding results as they complete
+
+        Args:
+            batch (Iterable[Dict[str, Any]]): Results containing proofs to verify
+
+        Yields:
+            Tuple[int, Optional[bool], Optional[Exception]]: The index of the
+            result in the batch, the verdict (None if verification could not
+            complete) and the error that prevented a verdict, if any
+        """
+        futures = {
+            self.submit_proof(result): index
+            for index, result in enumerate(batch)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result(), None
+            except InvalidProofError:
+                yield index, False, None
+            except Exception as e:
+                yield index, None, e
+
+    def close(self) -> None:
+        """Wait for in-flight requests and release pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self) -> "AsyncOpacityPlugin":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,94 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+# Anything larger is not a proof the prover would accept
+DEFAULT_MAX_PROOF_BYTES = 1024 * 1024
+# Tolerated clock difference for timestamps in the future
+CLOCK_SKEW_SECONDS = 300
+
+TIMESTAMP_FIELDS = ("timestamp", "created_at", "createdAt")
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # Millisecond timestamps are common in JS-produced payloads
+        return value / 1000.0 if value > 1e12 else float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        # A timestamp without an offset is read as UTC, not the host's zone
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+class ProofPrechecker:
+    """
+    Local checks run before a proof is sent to the prover.
+
+    Only rejects proofs that are definitely unverifiable: empty or
+    non-object payloads, oversized payloads and proofs older than max_age.
+    Fields the proof does not carry or that cannot be read are not
+    checked, so anything uncertain still goes to the prover.
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        max_bytes: int = DEFAULT_MAX_PROOF_BYTES,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """
+        Initialize the prechecker
+
+        Args:
+            max_age (Optional[float]): Oldest accepted proof in seconds, or
+                None to skip the expiry check
+            max_bytes (int): Largest accepted serialized proof
+            clock (Callable[[], float]): Wall-clock time source
+        """
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self.rejected = 0
+
+    def _reason(self, proof: Any) -> Optional[str]:
+        if not isinstance(proof, dict) or not proof:
+            return "proof is empty or not an object"
+        if len(json.dumps(proof, separators=(",", ":"), default=str)) > self.max_bytes:
+            return "proof exceeds the maximum size"
+
+        if self.max_age is not None:
+            for field in TIMESTAMP_FIELDS:
+                if field not in proof:
+                    continue
+                issued_at = _parse_timestamp(proof[field])
+                if issued_at is None:
+                    break
+                now = self._clock()
+                if now - issued_at > self.max_age:
+                    return "proof has expired"
+                if issued_at - now > CLOCK_SKEW_SECONDS:
+                    return "proof is dated in the future"
+                break
+        return None
+
+    def check(self, proof: Any) -> Optional[str]:
+        """
+        Check a proof locally
+
+        Returns:
+            Optional[str]: Why the proof is rejected, or None if it should be
+            sent to the prover
+        """
+        reason = self._reason(proof)
+        if reason is not None:
+            self.rejected += 1
+        return reason
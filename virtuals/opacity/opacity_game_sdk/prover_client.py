@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import TTLCache
+from .metrics import get_metrics
+from .resilience import Dependency, DependencyTimeoutError, get_dependency
+
+# (connect, read) seconds; a hung prover must not stall the agent loop
+DEFAULT_TIMEOUT = (3.05, 15.0)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 0.5
+DEFAULT_MAX_IN_FLIGHT = 8
+# How long an unclaimed prefetch is kept before it is dropped
+PREFETCH_TTL_SECONDS = 300
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class ProverClient:
+    """
+    Client for the prover's proof-log endpoint.
+
+    Requests share one keep-alive pool and go through the prover's
+    Dependency guard, which adapts their timeout to recent latencies,
+    hedges slow ones and fails fast while the prover is down. They are
+    retried with exponential backoff on connection errors, timeouts and
+    429/5xx responses. Logs can be prefetched in the background as
+    soon as a proof ID is known; a later fetch_logs call picks up the
+    in-flight request instead of issuing a new one.
+    """
+
+    def __init__(
+        self,
+        prover_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF_SECONDS,
+        dependency: Optional[Dependency] = None
+    ) -> None:
+        """
+        Initialize the client
+
+        Args:
+            prover_url (Optional[str]): Prover base URL, defaults to
+                OPACITY_PROVER_URL
+            session (Optional[requests.Session]): Session to share, e.g. the
+                OpacityPlugin's
+            max_in_flight (int): Maximum concurrent log requests
+            timeout (Union[float, Tuple[float, float]]): requests timeout;
+                the read timeout caps the adaptive one
+            max_retries (int): Retries after the first attempt
+            backoff (float): Delay before the first retry, doubled each time
+            dependency (Optional[Dependency]): Guard shared by prover calls,
+                defaults to the process-wide "prover" one
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.prover_url = prover_url or os.environ.get("OPACITY_PROVER_URL")
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dependency = dependency or get_dependency("prover")
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight,
+            thread_name_prefix="opacity-logs"
+        )
+        self._pending = TTLCache(maxsize=1024, ttl=PREFETCH_TTL_SECONDS)
+        self._lock = threading.Lock()
+
+    def _get_logs(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        with get_metrics().span("prover_fetch_logs", proof_id=proof_id):
+            return self._get_logs_with_retries(proof_id)
+
+    def _get_logs_with_retries(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        url = f"{self.prover_url}/api/logs/{proof_id}"
+        connect, read = self.timeout if isinstance(self.timeout, tuple) else (self.timeout, self.timeout)
+
+        def get(timeout: float) -> requests.Response:
+            return self.session.get(url, timeout=(min(connect, timeout), min(read, timeout)))
+
+        attempt = 0
+        while True:
+            try:
+                response = self.dependency.call(
+                    get, operation="logs", failed=lambda r: r.status_code >= 500
+                )
+            except (requests.ConnectionError, requests.Timeout, DependencyTimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                print(f"[WARN] Proof log request for {proof_id} failed ({e}), retrying...")
+            else:
+                if response.ok:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES:
+                    # The prover does not know this proof
+                    return None
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                print(f"[WARN] Prover returned {response.status_code} for {proof_id}, retrying...")
+            delay = self.backoff * (2 ** attempt)
+            metrics = get_metrics()
+            metrics.inc("prover_retries_total")
+            metrics.inc("sleep_seconds_total", delay, source="prover_backoff")
+            time.sleep(delay)
+            attempt += 1
+
+    def prefetch(self, proof_ids: Iterable[str]) -> None:
+        """Start fetching the logs of proofs that are not already in flight."""
+        with self._lock:
+            for proof_id in proof_ids:
+                if proof_id not in self._pending:
+                    self._pending.put(proof_id, self._executor.submit(self._get_logs, proof_id))
+
+    def fetch_logs(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a proof's logs, reusing a prefetched request if there is one
+
+        Returns:
+            Optional[Dict[str, Any]]: The proof payload, or None if the prover
+            does not know the proof
+
+        Raises:
+            requests.RequestException: If the prover stays unreachable or
+                erroring after all retries
+            DependencyTimeoutError: If the last retry timed out
+            CircuitOpenError: If the prover's circuit is open
+        """
+        with self._lock:
+            future: Optional[Future] = self._pending.get(proof_id)
+        if future is None:
+            return self._get_logs(proof_id)
+        try:
+            return future.result()
+        finally:
+            # Mentions of the same proof waiting on it share the request;
+            # once it is done, later fetches issue their own
+            with self._lock:
+                if self._pending.get(proof_id) is future:
+                    self._pending.pop(proof_id)
+
+    def close(self) -> None:
+        """Wait for in-flight requests and release pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,249 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .metrics import get_metrics
+from .resilience import Dependency
+
+# Fallback wait when a 429 carries no x-rate-limit-reset header
+DEFAULT_RESET_SECONDS = 60
+# Extra wait past the advertised reset to absorb clock skew
+RESET_MARGIN_SECONDS = 1.0
+DEFAULT_MAX_RETRIES = 3
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if an exception was caused by a 429 response."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "429" in str(error)
+
+
+def rate_limit_reset_delay(error: Exception, now: Optional[float] = None) -> float:
+    """Return seconds until the window of a rate-limited request resets."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    reset = headers.get("x-rate-limit-reset")
+    if reset is not None:
+        try:
+            return max(0.0, float(reset) - (time.time() if now is None else now))
+        except ValueError:
+            pass
+    return DEFAULT_RESET_SECONDS
+
+
+class _Bucket:
+    """Quota state of a single endpoint for the current window."""
+
+    def __init__(self) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+
+class RateLimiter:
+    """
+    Per-endpoint token bucket refilled from Twitter rate-limit headers.
+
+    Calls go through immediately while the current window has quota left and
+    wait exactly until x-rate-limit-reset once it is spent, so the full quota
+    is used without fixed sleeps. Endpoints that have not reported headers
+    yet are not throttled. Processes sharing one account each set `share`
+    to their fraction of the quota, and only spend that fraction of what
+    the headers report.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        share: float = 1.0
+    ) -> None:
+        self.share = share
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self.rate_limited_count = 0
+        self.seconds_waited = 0.0
+
+    def _bucket(self, endpoint: str) -> _Bucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            bucket = self._buckets[endpoint] = _Bucket()
+        return bucket
+
+    def _reserve(self, endpoint: str) -> float:
+        """Take a token if one is available, else return seconds until reset."""
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            now = self._clock()
+            if bucket.remaining is None:
+                return 0.0
+            if now >= bucket.reset_at:
+                # New window; headers from the next response will correct this
+                bucket.remaining = bucket.limit
+                if bucket.remaining is None:
+                    return 0.0
+            if bucket.remaining > 0:
+                bucket.remaining -= 1
+                return 0.0
+            return bucket.reset_at - now + RESET_MARGIN_SECONDS
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Block until a call to endpoint fits in its quota
+
+        Args:
+            endpoint (str): Endpoint name
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            delay = self._reserve(endpoint)
+            if delay <= 0:
+                if waited:
+                    with self._lock:
+                        self.seconds_waited += waited
+                    get_metrics().inc(
+                        "sleep_seconds_total", waited, source="rate_limiter", endpoint=endpoint
+                    )
+                return waited
+            print(f"[WARN] Rate limit for {endpoint} exhausted, waiting {delay:.0f} seconds...")
+            self._sleep(delay)
+            waited += delay
+
+    def update(self, endpoint: str, headers: Mapping[str, str]) -> None:
+        """Record the quota reported by a response's rate-limit headers."""
+        try:
+            remaining = int(int(headers["x-rate-limit-remaining"]) * self.share)
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        limit = headers.get("x-rate-limit-limit")
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            if limit is not None and str(limit).isdigit():
+                bucket.limit = int(int(limit) * self.share)
+            if reset_at != bucket.reset_at or bucket.remaining is None:
+                bucket.remaining = remaining
+                bucket.reset_at = reset_at
+            else:
+                # Same window: other in-flight calls may already hold tokens
+                bucket.remaining = min(bucket.remaining, remaining)
+
+    def exhaust(self, endpoint: str, reset_delay: float) -> None:
+        """Mark an endpoint as out of quota after an unexpected 429."""
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.remaining = 0
+            bucket.reset_at = max(bucket.reset_at, self._clock() + reset_delay)
+            self.rate_limited_count += 1
+        get_metrics().inc("twitter_rate_limited_total", endpoint=endpoint)
+
+    def headroom(self, endpoint: str) -> Optional[float]:
+        """Return the fraction of the endpoint's quota left, if known."""
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None or bucket.remaining is None or not bucket.limit:
+                return None
+            if self._clock() >= bucket.reset_at:
+                return 1.0
+            return bucket.remaining / bucket.limit
+
+    def call(
+        self,
+        endpoint: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Call fn within the endpoint's quota, retrying after 429 responses
+
+        Raises:
+            Exception: The last rate-limit error once max_retries is exceeded,
+                or any other error raised by fn
+        """
+        attempt = 0
+        while True:
+            self.acquire(endpoint)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.exhaust(endpoint, rate_limit_reset_delay(e, self._clock()))
+                if attempt >= max_retries:
+                    raise
+                attempt += 1
+
+
+_default_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    return _default_limiter
+
+
+class RateLimitedClient:
+    """
+    Proxy for a tweepy client that routes every method call through a
+    RateLimiter, keyed by method name.
+
+    Rate-limit headers are captured with a response hook on the client's
+    requests session and attributed to the method running on the calling
+    thread. With a guard, each call also goes through its circuit breaker
+    and timeout once it fits the quota; `get_*` methods are reads, every
+    other method is a write and is never hedged.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        limiter: Optional[RateLimiter] = None,
+        guard: Optional[Dependency] = None
+    ) -> None:
+        self._client = client
+        self._limiter = limiter or get_rate_limiter()
+        self._guard = guard
+        self._local = threading.local()
+        session = getattr(client, "session", None)
+        if session is not None:
+            session.hooks["response"].append(self._record_headers)
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter
+
+    def _record_headers(self, response: Any, *args: Any, **kwargs: Any) -> None:
+        endpoint = getattr(self._local, "endpoint", None)
+        if endpoint is not None:
+            self._limiter.update(endpoint, response.headers)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            def attempt(timeout: Optional[float] = None) -> Any:
+                # Guarded calls run on the guard's pool, so set it there
+                self._local.endpoint = name
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self._local.endpoint = None
+
+            def invoke() -> Any:
+                if self._guard is None:
+                    return attempt()
+                kind = "read" if name.startswith("get_") else "write"
+                return self._guard.call(attempt, operation=name, kind=kind)
+            return self._limiter.call(name, invoke)
+
+        return call
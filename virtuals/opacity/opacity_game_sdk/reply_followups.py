@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import get_metrics
+
+# A line of a follow-up: its label and the settlement it links to
+FollowUpLink = Tuple[str, Future]
+
+DEFAULT_TX_URL = "https://basescan.org/tx/{}"
+
+
+class FollowUpReplier:
+    """
+    Posts settlement links as a follow-up to a verdict that was already
+    replied, once the settlements resolve.
+
+    A follow-up waits for every settlement of its tweet, so each tweet gets
+    one follow-up however many transactions back it, and links scheduled
+    for a tweet that already has a follow-up pending are merged into it.
+    Follow-ups that become ready within coalesce_window of each other are
+    posted in one sweep. At most max_pending follow-ups are held; new ones
+    are dropped beyond that, since their verdict is already public. A
+    follow-up still missing links after max_wait is posted with the links
+    it has. A settlement that resolves to None is listed as failed; one
+    that resolves without a transaction hash (e.g. a netted trade) is
+    listed with its `outcome` instead.
+
+    Pending follow-ups are only held in memory, so a restart drops them
+    unless their mention is verified again; the transaction hashes
+    themselves are already recorded in the verification store.
+    """
+
+    def __init__(
+        self,
+        post: Callable[[str, str], None],
+        max_pending: int = 100,
+        coalesce_window: float = 2.0,
+        max_wait: float = 600.0,
+        tx_url: str = DEFAULT_TX_URL
+    ) -> None:
+        """
+        Start the follow-up poster
+
+        Args:
+            post (Callable[[str, str], None]): Replies to a tweet ID with text
+            max_pending (int): Follow-ups held at once
+            coalesce_window (float): Seconds to gather follow-ups that settle together
+            max_wait (float): Seconds a follow-up waits for its settlements
+            tx_url (str): Format string turning a transaction hash into a link
+        """
+        self.post = post
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.max_wait = max_wait
+        self.tx_url = tx_url
+        self._pending: Dict[str, Dict] = {}
+        # Follow-ups taken off _pending by a sweep but not yet posted
+        self._posting = 0
+        self._cond = threading.Condition()
+        get_metrics().register_gauge(
+            "follow_ups_pending",
+            "Follow-up replies waiting for their settlements",
+            lambda: len(self._pending)
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="reply-follow-ups", daemon=True
+        )
+        self._thread.start()
+
+    def schedule(self, tweet_id: str, header: str, links: List[FollowUpLink]) -> bool:
+        """
+        Post a follow-up to tweet_id once the linked settlements resolve
+
+        Returns:
+            bool: False if there was nothing to link or the follow-up was dropped
+        """
+        links = [(label, handle) for label, handle in links if handle is not None]
+        if not links:
+            return False
+        with self._cond:
+            entry = self._pending.get(tweet_id)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    print(f"[WARN] {len(self._pending)} follow-ups pending, dropping the one for {tweet_id}")
+                    get_metrics().inc("follow_ups_total", outcome="dropped")
+                    return False
+                entry = self._pending[tweet_id] = {
+                    "header": header,
+                    "links": [],
+                    "scheduled_at": time.monotonic(),
+                }
+            entry["links"].extend(links)
+        for _, handle in links:
+            handle.add_done_callback(self._wake)
+        return True
+
+    def pending(self) -> int:
+        """Return the number of follow-ups not yet posted."""
+        with self._cond:
+            return len(self._pending) + self._posting
+
+    def _wake(self, _: Future) -> None:
+        with self._cond:
+            self._cond.notify()
+
+    def _is_due(self, entry: Dict, now: float) -> bool:
+        return (
+            all(handle.done() for _, handle in entry["links"])
+            or now - entry["scheduled_at"] >= self.max_wait
+        )
+
+    def _render(self, entry: Dict) -> Optional[str]:
+        lines = []
+        for label, handle in entry["links"]:
+            if not handle.done():
+                continue
+            result = handle.result()
+            tx_hash = getattr(result, "transaction_hash", None)
+            if tx_hash:
+                lines.append(f"└─ {label}: {self.tx_url.format(tx_hash)}")
+            elif result is None:
+                lines.append(f"└─ [ERROR] {label} failed")
+            else:
+                # Settled without a transaction of its own, e.g. netted out
+                lines.append(f"└─ {label}: {getattr(result, 'outcome', 'no transaction sent')}")
+        if not lines:
+            return None
+        return "\n".join([entry["header"]] + lines)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if any(self._is_due(entry, now) for entry in self._pending.values()):
+                        break
+                    deadlines = [
+                        entry["scheduled_at"] + self.max_wait for entry in self._pending.values()
+                    ]
+                    self._cond.wait(min(deadlines) - now if deadlines else None)
+
+            # Let settlements mined in the same block join this sweep
+            time.sleep(self.coalesce_window)
+            with self._cond:
+                now = time.monotonic()
+                due = [
+                    tweet_id for tweet_id, entry in self._pending.items()
+                    if self._is_due(entry, now)
+                ]
+                entries = [(tweet_id, self._pending.pop(tweet_id)) for tweet_id in due]
+                self._posting = len(entries)
+
+            for tweet_id, entry in entries:
+                self._post(tweet_id, entry)
+                with self._cond:
+                    self._posting -= 1
+
+    def _post(self, tweet_id: str, entry: Dict) -> None:
+        text = self._render(entry)
+        if text is None:
+            get_metrics().inc("follow_ups_total", outcome="unsettled")
+            return
+        try:
+            self.post(tweet_id, text)
+        except Exception as e:
+            print(f"[ERROR] Failed to post follow-up to {tweet_id}: {e}")
+            get_metrics().inc("follow_ups_total", outcome="error")
+            return
+        get_metrics().inc("follow_ups_total", outcome="posted")
+        get_metrics().observe(
+            "follow_up_delay_seconds", time.monotonic() - entry["scheduled_at"]
+        )
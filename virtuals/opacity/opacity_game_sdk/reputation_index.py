@@ -0,0 +1,516 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .verification_store import DEFAULT_DB_PATH, VerificationStore
+
+# Ethos trade methods as (side, votes moved)
+TRADE_METHODS = {
+    "longeetTrust": ("trust", 1),
+    "dumpeetTrust": ("trust", -1),
+    "longeetDistrust": ("distrust", 1),
+    "dumpeetDistrust": ("distrust", -1),
+}
+# Trade outcomes that moved the agent's position; a netted intent moved it
+# as much as the intent it cancelled out moved the other way
+COUNTED_TRADE_STATUSES = ("submitted", "netted")
+ORDERINGS = {
+    "net_trust": "trust_votes - distrust_votes",
+    "valid_ratio": "CAST(valid AS REAL) / MAX(verifications, 1)",
+    "verifications": "verifications",
+    "last_seen": "last_seen",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reputation_verifications (
+    tweet_id   TEXT PRIMARY KEY,
+    agent_id   TEXT NOT NULL,
+    proof_id   TEXT,
+    mention_id TEXT,
+    valid      INTEGER NOT NULL,
+    at         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rep_verifications_agent ON reputation_verifications (agent_id, at);
+
+CREATE TABLE IF NOT EXISTS reputation_trades (
+    event_key       TEXT PRIMARY KEY,
+    verification_id TEXT,
+    agent_id        TEXT,
+    market_id       INTEGER,
+    method          TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    tx_hash         TEXT,
+    at              REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rep_trades_verification ON reputation_trades (verification_id);
+CREATE INDEX IF NOT EXISTS idx_rep_trades_agent ON reputation_trades (agent_id, at);
+
+CREATE TABLE IF NOT EXISTS reputation_transfers (
+    event_key       TEXT PRIMARY KEY,
+    verification_id TEXT,
+    agent_id        TEXT,
+    asset           TEXT,
+    amount          TEXT,
+    to_address      TEXT,
+    status          TEXT NOT NULL,
+    tx_hash         TEXT,
+    at              REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rep_transfers_verification ON reputation_transfers (verification_id);
+CREATE INDEX IF NOT EXISTS idx_rep_transfers_agent ON reputation_transfers (agent_id, at);
+
+CREATE TABLE IF NOT EXISTS agent_reputation (
+    agent_id       TEXT PRIMARY KEY,
+    verifications  INTEGER NOT NULL DEFAULT 0,
+    valid          INTEGER NOT NULL DEFAULT 0,
+    trust_votes    INTEGER NOT NULL DEFAULT 0,
+    distrust_votes INTEGER NOT NULL DEFAULT 0,
+    rewards        INTEGER NOT NULL DEFAULT 0,
+    first_seen     REAL,
+    last_seen      REAL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_BACKFILL_KEY = "reputation_backfilled"
+
+
+def _trade_deltas(method: str, status: str) -> Dict[str, int]:
+    side, votes = TRADE_METHODS.get(method, (None, 0))
+    if side is None or status not in COUNTED_TRADE_STATUSES:
+        return {}
+    return {f"{side}_votes": votes}
+
+
+def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+    agent = dict(row)
+    agent["valid_ratio"] = agent["valid"] / agent["verifications"] if agent["verifications"] else None
+    agent["net_trust"] = agent["trust_votes"] - agent["distrust_votes"]
+    return agent
+
+
+class ReputationIndex:
+    """
+    Per-agent reputation built from verifications and the trades and
+    transfers settled for them.
+
+    Every event is stored once, keyed so replays are ignored. The agent's
+    aggregates are updated in the same transaction, so reads never rescan
+    history. Trades and transfers name the verification (the original
+    tweet) they settle. One that arrives before its verification is kept
+    and attributed once the verification is recorded.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, timeout: float = 30.0) -> None:
+        """
+        Open or create the index
+
+        Args:
+            path (str): SQLite database file, usually the verification database
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _apply(self, agent_id: str, at: float, **deltas: int) -> None:
+        """Add deltas to an agent's aggregates; runs inside a transaction."""
+        columns = ("verifications", "valid", "trust_votes", "distrust_votes", "rewards")
+        values = [int(deltas.get(column, 0)) for column in columns]
+        self._conn.execute(
+            f"""
+            INSERT INTO agent_reputation (agent_id, {", ".join(columns)}, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (agent_id) DO UPDATE SET
+                {", ".join(f"{column} = {column} + excluded.{column}" for column in columns)},
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_seen = MAX(last_seen, excluded.last_seen)
+            """,
+            (agent_id, *values, at, at)
+        )
+
+    def _agent_for(self, verification_id: Optional[str]) -> Optional[str]:
+        if verification_id is None:
+            return None
+        row = self._conn.execute(
+            "SELECT agent_id FROM reputation_verifications WHERE tweet_id = ?",
+            (str(verification_id),)
+        ).fetchone()
+        return row["agent_id"] if row else None
+
+    def record_verification(
+        self,
+        tweet_id: str,
+        agent_id: str,
+        valid: bool,
+        proof_id: Optional[str] = None,
+        mention_id: Optional[str] = None,
+        at: Optional[float] = None
+    ) -> bool:
+        """
+        Record the verdict on an agent's tweet
+
+        As in the verification store, a valid verdict replaces an earlier
+        invalid one, e.g. after a transient prover 404, but is never
+        overwritten.
+
+        Args:
+            tweet_id (str): The verified (original) tweet
+            agent_id (str): Its author
+            valid (bool): Whether the proof was valid
+            proof_id (Optional[str]): The proof checked
+            mention_id (Optional[str]): The mention that requested it
+            at (Optional[float]): Event time, defaults to now
+
+        Returns:
+            bool: True if the verification was not recorded before, or was
+            recorded as invalid and is now valid
+        """
+        at = time.time() if at is None else at
+        tweet_id, agent_id = str(tweet_id), str(agent_id)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute(
+                "INSERT OR IGNORE INTO reputation_verifications "
+                "(tweet_id, agent_id, proof_id, mention_id, valid, at) VALUES (?, ?, ?, ?, ?, ?)",
+                (tweet_id, agent_id, proof_id, mention_id, int(bool(valid)), at)
+            ).rowcount == 0:
+                if not valid:
+                    return False
+                row = self._conn.execute(
+                    "SELECT agent_id FROM reputation_verifications WHERE tweet_id = ? AND valid = 0",
+                    (tweet_id,)
+                ).fetchone()
+                if row is None:
+                    return False
+                # Still one verification of the tweet, now a valid one
+                self._conn.execute(
+                    "UPDATE reputation_verifications SET "
+                    "proof_id = COALESCE(?, proof_id), mention_id = COALESCE(?, mention_id), "
+                    "valid = 1, at = ? WHERE tweet_id = ?",
+                    (proof_id, mention_id, at, tweet_id)
+                )
+                self._apply(row["agent_id"], at, valid=1)
+                return True
+            self._apply(agent_id, at, verifications=1, valid=int(bool(valid)))
+
+            # Attribute settlements that were recorded before their verification
+            for row in self._conn.execute(
+                "SELECT method, status, at FROM reputation_trades "
+                "WHERE verification_id = ? AND agent_id IS NULL",
+                (tweet_id,)
+            ).fetchall():
+                self._apply(agent_id, row["at"], **_trade_deltas(row["method"], row["status"]))
+            for row in self._conn.execute(
+                "SELECT at FROM reputation_transfers "
+                "WHERE verification_id = ? AND agent_id IS NULL AND status = 'confirmed'",
+                (tweet_id,)
+            ).fetchall():
+                self._apply(agent_id, row["at"], rewards=1)
+            for table in ("reputation_trades", "reputation_transfers"):
+                self._conn.execute(
+                    f"UPDATE {table} SET agent_id = ? WHERE verification_id = ? AND agent_id IS NULL",
+                    (agent_id, tweet_id)
+                )
+            return True
+
+    def record_trade(
+        self,
+        method: str,
+        status: str,
+        verification_id: Optional[str] = None,
+        market_id: Optional[int] = None,
+        tx_hash: Optional[str] = None,
+        at: Optional[float] = None
+    ) -> bool:
+        """
+        Record the outcome of a trade intent
+
+        Args:
+            method (str): Ethos trade method, e.g. "longeetTrust"
+            status (str): "submitted" (mined), "netted" or "failed"
+            verification_id (Optional[str]): The tweet the trade settles
+            market_id (Optional[int]): Ethos market
+            tx_hash (Optional[str]): Transaction the intent was folded into
+            at (Optional[float]): Event time, defaults to now
+
+        Returns:
+            bool: True if the trade was not recorded before
+        """
+        at = time.time() if at is None else at
+        # Each verification trades a method at most once
+        event_key = (
+            f"{verification_id}:{method}" if verification_id is not None
+            else f"{tx_hash or at}:{method}"
+        )
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            agent_id = self._agent_for(verification_id)
+            if self._conn.execute(
+                "INSERT OR IGNORE INTO reputation_trades "
+                "(event_key, verification_id, agent_id, market_id, method, status, tx_hash, at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (event_key, verification_id, agent_id, market_id, method, status, tx_hash, at)
+            ).rowcount == 0:
+                return False
+            if agent_id is not None:
+                self._apply(agent_id, at, **_trade_deltas(method, status))
+            return True
+
+    def record_transfer(
+        self,
+        to_address: str,
+        status: str,
+        verification_id: Optional[str] = None,
+        asset: str = "SERAPH",
+        amount: Any = 1,
+        tx_hash: Optional[str] = None,
+        at: Optional[float] = None
+    ) -> bool:
+        """
+        Record a reward transfer
+
+        Args:
+            to_address (str): Recipient wallet
+            status (str): "confirmed" or "failed"
+            verification_id (Optional[str]): The tweet the reward is for
+            asset (str): Token transferred
+            amount (Any): Amount in whole tokens
+            tx_hash (Optional[str]): Transfer transaction
+            at (Optional[float]): Event time, defaults to now
+
+        Returns:
+            bool: True if the transfer was not recorded before
+        """
+        at = time.time() if at is None else at
+        # Batched payouts to one address share a transfer, so key by both
+        event_key = (
+            f"{tx_hash}:{verification_id}" if tx_hash
+            else f"{verification_id}:{to_address}:{status}"
+        )
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            agent_id = self._agent_for(verification_id)
+            if self._conn.execute(
+                "INSERT OR IGNORE INTO reputation_transfers "
+                "(event_key, verification_id, agent_id, asset, amount, to_address, status, tx_hash, at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event_key, verification_id, agent_id, asset, str(amount), to_address, status, tx_hash, at)
+            ).rowcount == 0:
+                return False
+            if agent_id is not None and status == "confirmed":
+                self._apply(agent_id, at, rewards=1)
+            return True
+
+    def record_settlement_event(self, event: Dict[str, Any]) -> None:
+        """
+        Record a trade or transfer event published by ethos_trade_cdp
+
+        Meant to be registered with its add_event_observer.
+        """
+        kind = event.get("kind")
+        if kind == "trade":
+            self.record_trade(
+                event["method"],
+                event["status"],
+                verification_id=event.get("verification_id"),
+                market_id=event.get("market_id"),
+                tx_hash=event.get("tx_hash"),
+                at=event.get("timestamp")
+            )
+        elif kind == "transfer":
+            self.record_transfer(
+                event["to_address"],
+                event["status"],
+                verification_id=event.get("verification_id"),
+                asset=event.get("asset", "SERAPH"),
+                amount=event.get("amount", 1),
+                tx_hash=event.get("tx_hash"),
+                at=event.get("timestamp")
+            )
+
+    def backfill(self, store: VerificationStore) -> int:
+        """
+        One-off import of verifications recorded before the index existed
+
+        Returns:
+            int: Number of verifications imported
+        """
+        with self._lock:
+            if self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (_BACKFILL_KEY,)
+            ).fetchone():
+                return 0
+        imported = 0
+        for row in store.list_verifications():
+            if row["author_id"] is None:
+                # Legacy flat-file entries carry no author
+                continue
+            if self.record_verification(
+                row["tweet_id"], row["author_id"], bool(row["valid"]),
+                proof_id=row["proof_id"], at=row["verified_at"]
+            ):
+                imported += 1
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                (_BACKFILL_KEY, str(time.time()))
+            )
+        return imported
+
+    def rebuild(self) -> None:
+        """Recompute every agent's aggregates from the recorded events."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM agent_reputation")
+            for row in self._conn.execute(
+                "SELECT agent_id, valid, at FROM reputation_verifications"
+            ).fetchall():
+                self._apply(row["agent_id"], row["at"], verifications=1, valid=row["valid"])
+            for row in self._conn.execute(
+                "SELECT agent_id, method, status, at FROM reputation_trades WHERE agent_id IS NOT NULL"
+            ).fetchall():
+                self._apply(row["agent_id"], row["at"], **_trade_deltas(row["method"], row["status"]))
+            for row in self._conn.execute(
+                "SELECT agent_id, at FROM reputation_transfers "
+                "WHERE agent_id IS NOT NULL AND status = 'confirmed'"
+            ).fetchall():
+                self._apply(row["agent_id"], row["at"], rewards=1)
+
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return an agent's aggregates
+
+        Returns:
+            Optional[Dict[str, Any]]: Verification, valid, trust and distrust
+            vote and reward counts, valid_ratio, net_trust (trust minus
+            distrust votes), first_seen and last_seen; None for an unknown agent
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM agent_reputation WHERE agent_id = ?", (str(agent_id),)
+            ).fetchone()
+        return _summary(row) if row else None
+
+    def top_agents(
+        self,
+        order_by: str = "net_trust",
+        limit: int = 20,
+        min_verifications: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Return agents ranked by an aggregate
+
+        Args:
+            order_by (str): "net_trust", "valid_ratio", "verifications" or
+                "last_seen"
+            limit (int): Maximum agents returned
+            min_verifications (int): Skip agents verified fewer times
+        """
+        if order_by not in ORDERINGS:
+            raise ValueError(f"Unknown ordering: {order_by}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM agent_reputation WHERE verifications >= ? "
+                f"ORDER BY {ORDERINGS[order_by]} DESC, last_seen DESC LIMIT ?",
+                (min_verifications, limit)
+            ).fetchall()
+        return [_summary(row) for row in rows]
+
+    def agent_events(self, agent_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return an agent's most recent verifications, trades and transfers."""
+        agent_id = str(agent_id)
+        with self._lock:
+            events = [
+                dict(row, kind="verification") for row in self._conn.execute(
+                    "SELECT * FROM reputation_verifications WHERE agent_id = ? ORDER BY at DESC LIMIT ?",
+                    (agent_id, limit)
+                )
+            ] + [
+                dict(row, kind="trade") for row in self._conn.execute(
+                    "SELECT * FROM reputation_trades WHERE agent_id = ? ORDER BY at DESC LIMIT ?",
+                    (agent_id, limit)
+                )
+            ] + [
+                dict(row, kind="transfer") for row in self._conn.execute(
+                    "SELECT * FROM reputation_transfers WHERE agent_id = ? ORDER BY at DESC LIMIT ?",
+                    (agent_id, limit)
+                )
+            ]
+        events.sort(key=lambda event: event["at"], reverse=True)
+        return events[:limit]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def start_reputation_server(
+    index: ReputationIndex,
+    port: int,
+    host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Serve the index as JSON on a background thread
+
+    GET /agents?order_by=net_trust&limit=20&min_verifications=0
+    GET /agents/<agent_id>
+    GET /agents/<agent_id>/events?limit=50
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, body: Any) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+            try:
+                if parts == ["agents"]:
+                    self._send(200, index.top_agents(
+                        order_by=query.get("order_by", "net_trust"),
+                        limit=int(query.get("limit", 20)),
+                        min_verifications=int(query.get("min_verifications", 0))
+                    ))
+                elif len(parts) == 2 and parts[0] == "agents":
+                    agent = index.get_agent(parts[1])
+                    self._send(200 if agent else 404, agent or {"error": "unknown agent"})
+                elif len(parts) == 3 and parts[0] == "agents" and parts[2] == "events":
+                    self._send(200, index.agent_events(parts[1], limit=int(query.get("limit", 50))))
+                else:
+                    self._send(404, {"error": "not found"})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="reputation-server", daemon=True).start()
+    print(f"[INFO] Serving agent reputation on http://{host}:{server.server_address[1]}/agents")
+    return server
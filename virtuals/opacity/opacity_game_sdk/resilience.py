@@ -0,0 +1,302 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .metrics import get_metrics
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_MIN_TIMEOUT_SECONDS = 1.0
+DEFAULT_MAX_TIMEOUT_SECONDS = 30.0
+DEFAULT_MAX_WORKERS = 32
+# A read is given this multiple of its observed p99 latency
+TIMEOUT_MULTIPLIER = 3.0
+# Latencies kept per operation, and needed before timeouts adapt
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+# A read still running at this quantile of its latency is hedged
+HEDGE_QUANTILE = 0.95
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class DependencyTimeoutError(TimeoutError):
+    """Raised when a dependency call does not finish within its timeout"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failures in a row the circuit opens and calls
+    are rejected for reset_timeout seconds. One call is then let through as
+    a probe: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may go through now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure. Returns True if it opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == OPEN:
+                return False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class LatencyWindow:
+    """Latencies of an operation's most recent calls."""
+
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile, or None until MIN_SAMPLES calls were seen."""
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Dependency:
+    """
+    Circuit breaker, adaptive timeouts and hedged reads for the calls to
+    one external dependency.
+
+    Calls run on the dependency's pool and are abandoned at their deadline,
+    so a hung dependency costs a pool thread rather than the caller. Reads
+    get TIMEOUT_MULTIPLIER times the p99 latency recently observed for
+    their operation, within [min_timeout, max_timeout], and a read still
+    running at its p95 latency is hedged with an identical second request;
+    the first answer wins. Writes get max_timeout and are never hedged, since
+    a second request would send them twice; a write abandoned at its
+    deadline may still land, so its DependencyTimeoutError means "outcome
+    unknown" rather than "not sent". Failures and timeouts count toward the
+    breaker; while it is open, calls fail at once with CircuitOpenError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        default_timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        min_timeout: float = DEFAULT_MIN_TIMEOUT_SECONDS,
+        max_timeout: float = DEFAULT_MAX_TIMEOUT_SECONDS,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_SECONDS,
+        is_failure: Callable[[Exception], bool] = lambda error: True,
+        hedge: bool = True,
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> None:
+        """
+        Initialize the guard and register it under name
+
+        Args:
+            name (str): Dependency name used in logs and metrics
+            default_timeout (float): Timeout used until latencies are known
+            min_timeout (float): Lower bound of adaptive timeouts
+            max_timeout (float): Upper bound of adaptive timeouts, and the
+                timeout of writes
+            failure_threshold (int): Failures in a row that open the circuit
+            reset_timeout (float): Seconds the circuit stays open
+            is_failure (Callable[[Exception], bool]): False for errors that do
+                not indicate an unhealthy dependency, e.g. rate limiting
+            hedge (bool): Whether slow reads are hedged; off for dependencies
+                whose requests count against a quota
+            max_workers (int): Calls in flight, including abandoned ones
+        """
+        self.name = name
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.is_failure = is_failure
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-calls"
+        )
+        with _registry_lock:
+            _dependencies[name] = self
+
+    def _window(self, operation: str) -> LatencyWindow:
+        with self._lock:
+            window = self._windows.get(operation)
+            if window is None:
+                window = self._windows[operation] = LatencyWindow()
+            return window
+
+    def timeout(self, operation: str, kind: str = "read") -> float:
+        """Return the timeout the next call of an operation gets."""
+        if kind == "write":
+            return self.max_timeout
+        p99 = self._window(operation).quantile(0.99)
+        if p99 is None:
+            return min(self.default_timeout, self.max_timeout)
+        return min(self.max_timeout, max(self.min_timeout, p99 * TIMEOUT_MULTIPLIER))
+
+    def call(
+        self,
+        fn: Callable[[float], Any],
+        operation: str = "call",
+        kind: str = "read",
+        failed: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Call fn(timeout) through the breaker, within its timeout
+
+        Args:
+            fn (Callable[[float], Any]): Makes the call; receives the timeout
+                in seconds to hand to clients that accept one
+            operation (str): Latencies are tracked per operation
+            kind (str): "read" (idempotent, may be hedged) or "write"
+            failed (Optional[Callable[[Any], bool]]): Flags a returned value
+                as a failure, e.g. a 5xx response; it is still returned
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            DependencyTimeoutError: If the call did not finish in time; a
+                write may still complete after it is raised
+            Exception: Whatever fn raised
+        """
+        metrics = get_metrics()
+        if not self.breaker.allow():
+            metrics.inc("circuit_rejections_total", dependency=self.name)
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+        timeout = self.timeout(operation, kind)
+        started = time.monotonic()
+        try:
+            result = self._run(fn, operation, timeout, hedge=self.hedge and kind != "write")
+        except DependencyTimeoutError:
+            # Count the timeout as a latency so the next timeout widens
+            self._window(operation).observe(timeout)
+            metrics.inc("dependency_timeouts_total", dependency=self.name, operation=operation)
+            self._record_failure()
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self._record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+
+        if failed is not None and failed(result):
+            self._record_failure()
+            return result
+        self._window(operation).observe(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+    def _record_failure(self) -> None:
+        if self.breaker.record_failure():
+            print(f"[WARN] {self.name} is failing, rejecting calls for {self.breaker.reset_timeout:.0f}s")
+            get_metrics().inc("circuit_opened_total", dependency=self.name)
+
+    def _run(self, fn: Callable[[float], Any], operation: str, timeout: float, hedge: bool) -> Any:
+        deadline = time.monotonic() + timeout
+        attempts = [self._executor.submit(fn, timeout)]
+        hedge_after = self._window(operation).quantile(HEDGE_QUANTILE) if hedge else None
+        if hedge_after is not None and hedge_after < timeout:
+            done, _ = wait(attempts, timeout=hedge_after)
+            if not done:
+                get_metrics().inc("hedged_requests_total", dependency=self.name, operation=operation)
+                attempts.append(self._executor.submit(fn, max(deadline - time.monotonic(), 0.001)))
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0.0),
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                for attempt in pending:
+                    attempt.cancel()
+                raise DependencyTimeoutError(
+                    f"{self.name} {operation} did not finish within {timeout:.1f}s"
+                )
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+
+
+_dependencies: Dict[str, Dependency] = {}
+# Reentrant, since a Dependency created by get_dependency registers itself
+_registry_lock = threading.RLock()
+
+
+def get_dependency(name: str) -> Dependency:
+    """Return the guard registered under name, creating one with defaults."""
+    with _registry_lock:
+        dependency = _dependencies.get(name)
+        return dependency if dependency is not None else Dependency(name)
+
+
+get_metrics().register_gauge(
+    "circuit_state",
+    "Circuit state per dependency: 0 closed, 1 half-open, 2 open",
+    lambda: {
+        (("dependency", name),): _STATE_VALUES[dependency.breaker.state]
+        for name, dependency in list(_dependencies.items())
+    }
+)
@@ -0,0 +1,70 @@
+from typing import Any, Optional
+
+from .cache import TTLCache
+
+DEFAULT_MAX_ENTRIES = 4096
+# Tweets rarely change once posted; usernames can be renamed
+DEFAULT_TWEET_TTL_SECONDS = 24 * 3600
+DEFAULT_USERNAME_TTL_SECONDS = 3600
+
+
+class TweetCache:
+    """
+    Bounded cache of tweets, conversation roots and author usernames shared
+    across verifications
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAX_ENTRIES,
+        tweet_ttl: float = DEFAULT_TWEET_TTL_SECONDS,
+        username_ttl: float = DEFAULT_USERNAME_TTL_SECONDS
+    ) -> None:
+        """
+        Initialize the cache
+
+        Args:
+            maxsize (int): Maximum entries kept per kind of object
+            tweet_ttl (float): Lifetime of cached tweets and roots in seconds
+            username_ttl (float): Lifetime of cached usernames in seconds
+        """
+        self.tweets = TTLCache(maxsize=maxsize, ttl=tweet_ttl)
+        self.roots = TTLCache(maxsize=maxsize, ttl=tweet_ttl)
+        self.usernames = TTLCache(maxsize=maxsize, ttl=username_ttl)
+
+    def get_tweet(self, tweet_id: str) -> Optional[Any]:
+        """Return a cached tweet by ID."""
+        return self.tweets.get(str(tweet_id))
+
+    def put_tweet(self, tweet: Any) -> None:
+        """Cache a tweet object from the Twitter API."""
+        self.tweets.put(str(tweet.id), tweet)
+        if str(getattr(tweet, "conversation_id", None)) == str(tweet.id):
+            self.roots.put(str(tweet.id), tweet)
+
+    def put_response(self, response: Any) -> None:
+        """Cache the tweet of a get_tweet response and any expanded tweets."""
+        if response is None:
+            return
+        if getattr(response, "data", None) is not None:
+            self.put_tweet(response.data)
+        includes = getattr(response, "includes", None) or {}
+        for tweet in includes.get("tweets", []):
+            self.put_tweet(tweet)
+
+    def get_root(self, conversation_id: str) -> Optional[Any]:
+        """Return the cached root tweet of a conversation."""
+        return self.roots.get(str(conversation_id))
+
+    def put_root(self, conversation_id: str, tweet: Any) -> None:
+        """Cache the root tweet of a conversation."""
+        self.roots.put(str(conversation_id), tweet)
+        self.tweets.put(str(tweet.id), tweet)
+
+    def get_username(self, author_id: str) -> Optional[str]:
+        """Return the cached username of an author."""
+        return self.usernames.get(str(author_id))
+
+    def put_username(self, author_id: str, username: str) -> None:
+        """Cache the username of an author."""
+        self.usernames.put(str(author_id), username)
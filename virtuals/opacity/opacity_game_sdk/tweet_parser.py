@@ -0,0 +1,156 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+_MASK_64 = (1 << 64) - 1
+_KECCAK_RATE_BYTES = 136
+_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+# Rotation offset of lane (x, y), indexed [x][y]
+_ROTATIONS = (
+    (0, 36, 3, 41, 18),
+    (1, 44, 10, 45, 2),
+    (62, 6, 43, 15, 61),
+    (28, 55, 25, 21, 56),
+    (27, 20, 39, 8, 14),
+)
+
+
+def _rotl(value: int, shift: int) -> int:
+    return ((value << shift) | (value >> (64 - shift))) & _MASK_64
+
+
+def _keccak_f(state: List[int]) -> List[int]:
+    for round_constant in _ROUND_CONSTANTS:
+        c = [state[x] ^ state[x + 5] ^ state[x + 10] ^ state[x + 15] ^ state[x + 20]
+             for x in range(5)]
+        d = [c[(x - 1) % 5] ^ _rotl(c[(x + 1) % 5], 1) for x in range(5)]
+        state = [lane ^ d[i % 5] for i, lane in enumerate(state)]
+        b = [0] * 25
+        for x in range(5):
+            for y in range(5):
+                b[y + 5 * ((2 * x + 3 * y) % 5)] = _rotl(state[x + 5 * y], _ROTATIONS[x][y])
+        state = [
+            b[i] ^ (~b[(i + 1) % 5 + i - i % 5] & b[(i + 2) % 5 + i - i % 5])
+            for i in range(25)
+        ]
+        state[0] ^= round_constant
+    return state
+
+
+def keccak256(data: bytes) -> bytes:
+    """
+    Ethereum's Keccak-256 (the original Keccak padding, which differs from
+    hashlib.sha3_256)
+    """
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % _KECCAK_RATE_BYTES))
+    padded[-1] |= 0x80
+
+    state = [0] * 25
+    for offset in range(0, len(padded), _KECCAK_RATE_BYTES):
+        block = padded[offset:offset + _KECCAK_RATE_BYTES]
+        for i in range(_KECCAK_RATE_BYTES // 8):
+            state[i] ^= int.from_bytes(block[8 * i:8 * i + 8], "little")
+        state = _keccak_f(state)
+    return b"".join(lane.to_bytes(8, "little") for lane in state[:4])
+
+
+@lru_cache(maxsize=4096)
+def to_checksum_address(address: str) -> str:
+    """Return the EIP-55 mixed-case form of a 0x-prefixed hex address."""
+    hex_address = address[2:].lower()
+    digest = keccak256(hex_address.encode("ascii")).hex()
+    return "0x" + "".join(
+        char.upper() if int(digest[i], 16) >= 8 else char
+        for i, char in enumerate(hex_address)
+    )
+
+
+def is_checksum_valid(address: str) -> bool:
+    """
+    Return True if an address passes EIP-55 validation
+
+    All-lowercase and all-uppercase addresses carry no checksum and are
+    accepted; mixed-case addresses must match their checksum exactly.
+    """
+    hex_address = address[2:]
+    if hex_address == hex_address.lower() or hex_address == hex_address.upper():
+        return True
+    return to_checksum_address(address) == address
+
+
+class ParsedTweet(NamedTuple):
+    """Fields extracted from a tweet's text."""
+
+    proof_id: Optional[str]
+    wallet_address: Optional[str]
+    mentions: Tuple[str, ...]
+
+
+class TweetParser:
+    """
+    Single-pass extraction of proof IDs, wallet addresses and mentions.
+
+    One precompiled pattern walks the text once. The proof ID must be the
+    last token ("Proof ID: <id>"). A wallet address labelled "address:" or
+    "wallet address:" wins over a bare one, and addresses failing EIP-55
+    validation are dropped. Addresses are returned in checksummed form.
+    """
+
+    # The leading lookahead lets the scanner skip positions that cannot
+    # start any token without trying each alternative
+    _TOKENS = re.compile(
+        r"(?=[pa0@])(?:"
+        r"Proof ID:\s*(?P<proof_id>\S+)\s*$"
+        r"|(?P<label>address:\s*)?(?P<address>\b0x[0-9a-fA-F]{40}\b)"
+        r"|(?<![\w@])@(?P<mention>\w{1,15})"
+        r")",
+        re.IGNORECASE
+    )
+
+    def parse(self, text: Optional[str]) -> ParsedTweet:
+        """Extract the proof ID, wallet address and mentions of a tweet."""
+        proof_id = None
+        labelled_address = None
+        bare_address = None
+        mentions: List[str] = []
+
+        for token_proof_id, label, address, mention in self._TOKENS.findall(text or ""):
+            if token_proof_id:
+                proof_id = token_proof_id
+            elif address:
+                if not is_checksum_valid(address):
+                    continue
+                if label:
+                    if labelled_address is None:
+                        labelled_address = address
+                elif bare_address is None:
+                    bare_address = address
+            else:
+                mentions.append(mention)
+
+        wallet_address = labelled_address or bare_address
+        return ParsedTweet(
+            proof_id=proof_id,
+            wallet_address=to_checksum_address(wallet_address) if wallet_address else None,
+            mentions=tuple(mentions)
+        )
+
+    def parse_many(self, texts: Iterable[Optional[str]]) -> List[ParsedTweet]:
+        """Parse a page of tweets."""
+        return [self.parse(text) for text in texts]
+
+    def proof_ids(self, texts: Iterable[Optional[str]]) -> List[str]:
+        """Return the proof IDs found in a page of tweets."""
+        return [
+            parsed.proof_id for parsed in self.parse_many(texts)
+            if parsed.proof_id is not None
+        ]
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import threading
+from typing import Any, Optional
+
+from .cache import TTLCache
+
+# Valid proofs are immutable, invalid ones may only be missing for now
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 60
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def proof_payload_hash(payload: Any) -> str:
+    """Return a stable SHA-256 digest of a proof payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class VerificationCache:
+    """
+    Cache of proof verification verdicts keyed by proof ID and by
+    content hash of the proof payload
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        maxsize: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        """
+        Initialize the cache
+
+        Args:
+            ttl (float): Lifetime of a valid verdict in seconds
+            negative_ttl (float): Lifetime of an invalid verdict in seconds
+            maxsize (int): Maximum number of cached keys
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Counted per lookup; one get may probe both keys
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        proof_id: Optional[str] = None,
+        payload: Any = None
+    ) -> Optional[bool]:
+        """
+        Look up a cached verdict
+
+        Args:
+            proof_id (Optional[str]): Opacity proof ID
+            payload (Any): Proof payload as returned by the prover logs
+
+        Returns:
+            Optional[bool]: The cached verdict, or None on a miss
+        """
+        verdict = None
+        if proof_id is not None:
+            verdict = self._cache.get(("id", proof_id))
+        if verdict is None and payload is not None:
+            verdict = self._cache.get(("sha256", proof_payload_hash(payload)))
+        with self._stats_lock:
+            if verdict is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return verdict
+
+    def put(
+        self,
+        verdict: bool,
+        proof_id: Optional[str] = None,
+        payload: Any = None
+    ) -> None:
+        """
+        Cache a verdict under the proof ID and/or payload hash
+
+        Args:
+            verdict (bool): True if the proof is valid
+            proof_id (Optional[str]): Opacity proof ID
+            payload (Any): Proof payload as returned by the prover logs
+        """
+        ttl = self.ttl if verdict else self.negative_ttl
+        if proof_id is not None:
+            self._cache.put(("id", proof_id), verdict, ttl=ttl)
+        if payload is not None:
+            self._cache.put(("sha256", proof_payload_hash(payload)), verdict, ttl=ttl)
+
+    def __contains__(self, proof_id: str) -> bool:
+        """Return True if a verdict is cached for proof_id, without counting a lookup."""
+        return ("id", proof_id) in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
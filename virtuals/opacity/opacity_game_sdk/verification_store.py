@@ -0,0 +1,354 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_DB_PATH = "verification_state.db"
+
+# Steps a mention moves through, in order
+VERIFICATION_STEPS = ("fetched", "verified", "settled", "replied")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verifications (
+    tweet_id    TEXT PRIMARY KEY,
+    author_id   TEXT,
+    proof_id    TEXT,
+    valid       INTEGER NOT NULL,
+    verified_at REAL NOT NULL,
+    tx_hash     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_verifications_proof ON verifications (proof_id);
+CREATE INDEX IF NOT EXISTS idx_verifications_author ON verifications (author_id);
+
+CREATE TABLE IF NOT EXISTS verified_agents (
+    agent_id    TEXT PRIMARY KEY,
+    verified_at REAL NOT NULL,
+    tx_hash     TEXT
+);
+
+CREATE TABLE IF NOT EXISTS verification_steps (
+    tweet_id          TEXT PRIMARY KEY,
+    original_tweet_id TEXT,
+    proof_id          TEXT,
+    state             TEXT NOT NULL,
+    valid             INTEGER,
+    updated_at        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_steps_original ON verification_steps (original_tweet_id);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key        TEXT PRIMARY KEY,
+    owner      TEXT,
+    status     TEXT NOT NULL,
+    result     TEXT,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class VerificationStore:
+    """
+    Durable, indexed record of verified tweets, agents, proof verdicts and
+    settlement transaction hashes, backed by SQLite in WAL mode.
+
+    Lookups hit the database instead of loading history into memory, and
+    every write is a single atomic transaction.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, timeout: float = 30.0) -> None:
+        """
+        Open or create the store
+
+        Args:
+            path (str): SQLite database file
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def import_legacy_files(self, agents_file: str, tweets_file: str) -> None:
+        """One-off import of the verified_agents.txt / verified_tweets.txt files."""
+        with self._lock:
+            if self._fetchone("SELECT 1 FROM meta WHERE key = 'legacy_imported'"):
+                return
+            now = time.time()
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                # Another process may have imported while we waited for the lock
+                if self._conn.execute(
+                    "SELECT 1 FROM meta WHERE key = 'legacy_imported'"
+                ).fetchone():
+                    return
+                for sql, path in (
+                    (
+                        "INSERT OR IGNORE INTO verified_agents (agent_id, verified_at) "
+                        "VALUES (?, ?)",
+                        agents_file
+                    ),
+                    (
+                        "INSERT OR IGNORE INTO verifications (tweet_id, valid, verified_at) "
+                        "VALUES (?, 1, ?)",
+                        tweets_file
+                    ),
+                ):
+                    if not os.path.exists(path):
+                        continue
+                    with open(path, "r") as f:
+                        self._conn.executemany(
+                            sql,
+                            ((line.strip(), now) for line in f if line.strip())
+                        )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                    (str(now),)
+                )
+
+    def is_tweet_verified(self, tweet_id: str) -> bool:
+        """Return True if a valid proof was recorded for the tweet."""
+        row = self._fetchone(
+            "SELECT 1 FROM verifications WHERE tweet_id = ? AND valid = 1",
+            (str(tweet_id),)
+        )
+        return row is not None
+
+    def is_agent_verified(self, agent_id: str) -> bool:
+        """Return True if the agent has been verified before."""
+        row = self._fetchone(
+            "SELECT 1 FROM verified_agents WHERE agent_id = ?",
+            (str(agent_id),)
+        )
+        return row is not None
+
+    def record_verification(
+        self,
+        tweet_id: str,
+        valid: bool,
+        author_id: Optional[str] = None,
+        proof_id: Optional[str] = None
+    ) -> bool:
+        """
+        Record the verdict for a tweet's proof
+
+        A valid verdict replaces an earlier invalid one but is never
+        overwritten.
+
+        Returns:
+            bool: True if the record was created or changed
+        """
+        changed = self._write(
+            """
+            INSERT INTO verifications (tweet_id, author_id, proof_id, valid, verified_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (tweet_id) DO UPDATE SET
+                author_id = COALESCE(excluded.author_id, author_id),
+                proof_id = COALESCE(excluded.proof_id, proof_id),
+                valid = excluded.valid,
+                verified_at = excluded.verified_at
+            WHERE verifications.valid = 0
+            """,
+            (
+                str(tweet_id),
+                None if author_id is None else str(author_id),
+                proof_id,
+                1 if valid else 0,
+                time.time()
+            )
+        )
+        return changed > 0
+
+    def add_verified_agent(self, agent_id: str) -> bool:
+        """Record a verified agent. Returns True if the agent was newly added."""
+        added = self._write(
+            "INSERT OR IGNORE INTO verified_agents (agent_id, verified_at) VALUES (?, ?)",
+            (str(agent_id), time.time())
+        )
+        return added > 0
+
+    def record_tx_hash(
+        self,
+        tx_hash: str,
+        tweet_id: Optional[str] = None,
+        agent_id: Optional[str] = None
+    ) -> None:
+        """Attach a settlement transaction hash to a verification and/or agent."""
+        with self._lock:
+            if tweet_id is not None:
+                self._write(
+                    "UPDATE verifications SET tx_hash = ? WHERE tweet_id = ?",
+                    (tx_hash, str(tweet_id))
+                )
+            if agent_id is not None:
+                self._write(
+                    "UPDATE verified_agents SET tx_hash = ? WHERE agent_id = ? AND tx_hash IS NULL",
+                    (tx_hash, str(agent_id))
+                )
+
+    def get_verification(self, tweet_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored verification for a tweet."""
+        row = self._fetchone(
+            "SELECT * FROM verifications WHERE tweet_id = ?",
+            (str(tweet_id),)
+        )
+        return dict(row) if row else None
+
+    def find_by_proof(self, proof_id: str) -> List[Dict[str, Any]]:
+        """Return all verifications recorded for a proof ID."""
+        rows = self._fetchall(
+            "SELECT * FROM verifications WHERE proof_id = ? ORDER BY verified_at",
+            (proof_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def list_verifications(self) -> List[Dict[str, Any]]:
+        """Return every recorded verification, oldest first."""
+        rows = self._fetchall("SELECT * FROM verifications ORDER BY verified_at")
+        return [dict(row) for row in rows]
+
+    def get_step(self, tweet_id: str) -> Optional[Dict[str, Any]]:
+        """Return how far the verification of a mention has progressed."""
+        row = self._fetchone(
+            "SELECT * FROM verification_steps WHERE tweet_id = ?",
+            (str(tweet_id),)
+        )
+        return dict(row) if row else None
+
+    def advance_step(
+        self,
+        tweet_id: str,
+        state: str,
+        original_tweet_id: Optional[str] = None,
+        proof_id: Optional[str] = None,
+        valid: Optional[bool] = None
+    ) -> bool:
+        """
+        Move a mention's verification forward to state
+
+        Steps never move backwards, so a replayed stage cannot undo progress.
+
+        Returns:
+            bool: True if the mention moved to state
+        """
+        rank = VERIFICATION_STEPS.index(state)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT state FROM verification_steps WHERE tweet_id = ?",
+                (str(tweet_id),)
+            ).fetchone()
+            if row is not None and VERIFICATION_STEPS.index(row["state"]) >= rank:
+                return False
+            self._conn.execute(
+                """
+                INSERT INTO verification_steps
+                    (tweet_id, original_tweet_id, proof_id, state, valid, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (tweet_id) DO UPDATE SET
+                    original_tweet_id = COALESCE(excluded.original_tweet_id, original_tweet_id),
+                    proof_id = COALESCE(excluded.proof_id, proof_id),
+                    state = excluded.state,
+                    valid = COALESCE(excluded.valid, valid),
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    str(tweet_id),
+                    None if original_tweet_id is None else str(original_tweet_id),
+                    proof_id,
+                    state,
+                    None if valid is None else int(bool(valid)),
+                    time.time()
+                )
+            )
+            return True
+
+    def claim_key(self, key: str, owner: Optional[str] = None) -> bool:
+        """
+        Claim an idempotency key before performing the work it guards
+
+        A key is claimed once; a key whose work failed can be claimed again.
+
+        Returns:
+            bool: True if the caller now owns the work
+        """
+        with self._lock:
+            now = time.time()
+            if self._write(
+                "INSERT OR IGNORE INTO idempotency_keys (key, owner, status, updated_at) "
+                "VALUES (?, ?, 'claimed', ?)",
+                (key, owner, now)
+            ):
+                return True
+            return self._write(
+                "UPDATE idempotency_keys SET owner = ?, status = 'claimed', updated_at = ? "
+                "WHERE key = ? AND status = 'failed'",
+                (owner, now, key)
+            ) > 0
+
+    def complete_key(self, key: str, result: Optional[str] = None) -> None:
+        """Mark the work guarded by a key as done, with its result."""
+        self._write(
+            "UPDATE idempotency_keys SET status = 'done', result = ?, updated_at = ? "
+            "WHERE key = ?",
+            (result, time.time(), key)
+        )
+
+    def fail_key(self, key: str) -> None:
+        """Release a key whose work failed so it can be retried."""
+        self._write(
+            "UPDATE idempotency_keys SET status = 'failed', updated_at = ? WHERE key = ?",
+            (time.time(), key)
+        )
+
+    def get_key(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the state of an idempotency key."""
+        row = self._fetchone("SELECT * FROM idempotency_keys WHERE key = ?", (key,))
+        return dict(row) if row else None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a stored setting or checkpoint value."""
+        row = self._fetchone("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Durably store a setting or checkpoint value."""
+        self._write(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def count_verified_agents(self) -> int:
+        """Return the number of verified agents."""
+        return self._fetchone("SELECT COUNT(*) FROM verified_agents")[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()